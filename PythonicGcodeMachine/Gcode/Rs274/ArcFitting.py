@@ -0,0 +1,349 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to replace G1 polylines by G2 and G3 arcs.
+
+Usage::
+
+   toolpath = Toolpath(program)
+   arc_fitting = ArcFitting(toolpath, tolerance=0.01)
+   new_program = arc_fitting.to_program()
+   print(arc_fitting.report)
+
+This is the reverse of the linearisation of arcs done by CAM software. A run of G1 motions whose
+points lie on a circle within the tolerance is replaced by an arc in the selected plane (G17, G18
+or G19), the centre is written with I J K words or with an R word. The polylines are found as for
+the simplification, see :class:`.Simplification.Polylines`.
+
+**Implementation**
+
+Each polyline is a candidate window. The circle through the first, the middle and the last point of
+each window is computed, then the window is checked in batch:
+
+* the distance of each point to the circle is lower than the tolerance,
+* the points turn around the centre in the same direction for less than a full turn,
+* the distance between each segment and the arc, the sagitta, is lower than the tolerance,
+* the points are in a plane parallel to the selected plane.
+
+A window which doesn't match is split at its point of maximum deviation, and the new windows are
+checked at the next iteration. Windows with less than *min_segments* segments are left unchanged.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'ArcFitting',
+]
+
+####################################################################################################
+
+import numpy as np
+
+from . import Ast
+from .Simplification import Polylines, PolylineSimplification
+from .Toolpath import Toolpath
+from .Transform import rewrite_items
+
+####################################################################################################
+
+def _circle(a, b, c):
+
+    """Return the centre and the radius of the circles through three points, NaN if the points are
+    collinear.
+
+    """
+
+    b = b - a
+    c = c - a
+    denominator = 2 * (b[:,0]*c[:,1] - b[:,1]*c[:,0])
+    b2 = np.sum(b**2, axis=1)
+    c2 = np.sum(c**2, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        u = (c[:,1]*b2 - b[:,1]*c2) / denominator
+        v = (b[:,0]*c2 - c[:,0]*b2) / denominator
+    centre = a + np.column_stack((u, v))
+    radius = np.hypot(u, v)
+    return centre, radius
+
+####################################################################################################
+
+class ArcFitting:
+
+    """Class to fit arcs on the G1 polylines of a toolpath.
+
+    Parameters:
+
+    * *tolerance*: maximum distance in mm between the polyline and the arc,
+    * *min_segments*: minimum number of G1 motions replaced by an arc,
+    * *max_radius*: maximum radius of an arc in mm,
+    * *use_radius*: use R instead of I J K.
+
+    :attr:`removed` flags the lines which are removed and :attr:`arc_lines` gives the index of
+    the lines which are replaced by an arc.
+
+    """
+
+    MOTION_GCODES = PolylineSimplification.MOTION_GCODES
+
+    ##############################################
+
+    def __init__(self, toolpath, tolerance=0.01, min_segments=3, max_radius=1000., use_radius=False):
+
+        self._toolpath = toolpath
+        self._tolerance = float(tolerance)
+        self._min_segments = max(int(min_segments), 2)
+        self._max_radius = float(max_radius)
+        self._use_radius = bool(use_radius)
+
+        self._fit()
+
+    ##############################################
+
+    @property
+    def toolpath(self):
+        return self._toolpath
+
+    @property
+    def tolerance(self):
+        return self._tolerance
+
+    ##############################################
+
+    @property
+    def number_of_arcs(self):
+        return self.arc_lines.shape[0]
+
+    @property
+    def report(self):
+        """Dictionary which reports the line count reduction"""
+        number_of_lines = len(self._toolpath)
+        number_of_removed_lines = int(np.count_nonzero(self.removed))
+        return {
+            'lines': number_of_lines,
+            'removed_lines': number_of_removed_lines,
+            'remaining_lines': number_of_lines - number_of_removed_lines,
+            'arcs': self.number_of_arcs,
+            'reduction': number_of_removed_lines / number_of_lines if number_of_lines else 0.,
+        }
+
+    ##############################################
+
+    def _fit(self):
+
+        toolpath = self._toolpath
+        min_segments = self._min_segments
+
+        polylines = Polylines(toolpath)
+        # line of each point, the plane is the same on a polyline
+        point_line = np.empty(polylines.number_of_points, dtype=np.intp)
+        point_line[polylines.end_point] = polylines.members
+        point_line[polylines.start_point] = polylines.members[polylines.is_first]
+        uvw = np.take_along_axis(polylines.points, toolpath.plane_axes(point_line), axis=1)
+
+        window_start = polylines.start_point
+        window_stop = polylines.last_point
+        arcs = []
+        while True:
+            is_candidate = window_stop - window_start >= min_segments
+            window_start = window_start[is_candidate]
+            window_stop = window_stop[is_candidate]
+            if not window_start.shape[0]:
+                break
+            is_arc, split, centre, radius, sweep = self._check(uvw, window_start, window_stop)
+            arcs.append((window_start[is_arc], window_stop[is_arc], centre[is_arc], radius[is_arc], sweep[is_arc]))
+            failed = ~is_arc
+            window_start, window_stop = (
+                np.concatenate((window_start[failed], split[failed])),
+                np.concatenate((split[failed], window_stop[failed])),
+            )
+
+        if arcs:
+            arc_start, arc_stop, centre, radius, sweep = [np.concatenate(columns) for columns in zip(*arcs)]
+        else:
+            arc_start = arc_stop = np.zeros(0, dtype=np.intp)
+            centre = np.zeros((0, 2))
+            radius = sweep = np.zeros(0)
+        order = np.argsort(arc_start)
+        arc_start, arc_stop = arc_start[order], arc_stop[order]
+
+        point_member = np.full(polylines.number_of_points, -1)
+        point_member[polylines.end_point] = polylines.members
+        self.arc_lines = point_member[arc_stop]
+        self.removed = np.zeros(len(toolpath), dtype=bool)
+        # the interior points of an arc are removed
+        covered = np.zeros(polylines.number_of_points + 1, dtype=np.int64)
+        np.add.at(covered, arc_start + 1, 1)
+        np.add.at(covered, arc_stop, -1)
+        is_interior = np.cumsum(covered)[:-1] > 0
+        self.removed[point_member[is_interior]] = True
+
+        # arc geometry in the plane coordinates of each arc line
+        self._arc_start = uvw[arc_start]
+        self._centre = centre[order]
+        self._radius = radius[order]
+        self._sweep = sweep[order]
+
+    ##############################################
+
+    def _check(self, uvw, window_start, window_stop):
+
+        """Check the windows, return a tuple (match flag, split point, centre, radius, sweep)"""
+
+        tolerance = self._tolerance
+        number_of_windows = window_start.shape[0]
+        middle = (window_start + window_stop) // 2
+        centre, radius = _circle(uvw[window_start,:2], uvw[middle,:2], uvw[window_stop,:2])
+
+        # points of the windows
+        counts = window_stop - window_start + 1
+        first = np.cumsum(counts) - counts
+        window = np.repeat(np.arange(number_of_windows), counts)
+        offset = np.arange(window.shape[0]) - first[window]
+        point = window_start[window] + offset
+        is_last = offset == counts[window] - 1
+
+        delta = uvw[point,:2] - centre[window]
+        with np.errstate(invalid='ignore'):
+            error = np.abs(np.hypot(delta[:,0], delta[:,1]) - radius[window])
+        angle = np.arctan2(delta[:,1], delta[:,0])
+        step = np.zeros_like(angle)
+        step[:-1] = np.pi - np.mod(np.pi - (angle[1:] - angle[:-1]), 2*np.pi)
+        step[is_last] = 0
+        sweep = np.add.reduceat(step, first)
+        direction = np.sign(sweep)
+
+        with np.errstate(invalid='ignore'):
+            sagitta = radius[window] * (1 - np.cos(step / 2))
+            bad_point = ((error > tolerance) |
+                         (sagitta > tolerance) |
+                         ((step * direction[window] <= 0) & ~is_last) |
+                         (np.abs(uvw[point,2] - uvw[window_start[window],2]) > 1e-9))
+        is_arc = ((np.add.reduceat(bad_point, first) == 0) &
+                  np.isfinite(radius) &
+                  (radius <= self._max_radius) &
+                  (np.abs(sweep) < 2*np.pi - 1e-6))
+
+        # split at the point of maximum deviation, or at the middle
+        error = np.where(np.isfinite(error) & (offset > 0) & ~is_last, error, -1)
+        maximum = np.maximum.reduceat(error, first)
+        is_maximum = (error == maximum[window]) & (error > 0)
+        split = middle.copy()
+        candidates = np.flatnonzero(is_maximum)
+        windows, index = np.unique(window[candidates], return_index=True)
+        split[windows] = point[candidates[index]]
+
+        return is_arc, split, centre, radius, sweep
+
+    ##############################################
+
+    def _arc_words(self):
+
+        """Return a dictionary line index -> (motion G-code, {letter: new value}) for the arc lines"""
+
+        toolpath = self._toolpath
+        n = Toolpath.NUMBER_OF_LINEAR_AXES
+        lines = self.arc_lines
+        number_of_arcs = lines.shape[0]
+        rows = np.arange(number_of_arcs)
+
+        axes = toolpath.plane_axes(lines)
+        scale = np.where(toolpath.units[lines] == 20, Toolpath.MM_PER_INCH, 1.)
+        offset = toolpath.offset[lines,:n]
+        start_uvw = self._arc_start.copy()
+        start = toolpath.from_plane(start_uvw, lines)
+        end = toolpath.end[lines,:n]
+        start_program = (start - offset) / scale[:,np.newaxis]
+        end_program = (end - offset) / scale[:,np.newaxis]
+        is_incremental = toolpath.distance_mode[lines] == 91
+        values = np.where(is_incremental[:,np.newaxis], end_program - start_program, end_program)
+
+        # the plane axes are always written
+        is_written = ~np.isnan(toolpath.axis_words[lines,:n])
+        is_written[rows,axes[:,0]] = True
+        is_written[rows,axes[:,1]] = True
+
+        centre_offset = (self._centre - start_uvw[:,:2]) / scale[:,np.newaxis]
+        radius = self._radius / scale
+        radius = np.where(np.abs(self._sweep) > np.pi, -radius, radius)
+        motion = np.where(self._sweep > 0, 3, 2)
+
+        arc_words = {}
+        letters = Toolpath.LINEAR_AXES
+        offset_letters = Toolpath.ARC_OFFSET_LETTERS
+        for k, i in enumerate(lines.tolist()):
+            words = {letters[j]: float(values[k,j]) for j in range(n) if is_written[k,j]}
+            if self._use_radius:
+                words['R'] = float(radius[k])
+            else:
+                for j in (0, 1):
+                    words[offset_letters[axes[k,j]]] = float(centre_offset[k,j])
+            arc_words[i] = (int(motion[k]), words)
+        return arc_words
+
+    ##############################################
+
+    def _has_motion_gcode(self, line):
+        for word in line.iter_on_g_word():
+            if word.value in self.MOTION_GCODES:
+                return True
+        return False
+
+    ##############################################
+
+    def to_program(self, decimals=None):
+
+        """Return the program where the polylines are replaced by arcs, new values are rounded to the
+        given number of decimals if it is set.
+
+        """
+
+        program = self._toolpath.program
+        machine = program.machine
+
+        def make_word(letter, value):
+            if decimals is not None:
+                value = round(value, decimals)
+            return Ast.Word(letter, value, machine)
+
+        arc_words = self._arc_words()
+        removed = self.removed.tolist()
+        new_program = Ast.Program(machine=machine)
+        # set when the modal motion must be restored to G1
+        restore_linear = False
+        for i, line in enumerate(program):
+            if removed[i]:
+                continue
+            words = arc_words.get(i)
+            if words is not None:
+                motion, words = words
+                line = line.clone()
+                items = [item for item in line
+                         if not (isinstance(item, Ast.Word) and item.letter == 'G' and item.value == 1)]
+                line._items[:] = [Ast.Word('G', motion, machine)] + rewrite_items(items, words, make_word)
+                restore_linear = True
+            elif restore_linear and line:
+                line = line.clone()
+                if not self._has_motion_gcode(line):
+                    line._items.insert(0, Ast.Word('G', 1, machine))
+                restore_linear = False
+            new_program += line
+
+        return new_program
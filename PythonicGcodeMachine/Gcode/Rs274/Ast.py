@@ -169,6 +169,18 @@ class Program(MachineMixin):
     def __str__(self):
         return '\n'.join(map(str, self))
 
+    ##############################################
+
+    def write(self, fh, decimals=3, **kwargs):
+
+        """Write the program to a file object or a path, the numbers are formatted with the given
+        number of decimals. See :class:`.Writer.ProgramWriter` for the other parameters.
+
+        """
+
+        from .Writer import ProgramWriter
+        return ProgramWriter(decimals=decimals, **kwargs).write(self, fh)
+
 ####################################################################################################
 
 class CloneMixin:
@@ -295,8 +307,8 @@ class Line(MachineMixin):
     def clone(self):
 
         line = self.__class__(self._deleted, self._line_number, self._comment, self._machine)
-        for item in self:
-            line += item.clone()
+        # the items are valid
+        line._items = [item.clone() for item in self._items]
 
         return line
 
@@ -570,7 +582,11 @@ class Word(LineItem):
     ##############################################
 
     def clone(self):
-        return self.__class__(self._letter, self._clone_value(self._value), self._machine)
+        # skip the checks of the letter and the value
+        word = self.__class__.__new__(self.__class__)
+        word.__dict__.update(self.__dict__)
+        word._value = self._clone_value(self._value)
+        return word
 
     ##############################################
 
@@ -878,7 +894,7 @@ class SquareRoot(UnaryOperation):
     __gcode__ = 'sqrt'
 
 class Tangent(UnaryOperation):
-    __function__ = staticmethod(lambda x: ath.tan(math.radians(x)))
+    __function__ = staticmethod(lambda x: math.tan(math.radians(x)))
     __gcode__ = 'tan'
 
 ####################################################################################################
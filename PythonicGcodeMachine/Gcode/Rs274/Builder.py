@@ -0,0 +1,342 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to build programs from NumPy arrays.
+
+Usage::
+
+   # (n, 3) array of positions, NaN means the word is missing
+   builder = ProgramBuilder(positions, letters='XYZ', motion=motion, feed=1000.)
+   program = builder.to_program()
+   text = builder.to_text(decimals=3)
+   builder.write('output.ngc', decimals=3)
+
+Each row of the arrays is a line made of a motion G-code, the words of the position columns and an
+F word, in this order. The motion codes and the feed rates are only written when they change if
+*modal* is set, the deleted lines are ignored to find the modal values.
+
+Building a program using :class:`.Ast.Line` and :class:`.Ast.Word` checks each letter and each
+value. Here the arrays are checked once per column, then the words are created without check, or
+the text is directly formatted from the columns by :class:`.Writer.ProgramWriter`.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'ProgramBuilder',
+]
+
+####################################################################################################
+
+import gc
+
+import numpy as np
+
+from . import Ast
+from .Toolpath import last_index
+from .Writer import ProgramWriter
+
+####################################################################################################
+
+def _make_word(letter, value, machine):
+
+    """Create a word from a checked letter and value"""
+
+    word = Ast.Word.__new__(Ast.Word)
+    word._machine = machine
+    word._letter = letter
+    word._value = value
+    return word
+
+####################################################################################################
+
+def _make_line(deleted, line_number, comment, machine):
+
+    """Create a line from checked attributes"""
+
+    line = Ast.Line.__new__(Ast.Line)
+    line._machine = machine
+    line._deleted = deleted
+    line._line_number = line_number
+    line._comment = comment
+    line._items = []
+    return line
+
+####################################################################################################
+
+class ProgramBuilder:
+
+    """Class to build a program from arrays.
+
+    Parameters:
+
+    * *positions*: (n, k) array of word values, NaN if the word is missing,
+    * *letters*: letter of each column of *positions*,
+    * *motion*: motion G-code of each line, 0, 1, 2, 3 or -1 if the line has no motion code, or
+      a scalar for all the lines,
+    * *feed*: feed rate of each line, NaN if unset, or a scalar,
+    * *deleted*: flag the lines which are deleted, i.e. prefixed by ``/``,
+    * *comments*: end of line comment of each line, None if unset,
+    * *line_numbers*: line number of each line, or the increment of the line numbers,
+    * *modal*: write the motion codes and the feed rates only when they change.
+
+    A :exc:`ValueError` is raised if an array is invalid.
+
+    """
+
+    MOTION_CODES = (0, 1, 2, 3)
+    NO_MOTION = -1
+
+    ##############################################
+
+    def __init__(self, positions,
+                 letters='XYZ',
+                 motion=1,
+                 feed=None,
+                 deleted=None,
+                 comments=None,
+                 line_numbers=None,
+                 modal=True,
+                 machine=None,
+    ):
+
+        self._machine = machine
+        self._letters = self._check_letters(letters)
+
+        positions = np.array(positions, dtype=np.float64)
+        if positions.ndim == 1:
+            positions = positions[:,np.newaxis]
+        if positions.ndim != 2 or positions.shape[1] != len(self._letters):
+            raise ValueError('Positions must be a (n, {}) array'.format(len(self._letters)))
+        if np.any(np.isinf(positions)):
+            raise ValueError('Infinite position')
+        number_of_lines = positions.shape[0]
+        self._positions = positions
+
+        motion = self._row_array(motion, np.int64, 'motion')
+        is_invalid = ~np.isin(motion, self.MOTION_CODES + (self.NO_MOTION,))
+        if np.any(is_invalid):
+            raise ValueError('Invalid motion code {}'.format(motion[is_invalid][0]))
+
+        if feed is None:
+            feed = np.nan
+        feed = self._row_array(feed, np.float64, 'feed')
+        if np.any(feed <= 0) or np.any(np.isinf(feed)):
+            raise ValueError('Invalid feed rate')
+
+        if deleted is None:
+            deleted = False
+        self._deleted = self._row_array(deleted, bool, 'deleted')
+
+        if comments is not None:
+            comments = [None if comment is None else str(comment) for comment in comments]
+            if len(comments) != number_of_lines:
+                raise ValueError('Got {} comments for {} lines'.format(len(comments), number_of_lines))
+            for comment in comments:
+                if comment is not None and '\n' in comment:
+                    raise ValueError('Invalid comment {!r}'.format(comment))
+        self._comments = comments
+
+        if line_numbers is not None:
+            if np.isscalar(line_numbers):
+                line_numbers = np.arange(1, number_of_lines + 1) * int(line_numbers)
+            line_numbers = np.asarray(line_numbers)
+            if line_numbers.shape != (number_of_lines,) or np.any(line_numbers < 0):
+                raise ValueError('Invalid line numbers')
+            line_numbers = line_numbers.astype(np.int64)
+        self._line_numbers = line_numbers
+
+        self._motion, self._feed = self._modal_columns(motion, feed, bool(modal))
+
+    ##############################################
+
+    @staticmethod
+    def _check_letters(letters):
+        letters = tuple(str(letter).upper() for letter in letters)
+        for letter in letters:
+            if letter not in Ast.Word.LETTERS or letter in 'GMF':
+                raise ValueError('Invalid letter {}'.format(letter))
+        if len(set(letters)) != len(letters):
+            raise ValueError('Duplicated letter')
+        return letters
+
+    ##############################################
+
+    def _row_array(self, value, dtype, name):
+        number_of_lines = self._positions.shape[0]
+        array = np.asarray(value)
+        if array.ndim == 0:
+            array = np.full(number_of_lines, value)
+        if array.shape != (number_of_lines,):
+            raise ValueError('Got {} {} values for {} lines'.format(array.shape[0], name, number_of_lines))
+        if dtype is np.int64 and array.dtype.kind == 'f' and not np.all(array == np.round(array)):
+            raise ValueError('Non integer {} value'.format(name))
+        return array.astype(dtype)
+
+    ##############################################
+
+    def _modal_columns(self, motion, feed, modal):
+
+        """Return the motion codes and the feed rates which are written"""
+
+        if not modal:
+            return motion, feed
+
+        deleted = self._deleted
+        number_of_lines = motion.shape[0]
+
+        def previous(mask):
+            # index of the previous active line where mask is set
+            index = np.full(number_of_lines, -1)
+            index[1:] = last_index(mask & ~deleted)[:-1]
+            return index
+
+        has_motion = motion != self.NO_MOTION
+        index = previous(has_motion)
+        motion = np.where(has_motion & (deleted | (index < 0) | (motion != motion[index])),
+                          motion, self.NO_MOTION)
+
+        has_feed = ~np.isnan(feed)
+        index = previous(has_feed)
+        feed = np.where(has_feed & (deleted | (index < 0) | (feed != feed[index])),
+                        feed, np.nan)
+
+        return motion, feed
+
+    ##############################################
+
+    @property
+    def letters(self):
+        return ''.join(self._letters)
+
+    def __len__(self):
+        return self._positions.shape[0]
+
+    ##############################################
+
+    def to_program(self, decimals=None):
+
+        """Return an :class:`.Ast.Program` instance, the values are rounded to the given number of
+        decimals if it is set.
+
+        """
+
+        positions = self._positions
+        feed = self._feed
+        if decimals is not None:
+            positions = np.round(positions, decimals)
+            feed = np.round(feed, decimals)
+
+        program = Ast.Program(machine=self._machine)
+        # the collections of the garbage collector triggered by the allocation of the nodes are
+        # useless, the AST doesn't have cycles
+        is_gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            program._lines = self._make_lines(positions, feed)
+        finally:
+            if is_gc_enabled:
+                gc.enable()
+
+        return program
+
+    ##############################################
+
+    def _make_lines(self, positions, feed):
+
+        machine = self._machine
+        letters = self._letters
+        number_of_lines = len(self)
+        line_numbers = self._line_numbers.tolist() if self._line_numbers is not None else [None] * number_of_lines
+        comments = self._comments or [None] * number_of_lines
+
+        lines = []
+        for deleted, line_number, comment, motion, values, feed_rate in zip(
+                self._deleted.tolist(),
+                line_numbers,
+                comments,
+                self._motion.tolist(),
+                positions.tolist(),
+                feed.tolist(),
+        ):
+            line = _make_line(deleted, line_number, comment, machine)
+            items = line._items
+            if motion != -1:
+                items.append(_make_word('G', motion, machine))
+            for letter, value in zip(letters, values):
+                if value == value:
+                    items.append(_make_word(letter, value, machine))
+            if feed_rate == feed_rate:
+                items.append(_make_word('F', feed_rate, machine))
+            lines.append(line)
+
+        return lines
+
+    ##############################################
+
+    def _columns(self):
+
+        """Return the arguments of :meth:`.Writer.ProgramWriter.format_columns`"""
+
+        number_of_lines = len(self)
+        columns = np.column_stack((self._positions, self._feed))
+        letters = self._letters + ('F',)
+
+        prefixes = None
+        parts = []
+        if np.any(self._deleted):
+            parts.append(np.where(self._deleted, '/ ', '').astype(object))
+        if self._line_numbers is not None:
+            parts.append(np.array(['N{} '.format(number) for number in self._line_numbers.tolist()], dtype=object))
+        if np.any(self._motion != self.NO_MOTION):
+            parts.append(np.array(['' if code == -1 else 'G{}'.format(code) for code in self._motion.tolist()],
+                                  dtype=object))
+        if parts:
+            prefixes = parts[0]
+            for part in parts[1:]:
+                prefixes = prefixes + part
+
+        suffixes = None
+        if self._comments is not None:
+            suffixes = ['' if comment is None else ' ; ' + comment for comment in self._comments]
+
+        return columns, letters, prefixes, suffixes
+
+    ##############################################
+
+    def to_text(self, decimals=3, **kwargs):
+
+        """Return the program as G-code text, see :class:`.Writer.ProgramWriter` for the
+        parameters.
+
+        """
+
+        writer = ProgramWriter(decimals=decimals, **kwargs)
+        return '\n'.join(writer.format_columns(*self._columns()))
+
+    ##############################################
+
+    def write(self, fh, decimals=3, **kwargs):
+
+        """Write the program to a file object or a path, return the number of lines"""
+
+        writer = ProgramWriter(decimals=decimals, **kwargs)
+        return writer.write_columns(fh, *self._columns())
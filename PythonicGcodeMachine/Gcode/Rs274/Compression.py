@@ -0,0 +1,227 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to read and write compressed G-code files.
+
+Usage::
+
+   with open_compressed('program.ngc.xz') as fh:
+       text = fh.read()
+   with open_compressed('output.ngc.gz', 'w') as fh:
+       fh.write(text)
+
+   program = parser.parse_file('program.ngc.zst')
+   program.write('output.ngc.gz')
+
+The supported formats are gzip, xz and zstd, the last one requires the :mod:`compression.zstd`
+module of Python 3.14 or the `zstandard <https://pypi.org/project/zstandard>`_ package. A file is
+read according to the magic bytes of its content, a file is written according to its suffix,
+``.gz``, ``.xz`` or ``.zst``, unless a format is given. The other files are read and written as is.
+
+The parser reads a compressed file by chunks of complete lines, see :func:`iter_text_chunks`, so
+the decompressed text is never held at once.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'COMPRESSION_FORMATS',
+    'compression_from_suffix',
+    'decompress',
+    'detect_compression',
+    'iter_text_chunks',
+    'open_compressed',
+]
+
+####################################################################################################
+
+from pathlib import Path
+import gzip
+import io
+import lzma
+import os
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+####################################################################################################
+
+# format -> magic bytes, suffix
+COMPRESSION_FORMATS = {
+    'gzip': (b'\x1f\x8b', '.gz'),
+    'xz': (b'\xfd7zXZ\x00', '.xz'),
+    'zstd': (b'\x28\xb5\x2f\xfd', '.zst'),
+}
+
+MAGIC_SIZE = max(len(magic) for magic, _ in COMPRESSION_FORMATS.values())
+
+DEFAULT_CHUNK_SIZE = 2**20
+
+####################################################################################################
+
+def detect_compression(data):
+
+    """Return the compression format of the bytes *data* from its magic bytes, or None"""
+
+    data = bytes(data[:MAGIC_SIZE])
+    for compression, (magic, _) in COMPRESSION_FORMATS.items():
+        if data.startswith(magic):
+            return compression
+    return None
+
+####################################################################################################
+
+def compression_from_suffix(path):
+
+    """Return the compression format of a file name, or None"""
+
+    suffix = Path(path).suffix.lower()
+    for compression, (_, _suffix) in COMPRESSION_FORMATS.items():
+        if suffix == _suffix:
+            return compression
+    return None
+
+####################################################################################################
+
+def _check_compression(compression):
+    if compression not in COMPRESSION_FORMATS:
+        raise ValueError('Unknown compression format {}'.format(compression))
+    if compression == 'zstd' and zstd is None:
+        raise ValueError('zstd compression requires the zstandard package')
+
+####################################################################################################
+
+def _open(file, mode, compression, encoding=None):
+
+    """Open a compressed file from a path or a binary file object"""
+
+    _check_compression(compression)
+    if compression == 'gzip':
+        module = gzip
+    elif compression == 'xz':
+        module = lzma
+    else:
+        module = zstd
+    return module.open(file, mode, encoding=encoding)
+
+####################################################################################################
+
+def decompress(data, compression=None):
+
+    """Decompress bytes, the format is detected if *compression* is None. Return *data* if it is not
+    compressed.
+
+    """
+
+    if compression is None:
+        compression = detect_compression(data)
+        if compression is None:
+            return data
+    with _open(io.BytesIO(data), 'rb', compression) as fh:
+        return fh.read()
+
+####################################################################################################
+
+def _detect_file_compression(file):
+
+    """Return the binary file object, which could be wrapped, and its compression format, the
+    position of the file is unchanged.
+
+    """
+
+    if file.seekable():
+        position = file.tell()
+        data = file.read(MAGIC_SIZE)
+        file.seek(position)
+    else:
+        if not hasattr(file, 'peek'):
+            file = io.BufferedReader(file)
+        data = file.peek(MAGIC_SIZE)
+    return file, detect_compression(data)
+
+####################################################################################################
+
+def open_compressed(file, mode='r', compression=None, encoding='utf-8', buffering=-1):
+
+    """Open a file which is compressed or not.
+
+    *file* is a path, or a binary file object which is then read or written as compressed, at the
+    current position. *mode* is ``'r'``, ``'w'``, ``'rb'`` or ``'wb'``. The format is detected from
+    the content of the file in read mode, or from the suffix in write mode, if *compression* is
+    None. *buffering* only applies to the uncompressed files.
+
+    Return a text or binary file object.
+
+    """
+
+    binary = 'b' in mode
+    write = 'w' in mode
+    if binary:
+        encoding = None
+    is_path = isinstance(file, (str, os.PathLike))
+
+    if compression is None:
+        if write:
+            if is_path:
+                compression = compression_from_suffix(file)
+        elif is_path:
+            with open(str(file), 'rb') as fh:
+                compression = detect_compression(fh.read(MAGIC_SIZE))
+        else:
+            file, compression = _detect_file_compression(file)
+
+    if compression is not None:
+        return _open(file, ('w' if write else 'r') + ('b' if binary else 't'), compression, encoding)
+    elif is_path:
+        return open(str(file), mode, buffering=buffering, encoding=encoding)
+    elif binary:
+        return file
+    else:
+        return io.TextIOWrapper(file, encoding=encoding)
+
+####################################################################################################
+
+def iter_text_chunks(fh, chunk_size=DEFAULT_CHUNK_SIZE):
+
+    """Yield the text of a text file object by chunks of complete lines of about *chunk_size*
+    characters, the newlines are translated to ``\\n``.
+
+    """
+
+    rest = ''
+    while True:
+        text = fh.read(chunk_size)
+        if not text:
+            break
+        text = rest + text
+        end = text.rfind('\n') + 1
+        if not end:
+            rest = text
+            continue
+        rest = text[end:]
+        yield text[:end]
+    if rest:
+        yield rest
@@ -62,7 +62,7 @@ def format_gcode_list(gcodes):
 class YamlMixin:
     def _load_yaml(self, yaml_path):
         with open(yaml_path, 'r') as fh:
-            data = yaml.load(fh.read())
+            data = yaml.safe_load(fh.read())
         return data
 
 ####################################################################################################
@@ -509,19 +509,34 @@ class ModalGroup(MeaningMixin):
 
     ##############################################
 
-    def __init__(self, index, gcodes, meaning):
+    def __init__(self, letter, index, gcodes, meaning):
 
         MeaningMixin.__init__(self, meaning)
+        self._letter = str(letter)
         self._index = int(index)
         self._gcodes = list(gcodes)
 
     ##############################################
 
+    @property
+    def letter(self):
+        """Letter of the codes, G or M"""
+        return self._letter
+
     @property
     def index(self):
-        """Group id (table key)"""
+        """Group id"""
         return self._index
 
+    @property
+    def key(self):
+        """Table key, a (letter, index) tuple"""
+        return (self._letter, self._index)
+
+    @property
+    def name(self):
+        return '{0._letter}{0._index}'.format(self)
+
     @property
     def gcodes(self):
         """G-Codes list"""
@@ -530,13 +545,19 @@ class ModalGroup(MeaningMixin):
     ##############################################
 
     def __repr__(self):
-        return '#{0._index}: ({1}) Meaning: {0._meaning}'.format(self, format_gcode_list(self._gcodes))
+        return '#{0._letter}{0._index}: ({1}) Meaning: {0._meaning}'.format(
+            self, format_gcode_list(self._gcodes))
 
 ####################################################################################################
 
 class ModalGroupSet(YamlMixin, RstMixin):
 
-    """Class for the table of modal groups."""
+    """Class for the table of modal groups.
+
+    The G and M codes have distinct groups with the same indexes, so the groups are keyed by a
+    (letter, index) tuple.
+
+    """
 
     ##############################################
 
@@ -545,13 +566,14 @@ class ModalGroupSet(YamlMixin, RstMixin):
         data = self._load_yaml(yaml_path)
 
         self._groups = {}
-        for index, d in data.items():
-            gcodes = ensure_list(d['gcodes'])
-            gcodes = [gcode_set[gcode] for gcode in gcodes]
-            group = ModalGroup(index, gcodes, d['meaning'])
-            self._groups[index] = group
-            for gcode in gcodes:
-                gcode._modal_group = group
+        for letter, groups in data.items():
+            for index, d in groups.items():
+                gcodes = ensure_list(d['gcodes'])
+                gcodes = [gcode_set[gcode] for gcode in gcodes]
+                group = ModalGroup(letter, index, gcodes, d['meaning'])
+                self._groups[group.key] = group
+                for gcode in gcodes:
+                    gcode._modal_group = group
 
     ##############################################
 
@@ -561,15 +583,16 @@ class ModalGroupSet(YamlMixin, RstMixin):
     def __iter__(self):
         return iter(self._groups.values())
 
-    def __getitem__(self, index):
-        return self._groups[index]
+    def __getitem__(self, key):
+        """Return the group of a (letter, index) key"""
+        return self._groups[key]
 
     ##############################################
 
     def sorted_iter(self):
 
         items = list(self)
-        items.sort(key=lambda item: item.index)
+        items.sort(key=lambda item: item.key)
         return items
 
     ##############################################
@@ -578,7 +601,7 @@ class ModalGroupSet(YamlMixin, RstMixin):
         self._write_rst(
             path,
             headers=('Group', 'G-codes', 'Comment'),
-            columns=('index', 'gcodes', 'meaning'),
+            columns=('name', 'gcodes', 'meaning'),
             str_gcodes=lambda gcodes: format_gcode_list(gcodes),
         )
 
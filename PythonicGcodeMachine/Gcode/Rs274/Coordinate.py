@@ -39,10 +39,12 @@ class Coordinate:
 
     def __init__(self, *args, dimension=None):
 
-        if args:
-            self._v = numpy.array(args)
+        if len(args) == 1 and not isinstance(args[0], (int, float)):
+            args = args[0]
+        if len(args):
+            self._v = np.array(args, dtype=np.float64)
         else:
-            self._v = numpy.zeros(dimension)
+            self._v = np.zeros(dimension)
 
     ##############################################
 
@@ -69,24 +71,29 @@ class Coordinate:
     ##############################################
 
     def set(self, v):
-        if isintance(self, Coordinate):
-            self._v = self._v
-        else:
-            self._v = v
+        if isinstance(v, Coordinate):
+            v = v._v
+        self._v[:] = v
 
     ##############################################
 
     def __eq__(self, v):
-        return self._v == self._v
+        if isinstance(v, Coordinate):
+            v = v._v
+        return bool(np.all(self._v == v))
 
     ##############################################
 
     def __iadd__(self, v):
-        self._v += self._v
+        if isinstance(v, Coordinate):
+            v = v._v
+        self._v += v
         return self
 
     ##############################################
 
     def __isub__(self, v):
-        self._v -= self._v
+        if isinstance(v, Coordinate):
+            v = v._v
+        self._v -= v
         return self
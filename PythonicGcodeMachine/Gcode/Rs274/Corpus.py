@@ -0,0 +1,231 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to generate synthetic G-code programs.
+
+Usage::
+
+   generator = CorpusGenerator(seed=0)
+   lines = generator.lines(10000)
+   generator.write('corpus.ngc', 10**6)
+
+The programs look like the output of a CAM software: a header which sets the modal states, then
+pockets made of a plunge, runs of G1 motions and G2/G3 arcs, and a retract, separated by rapid
+motions. The proportion of the other kinds of lines is set by *mix*, a dictionary with the keys:
+
+* ``comment``: line with an inline or an end of line comment,
+* ``expression``: motion whose values are expressions using parameters and functions,
+* ``parameter``: parameter setting,
+* ``arc``: G2 or G3 arc instead of a G1 motion.
+
+The output only depends on the seed, the mix and the number of lines. All the lines can be parsed
+by :class:`.Parser.GcodeParser`.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'CorpusGenerator',
+]
+
+####################################################################################################
+
+import math
+import random
+
+from .Compression import open_compressed
+
+####################################################################################################
+
+class CorpusGenerator:
+
+    """Class to generate deterministic synthetic programs"""
+
+    DEFAULT_MIX = {
+        'comment': .02,
+        'expression': .02,
+        'parameter': .01,
+        'arc': .1,
+    }
+
+    HEADER = (
+        '(synthetic program)',
+        'G21 G90 G17 G40 G49 G80',
+        'G54',
+        'T1 M6',
+        'S10000 M3',
+        'G0 Z5.',
+    )
+
+    FOOTER = (
+        'G0 Z5.',
+        'M5',
+        'M30',
+    )
+
+    FUNCTIONS = ('sin', 'cos', 'abs', 'sqrt', 'round', 'fix', 'fup')
+    OPERATORS = ('+', '-', '*', '/')
+
+    ##############################################
+
+    def __init__(self, seed=0, mix=None, line_numbers=False, pocket_size=200):
+
+        self._seed = seed
+        self._mix = dict(self.DEFAULT_MIX)
+        if mix is not None:
+            self._mix.update(mix)
+        self._line_numbers = bool(line_numbers)
+        self._pocket_size = max(int(pocket_size), 4)
+
+    ##############################################
+
+    @property
+    def seed(self):
+        return self._seed
+
+    @property
+    def mix(self):
+        return dict(self._mix)
+
+    ##############################################
+
+    def _body_lines(self, rng):
+
+        """Yield the lines of the pockets, forever"""
+
+        mix = self._mix
+        feed = None
+        x = y = 0.
+        pocket = 0
+        while True:
+            pocket += 1
+            # rapid to the start of the pocket, then plunge
+            x = round(rng.uniform(-100, 100), 3)
+            y = round(rng.uniform(-100, 100), 3)
+            depth = round(-rng.uniform(.5, 5), 3)
+            yield '(pocket {})'.format(pocket)
+            yield 'G0 X{:.3f} Y{:.3f}'.format(x, y)
+            new_feed = rng.choice((300, 500, 800, 1200))
+            yield 'G1 Z{:.3f} F{}'.format(depth, new_feed)
+            feed = new_feed
+            heading = rng.uniform(0, 2*math.pi)
+            is_position_known = True
+            for _ in range(self._pocket_size):
+                draw = rng.random()
+                if draw < mix['comment']:
+                    if rng.random() < .5:
+                        yield '(step {:.1f})'.format(rng.uniform(0, 100))
+                    else:
+                        yield 'G1 X{:.3f} ; step'.format(x)
+                    continue
+                draw -= mix['comment']
+                if draw < mix['parameter']:
+                    yield '#{}={:.4f}'.format(rng.randint(100, 199), rng.uniform(-10, 10))
+                    continue
+                draw -= mix['parameter']
+                heading += rng.gauss(0, .3)
+                step = rng.uniform(.05, 2)
+                x0, y0 = x, y
+                x = round(x + step * math.cos(heading), 3)
+                y = round(y + step * math.sin(heading), 3)
+                if draw < mix['expression']:
+                    # the position is given by the parameters
+                    is_position_known = False
+                    yield 'G1 X[{:.3f} + #{} * {}[{:.1f}]] Y[{:.3f} {} {:.2f}]'.format(
+                        x, rng.randint(100, 199), rng.choice(self.FUNCTIONS), rng.uniform(0, 90),
+                        y, rng.choice(self.OPERATORS), rng.uniform(1, 2),
+                    )
+                    continue
+                draw -= mix['expression']
+                if draw < mix['arc'] and is_position_known:
+                    # arc tangent to the heading, the end point is on the circle
+                    gcode, side = rng.choice((('G2', -1), ('G3', 1)))
+                    radius = rng.uniform(1, 10)
+                    i = radius * math.cos(heading + side * math.pi/2)
+                    j = radius * math.sin(heading + side * math.pi/2)
+                    sweep = side * step / radius
+                    cos, sin = math.cos(sweep), math.sin(sweep)
+                    x = round(x0 + i - (cos * i - sin * j), 3)
+                    y = round(y0 + j - (sin * i + cos * j), 3)
+                    heading += sweep
+                    is_position_known = True
+                    yield '{} X{:.3f} Y{:.3f} I{:.3f} J{:.3f}'.format(gcode, x, y, i, j)
+                    continue
+                is_position_known = True
+                if rng.random() < .05:
+                    feed = rng.choice((300, 500, 800, 1200))
+                    yield 'G1 X{:.3f} Y{:.3f} F{}'.format(x, y, feed)
+                else:
+                    yield 'G1 X{:.3f} Y{:.3f}'.format(x, y)
+            yield 'G0 Z5.'
+
+    ##############################################
+
+    def iter_lines(self, number_of_lines):
+
+        """Yield the lines of a program of *number_of_lines* lines"""
+
+        rng = random.Random(self._seed)
+        header = self.HEADER[:number_of_lines]
+        footer = self.FOOTER[:max(number_of_lines - len(header), 0)]
+        number_of_body_lines = max(number_of_lines - len(header) - len(footer), 0)
+
+        def iter_all_lines():
+            yield from header
+            body = self._body_lines(rng)
+            for _ in range(number_of_body_lines):
+                yield next(body)
+            yield from footer
+
+        for i, line in enumerate(iter_all_lines()):
+            if self._line_numbers:
+                line = 'N{} {}'.format(10 * (i + 1), line)
+            yield line
+
+    ##############################################
+
+    def lines(self, number_of_lines):
+        """Return the lines of a program of *number_of_lines* lines"""
+        return list(self.iter_lines(number_of_lines))
+
+    ##############################################
+
+    def text(self, number_of_lines):
+        return '\n'.join(self.iter_lines(number_of_lines))
+
+    ##############################################
+
+    def write(self, path, number_of_lines, chunk_size=100000):
+
+        """Write a program of *number_of_lines* lines to a file, which is compressed according to
+        its suffix, see :mod:`.Compression`.
+
+        """
+
+        with open_compressed(path, 'w') as fh:
+            chunk = []
+            for line in self.iter_lines(number_of_lines):
+                chunk.append(line)
+                if len(chunk) == chunk_size:
+                    fh.write('\n'.join(chunk) + '\n')
+                    chunk = []
+            if chunk:
+                fh.write('\n'.join(chunk) + '\n')
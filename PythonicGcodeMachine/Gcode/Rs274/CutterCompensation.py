@@ -0,0 +1,487 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to implement cutter radius compensation (G40, G41, G42).
+
+Usage::
+
+   toolpath = Toolpath(program)
+   compensation = CutterCompensation(toolpath, tool_set)
+
+   compensation.start # (n, 6) array of tool centre positions
+   compensation.end
+   compensation.centre
+   compensation.gouge # per line gouge flag
+   for index, message in compensation.diagnostics:
+       print(program[index], message)
+
+The tool radius is the half of the diameter of the tool selected by the D word, or of the tool
+loaded in the spindle if the D word is not set.
+
+**Implementation**
+
+Each compensated motion is offset by the tool radius on the left side (G41) or on the right side
+(G42) of the direction of travel, in the plane selected when the motion occurs. At a convex corner
+a circular arc centred on the programmed corner is inserted, at a concave corner the two offset
+motions are trimmed at their intersection. All the offsets and intersections are computed in batch
+using NumPy arrays.
+
+The first motion after G41 or G42, the entry move, goes from the current position to the start of
+the next offset motion. The first motion after G40, the exit move, goes from the compensated
+position to the programmed end point.
+
+A gouge is reported when the tool radius is greater than the radius of an inside arc, when an
+offset motion is reversed by the trimming at a concave corner, or when two offset motions do not
+intersect.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'CutterCompensationError',
+    'CutterCompensation',
+]
+
+####################################################################################################
+
+import numpy as np
+
+from .Toolpath import Toolpath, last_index
+
+####################################################################################################
+
+class CutterCompensationError(ValueError):
+    pass
+
+####################################################################################################
+
+def _cross(a, b):
+    return a[:,0]*b[:,1] - a[:,1]*b[:,0]
+
+def _dot(a, b):
+    return a[:,0]*b[:,0] + a[:,1]*b[:,1]
+
+def _left_normal(a):
+    return np.column_stack((-a[:,1], a[:,0]))
+
+def _wrap_angle(angle):
+    """Wrap an angle to ]-pi, pi]"""
+    return np.pi - np.mod(np.pi - angle, 2*np.pi)
+
+####################################################################################################
+
+def _intersect_line_line(point1, direction1, point2, direction2):
+
+    """Return the intersection of two lines, NaN if they are parallel"""
+
+    denominator = _cross(direction1, direction2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = _cross(point2 - point1, direction2) / denominator
+    t[np.abs(denominator) < 1e-12] = np.nan
+    return point1 + t[:,np.newaxis] * direction1
+
+def _intersect_line_circle(point, direction, centre, radius, reference):
+
+    """Return the intersection of a line and a circle which is the nearest of *reference*, NaN if
+    there is no intersection.
+
+    """
+
+    # |point + t*direction - centre| = radius with |direction| = 1
+    delta = point - centre
+    b = _dot(delta, direction)
+    c = _dot(delta, delta) - radius**2
+    discriminant = b**2 - c
+    with np.errstate(invalid='ignore'):
+        root = np.sqrt(discriminant)
+    candidates = [point + t[:,np.newaxis] * direction for t in (-b - root, -b + root)]
+    return _nearest(candidates, reference)
+
+def _intersect_circle_circle(centre1, radius1, centre2, radius2, reference):
+
+    """Return the intersection of two circles which is the nearest of *reference*, NaN if there is
+    no intersection.
+
+    """
+
+    delta = centre2 - centre1
+    distance = np.sqrt(_dot(delta, delta))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        a = (radius1**2 - radius2**2 + distance**2) / (2*distance)
+        height = np.sqrt(radius1**2 - a**2)
+        unit = delta / distance[:,np.newaxis]
+    middle = centre1 + a[:,np.newaxis] * unit
+    normal = _left_normal(unit)
+    candidates = [middle + sign * height[:,np.newaxis] * normal for sign in (-1, 1)]
+    return _nearest(candidates, reference)
+
+def _nearest(candidates, reference):
+    candidate1, candidate2 = candidates
+    distance1 = np.sum((candidate1 - reference)**2, axis=1)
+    distance2 = np.sum((candidate2 - reference)**2, axis=1)
+    use_second = ~(distance1 <= distance2) & np.isfinite(distance2)
+    return np.where(use_second[:,np.newaxis], candidate2, candidate1)
+
+####################################################################################################
+
+class CutterCompensation:
+
+    """Class to compute the tool centre path of a toolpath using cutter radius compensation.
+
+    Arrays have one row per line of the program, like :class:`Toolpath`:
+
+    * :attr:`start`, :attr:`end`: compensated positions,
+    * :attr:`centre`: arc centre, unchanged by the compensation,
+    * :attr:`radius`: tool radius, zero if the compensation is off,
+    * :attr:`join`: flag for a corner arc inserted before the motion, from :attr:`join_start` to
+      :attr:`start`, centred on the programmed start point and with the direction
+      :attr:`join_motion`,
+    * :attr:`gouge`: gouge flag.
+
+    Messages are available in :attr:`diagnostics` as a list of (line index, message) tuples.
+
+    """
+
+    ##############################################
+
+    def __init__(self, toolpath, tool_set, tolerance=1e-6):
+
+        self._toolpath = toolpath
+        self._tool_set = tool_set
+        self._tolerance = float(tolerance)
+
+        self.diagnostics = []
+        self._compute()
+
+    ##############################################
+
+    @property
+    def toolpath(self):
+        return self._toolpath
+
+    @property
+    def tool_set(self):
+        return self._tool_set
+
+    @property
+    def tolerance(self):
+        return self._tolerance
+
+    ##############################################
+
+    def _report(self, indexes, message):
+        for index in np.atleast_1d(indexes):
+            self.gouge[index] = True
+            self.diagnostics.append((int(index), message))
+        self.diagnostics.sort(key=lambda item: item[0])
+
+    ##############################################
+
+    def _tool_radius(self):
+
+        """Return the tool radius and the offset side, +1 for left and -1 for right, of each line"""
+
+        toolpath = self._toolpath
+        side = np.zeros(len(toolpath), dtype=np.int8)
+        side[toolpath.cutter_compensation == 41] = 1
+        side[toolpath.cutter_compensation == 42] = -1
+
+        keys = np.where(np.isnan(toolpath.compensation_number), toolpath.tool, toolpath.compensation_number)
+        radius = np.zeros(len(toolpath))
+        for key in np.unique(keys[side != 0]):
+            pocket = int(key)
+            mask = (keys == key) & (side != 0)
+            try:
+                tool_radius = self._tool_set[pocket].radius
+            except KeyError:
+                tool_radius = None
+            if tool_radius is None:
+                index = np.flatnonzero(mask)[0]
+                raise CutterCompensationError(
+                    'Line {}: no tool diameter for pocket {}'.format(index, pocket))
+            radius[mask] = tool_radius
+
+        return radius, side
+
+    ##############################################
+
+    def _compute(self):
+
+        toolpath = self._toolpath
+        tolerance = self._tolerance
+        number_of_lines = len(toolpath)
+        n = Toolpath.NUMBER_OF_LINEAR_AXES
+
+        self.gouge = np.zeros(number_of_lines, dtype=bool)
+        self.radius, side = self._tool_radius()
+
+        # Work in the plane coordinates (u, v, w) of each line
+        start = toolpath.to_plane(toolpath.start[:,:n])
+        end = toolpath.to_plane(toolpath.end[:,:n])
+        centre = toolpath.to_plane(toolpath.centre)
+
+        is_motion = toolpath.is_motion
+        is_arc = toolpath.is_arc
+        direction = np.where(toolpath.motion == Toolpath.CCW_ARC, 1, -1) # for arcs
+        chord = end[:,:2] - start[:,:2]
+        planar_length = np.hypot(chord[:,0], chord[:,1])
+        is_active = is_motion & (side != 0)
+        # A motion along the normal axis only is compensated as the previous motion
+        is_element = is_active & ((planar_length > tolerance) | is_arc)
+
+        # Offset of the start and end points
+        offset_start = np.zeros((number_of_lines, 2))
+        offset_end = np.zeros((number_of_lines, 2))
+        start_tangent = np.zeros((number_of_lines, 2))
+        end_tangent = np.zeros((number_of_lines, 2))
+        signed_radius = side * self.radius
+
+        is_line = is_element & ~is_arc
+        with np.errstate(invalid='ignore', divide='ignore'):
+            line_tangent = chord / planar_length[:,np.newaxis]
+        start_tangent[is_line] = end_tangent[is_line] = line_tangent[is_line]
+        line_offset = signed_radius[:,np.newaxis] * _left_normal(line_tangent)
+        offset_start[is_line] = offset_end[is_line] = line_offset[is_line]
+
+        is_arc_element = is_element & is_arc
+        arc_radius = np.hypot(*(start[:,:2] - centre[:,:2]).T)
+        compensated_radius = arc_radius - side * direction * self.radius
+        with np.errstate(invalid='ignore', divide='ignore'):
+            start_radial = (start[:,:2] - centre[:,:2]) / arc_radius[:,np.newaxis]
+            end_radial = (end[:,:2] - centre[:,:2]) / arc_radius[:,np.newaxis]
+        for offset, tangent, radial in (
+                (offset_start, start_tangent, start_radial),
+                (offset_end, end_tangent, end_radial),
+        ):
+            # the left normal of a counterclockwise arc points to the centre
+            arc_offset = -(signed_radius * direction)[:,np.newaxis] * radial
+            offset[is_arc_element] = arc_offset[is_arc_element]
+            arc_tangent = direction[:,np.newaxis] * _left_normal(radial)
+            tangent[is_arc_element] = arc_tangent[is_arc_element]
+        self._report(np.flatnonzero(is_arc_element & (compensated_radius <= tolerance)),
+                     'tool radius is greater than the arc radius')
+
+        compensated_start = start[:,:2] + offset_start
+        compensated_end = end[:,:2] + offset_end
+
+        # Split the compensated motions in chains, a chain is broken by an uncompensated motion or
+        # a change of side, radius or plane
+        changed = np.ones(number_of_lines, dtype=bool)
+        changed[1:] = ((side[1:] != side[:-1]) |
+                       (self.radius[1:] != self.radius[:-1]) |
+                       (toolpath.plane[1:] != toolpath.plane[:-1]))
+        breaks = (is_motion & ~is_active) | changed
+        chain = np.cumsum(breaks)
+
+        elements = np.flatnonzero(is_element)
+        same_chain = chain[elements[1:]] == chain[elements[:-1]]
+        is_entry = np.ones(elements.shape[0], dtype=bool)
+        is_entry[1:] = ~same_chain
+        # corners between two elements of a chain, the entry move is excluded
+        corner_mask = same_chain & ~is_entry[:-1]
+        previous = elements[:-1][corner_mask]
+        current = elements[1:][corner_mask]
+
+        # The entry move ends at the start of the next offset motion
+        entries = elements[:-1][same_chain & is_entry[:-1]]
+        after_entries = elements[1:][same_chain & is_entry[:-1]]
+        compensated_end[entries] = compensated_start[after_entries]
+
+        self.join = np.zeros(number_of_lines, dtype=bool)
+        self.join_motion = np.full(number_of_lines, Toolpath.NO_MOTION, dtype=np.int8)
+        join_previous = self._compute_corners(
+            previous, current,
+            start, centre, compensated_radius, is_arc,
+            compensated_start, compensated_end, start_tangent, end_tangent, side,
+        )
+
+        self._check_reversal(
+            elements[~is_entry],
+            start, end, centre, is_arc, direction,
+            compensated_start, compensated_end,
+        )
+
+        # Convert to the axis coordinates
+        compensated_start = toolpath.from_plane(np.column_stack((compensated_start, start[:,2])))
+        compensated_end = toolpath.from_plane(np.column_stack((compensated_end, end[:,2])))
+        self.join_start = np.full((number_of_lines, n), np.nan)
+        self.join_start[self.join] = compensated_end[join_previous]
+
+        self._assemble(is_motion, is_active, is_element, compensated_start, compensated_end)
+
+    ##############################################
+
+    def _compute_corners(self, previous, current,
+                         start, centre, compensated_radius, is_arc,
+                         compensated_start, compensated_end, start_tangent, end_tangent, side,
+    ):
+
+        tolerance = self._tolerance
+        toolpath = self._toolpath
+        corner = start[current,:2]
+
+        turn = _cross(end_tangent[previous], start_tangent[current])
+        alignment = _dot(end_tangent[previous], start_tangent[current])
+        is_tangent = (np.abs(turn) <= tolerance) & (alignment > 0)
+        is_concave = (side[current] * turn > tolerance) & ~is_tangent
+        is_convex = ~is_concave & ~is_tangent
+
+        # Insert an arc around the programmed corner
+        convex = current[is_convex]
+        self.join[convex] = True
+        self.join_motion[convex] = np.where(side[convex] > 0, Toolpath.CW_ARC, Toolpath.CCW_ARC)
+
+        # Trim the offset motions at their intersection
+        concave_previous = previous[is_concave]
+        concave_current = current[is_concave]
+        reference = corner[is_concave]
+        point1 = compensated_end[concave_previous]
+        point2 = compensated_start[concave_current]
+        intersection = np.full(point1.shape, np.nan)
+        arc1 = is_arc[concave_previous]
+        arc2 = is_arc[concave_current]
+        centre1 = centre[concave_previous,:2]
+        centre2 = centre[concave_current,:2]
+        radius1 = compensated_radius[concave_previous]
+        radius2 = compensated_radius[concave_current]
+        tangent1 = end_tangent[concave_previous]
+        tangent2 = start_tangent[concave_current]
+
+        mask = ~arc1 & ~arc2
+        intersection[mask] = _intersect_line_line(point1[mask], tangent1[mask], point2[mask], tangent2[mask])
+        mask = ~arc1 & arc2
+        intersection[mask] = _intersect_line_circle(
+            point1[mask], tangent1[mask], centre2[mask], radius2[mask], reference[mask])
+        mask = arc1 & ~arc2
+        intersection[mask] = _intersect_line_circle(
+            point2[mask], tangent2[mask], centre1[mask], radius1[mask], reference[mask])
+        mask = arc1 & arc2
+        intersection[mask] = _intersect_circle_circle(
+            centre1[mask], radius1[mask], centre2[mask], radius2[mask], reference[mask])
+
+        found = np.all(np.isfinite(intersection), axis=1)
+        compensated_end[concave_previous[found]] = intersection[found]
+        compensated_start[concave_current[found]] = intersection[found]
+        self._report(concave_current[~found], 'offset motions do not intersect at the corner')
+
+        return previous[is_convex]
+
+    ##############################################
+
+    def _check_reversal(self, elements, start, end, centre, is_arc, direction,
+                        compensated_start, compensated_end):
+
+        """Report the offset motions which are reversed by a trimming"""
+
+        tolerance = self._tolerance
+
+        lines = elements[~is_arc[elements]]
+        programmed = end[lines,:2] - start[lines,:2]
+        compensated = compensated_end[lines] - compensated_start[lines]
+        reversed_ = _dot(programmed, compensated) < -tolerance
+        self._report(lines[reversed_], 'offset motion is reversed, the tool radius is too large')
+
+        arcs = elements[is_arc[elements]]
+        arc_centre = centre[arcs,:2]
+        arc_direction = direction[arcs]
+        def angle_of(point):
+            delta = point - arc_centre
+            return np.arctan2(delta[:,1], delta[:,0])
+        programmed_start = angle_of(start[arcs,:2])
+        programmed_end = angle_of(end[arcs,:2])
+        sweep = np.mod(arc_direction * (programmed_end - programmed_start), 2*np.pi)
+        sweep[np.isclose(sweep, 0)] = 2*np.pi
+        # position along the arc relative to the programmed start and end
+        start_position = _wrap_angle(arc_direction * (angle_of(compensated_start[arcs]) - programmed_start))
+        end_position = sweep + _wrap_angle(arc_direction * (angle_of(compensated_end[arcs]) - programmed_end))
+        reversed_ = end_position - start_position < -tolerance
+        self._report(arcs[reversed_], 'offset arc is reversed, the tool radius is too large')
+
+    ##############################################
+
+    def _assemble(self, is_motion, is_active, is_element, compensated_start, compensated_end):
+
+        """Chain the compensated positions"""
+
+        toolpath = self._toolpath
+        n = Toolpath.NUMBER_OF_LINEAR_AXES
+
+        # The end point is known for an offset motion or an uncompensated motion, else the line
+        # moves along the normal axis from the end of the previous line.
+        is_anchor = is_element | (is_motion & ~is_active)
+        anchor_end = np.where(is_element[:,np.newaxis], compensated_end, toolpath.end[:,:n])
+        delta = toolpath.end[:,:n] - toolpath.start[:,:n]
+        delta[is_anchor] = 0
+        cumulative_delta = np.cumsum(delta, axis=0)
+        anchor = last_index(is_anchor)
+        base = np.where((anchor >= 0)[:,np.newaxis],
+                        anchor_end[anchor] - cumulative_delta[anchor],
+                        toolpath.start[:1,:n])
+        end = base + cumulative_delta
+
+        start = np.empty_like(end)
+        start[:1] = toolpath.start[:1,:n]
+        start[1:] = end[:-1]
+        start[self.join] = compensated_start[self.join]
+
+        self.start = toolpath.start.copy()
+        self.end = toolpath.end.copy()
+        self.start[:,:n] = start
+        self.end[:,:n] = end
+        self.centre = toolpath.centre.copy()
+
+    ##############################################
+
+    @property
+    def gouges(self):
+        """Indexes of the lines where a gouge is detected"""
+        return np.flatnonzero(self.gouge)
+
+    ##############################################
+
+    @property
+    def join_lengths(self):
+
+        """Length of the corner arc inserted before each line"""
+
+        n = Toolpath.NUMBER_OF_LINEAR_AXES
+        lengths = np.zeros(len(self._toolpath))
+        mask = self.join
+        corner = self._toolpath.start[mask,:n]
+        radial_start = self.join_start[mask] - corner
+        radial_end = self.start[mask,:n] - corner
+        cosine = np.sum(radial_start * radial_end, axis=1) / self.radius[mask]**2
+        lengths[mask] = self.radius[mask] * np.arccos(np.clip(cosine, -1, 1))
+        return lengths
+
+    ##############################################
+
+    def toolpath_with_compensation(self):
+
+        """Return a copy of the toolpath with the compensated positions.
+
+        Corner arcs are not part of the returned toolpath, see :attr:`join_lengths`.
+        """
+
+        toolpath = self._toolpath.clone()
+        toolpath.start[...] = self.start
+        toolpath.end[...] = self.end
+        return toolpath
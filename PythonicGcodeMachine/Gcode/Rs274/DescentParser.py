@@ -0,0 +1,407 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to implement a recursive descent RS-274 G-code parser.
+
+Usage::
+
+   parser = GcodeDescentParser()
+   ast_line = parser.parse(gcode_line)
+   ast_program = parser.parse_text(gcode_text)
+
+   class DescentGcodeMachine(GcodeMachine):
+       PARSER_CLS = GcodeDescentParser
+
+:class:`GcodeDescentParser` is a drop-in replacement of :class:`.Parser.GcodeParser`: it implements
+the same grammar, see :class:`.Parser.GcodeGrammarMixin`, builds the same AST and raises the same
+errors at the same positions.
+
+**Implementation**
+
+The LALR parser generated by PLY calls a grammar action for each reduction, and most of them only
+pass a value through, e.g. :meth:`.Parser.GcodeGrammarMixin.p_real_value`. This parser has a method
+per construct which builds the AST nodes directly: a line, a segment, a real value and an
+expression. The grammar is LL(1), a construct is selected by the type of its first token.
+
+The binary operations of an expression don't have precedence, they are applied from left to right
+as in the LALR grammar.
+
+The text is tokenized at once by the scanner of :class:`.Lexer.GcodeLexer` into lists of token
+types, values and positions, without creating token objects. The token lists end by a ``$end``
+token, or by a ``$error`` token at the position of a lexer error, which is raised when the parser
+reaches it, like the PLY lexer which is called on demand.
+
+The syntax checks and the diagnostics use the LALR tables of the parent class.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'GcodeDescentParser',
+]
+
+####################################################################################################
+
+import time
+
+from . import Ast
+from .Lexer import GcodeLexerError
+from .Parser import GcodeParser, GcodeParserError, _count_nodes
+
+####################################################################################################
+
+class GcodeDescentParser(GcodeParser):
+
+    """Class to implement a recursive descent RS-274 G-code parser"""
+
+    MID_LINE_LETTERS = frozenset((
+        'A', 'B', 'C', 'D',
+        'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M',
+        'P', 'Q', 'R', 'S', 'T',
+        'X', 'Y', 'Z',
+    ))
+
+    NUMBERS = frozenset(('POSITIVE_INTEGER', 'POSITIVE_REAL', 'REAL'))
+
+    UNARY_OPERATIONS = frozenset((
+        'ABSOLUTE_VALUE',
+        'ARC_COSINE',
+        'ARC_SINE',
+        'COSINE',
+        'E_RAISED_TO',
+        'FIX_DOWN',
+        'FIX_UP',
+        'NATURAL_LOG_OF',
+        'ROUND',
+        'SINE',
+        'SQUARE_ROOT',
+        'TANGENT',
+    ))
+
+    BINARY_OPERATIONS = frozenset((
+        'POWER',
+        'DIVIDED_BY',
+        'MODULO',
+        'TIMES',
+        'AND',
+        'EXCLUSIVE_OR',
+        'MINUS',
+        'NON_EXCLUSIVE_OR',
+        'PLUS',
+    ))
+
+    LINE_ENDS = frozenset(('$end',))
+    PROGRAM_LINE_ENDS = frozenset(('$end', 'END_OF_BLOCK'))
+
+    ##############################################
+
+    def _scan(self, text):
+
+        """Tokenize a normalized text, set the lists of the token types, values and positions, and
+        reset the current token.
+
+        """
+
+        scanner, literals = self._lexer._get_scanner()
+        types = []
+        values = []
+        positions = []
+        error = None
+        position = 0
+        for match in scanner.finditer(text):
+            if match.start() != position:
+                break
+            token_type = match.lastgroup
+            start = match.start(token_type)
+            value = match.group(token_type)
+            if token_type == 'LITERAL':
+                token_type = literals[value]
+            elif token_type == 'REAL':
+                # same as GcodeTokenMixin.t_REAL
+                if '.' in value:
+                    value = float(value)
+                    token_type = 'POSITIVE_REAL' if value > 0 else 'REAL'
+                else:
+                    value = int(value)
+                    token_type = 'POSITIVE_INTEGER'
+            elif token_type == 'INLINE_COMMENT':
+                value = value[1:-1]
+                parenthesis = value.find('(')
+                if parenthesis != -1:
+                    error = start + parenthesis + 1
+                    break
+            elif token_type == 'EOF_COMMENT':
+                value = value[1:].strip()
+            types.append(token_type)
+            values.append(value)
+            positions.append(start)
+            position = match.end()
+
+        if error is None:
+            # skip the ignored characters to locate an error
+            length = len(text)
+            ignore = self._lexer._lexer.lexignore
+            while position < length and text[position] in ignore:
+                position += 1
+            if position != length:
+                error = position
+        if error is None:
+            types.append('$end')
+            positions.append(len(text))
+        else:
+            types.append('$error')
+            positions.append(error)
+        values.append(None)
+
+        self._types = types
+        self._values = values
+        self._positions = positions
+        self._index = 0
+
+    ##############################################
+
+    def _error(self):
+
+        """Raise the error for the current token"""
+
+        position = self._positions[self._index]
+        if self._types[self._index] == '$error':
+            raise GcodeLexerError(position)
+        raise GcodeParserError(position)
+
+    ##############################################
+
+    def _parse(self, line):
+
+        text = self._lexer.normalize(line)
+        stats = self._stats
+        if stats is not None:
+            stats.count('characters', len(text))
+            start = time.perf_counter()
+            self._scan(text)
+            scan_end = time.perf_counter()
+            stats.add_time('lex', scan_end - start)
+            stats.count('tokens', len(self._types) - 1)
+        else:
+            self._scan(text)
+
+        self._line = Ast.Line(machine=self._machine)
+        try:
+            self._parse_line(self.LINE_ENDS)
+            if self._types[self._index] != '$end':
+                self._error()
+            line = self._line
+        finally:
+            self._reset()
+            if stats is not None:
+                stats.add_time('parse', time.perf_counter() - scan_end)
+
+        if stats is not None:
+            stats.count('nodes', _count_nodes(line))
+        return line
+
+    ##############################################
+
+    def parse_text(self, text, diagnostics=None, one_pass=True):
+
+        """Parse a G-code text, in one pass by default, see :meth:`.Parser.GcodeParser.parse_text`"""
+
+        if not one_pass or not text or self._line_cache_size > 0:
+            return self.parse_lines(text.splitlines(), diagnostics)
+
+        stats = self._stats
+        normalized_text = self._lexer.normalize(text)
+        if stats is not None:
+            stats.count('characters', len(text))
+            start = time.perf_counter()
+            self._scan(normalized_text)
+            scan_end = time.perf_counter()
+            stats.add_time('lex', scan_end - start)
+            stats.count('tokens', len(self._types) - 1)
+        else:
+            self._scan(normalized_text)
+
+        machine = self._machine
+        program = Ast.Program(machine=machine)
+        lines = program._lines
+        types = self._types
+        line_ends = self.PROGRAM_LINE_ENDS
+        try:
+            while True:
+                self._line = Ast.Line(machine=machine)
+                self._parse_line(line_ends)
+                lines.append(self._line)
+                if types[self._index] == '$end':
+                    break
+                # end of block
+                self._index += 1
+                if types[self._index] == '$end':
+                    break
+        except ValueError:
+            # report the error line per line
+            self._reset()
+            return self.parse_lines(text.splitlines(), diagnostics)
+        finally:
+            if stats is not None:
+                stats.add_time('parse', time.perf_counter() - scan_end)
+
+        self._reset()
+        if stats is not None:
+            stats.count('lines', len(program))
+            stats.count('nodes', sum(_count_nodes(line) for line in program))
+
+        return program
+
+    ##############################################
+
+    def _reset(self):
+        super()._reset()
+        self._types = self._values = self._positions = None
+
+    ##############################################
+
+    def _parse_line(self, line_ends):
+
+        """Parse a line ended by a token of *line_ends*, the line is built in :attr:`_line`.
+
+        The attributes of the line are set in the order of the reductions of the LALR parser.
+        """
+
+        types = self._types
+        values = self._values
+        line = self._line
+        items = line._items
+
+        # line = [block_delete] + [line_number] + {segment} + end_of_line
+        deleted = types[self._index] == 'DIVIDED_BY'
+        if deleted:
+            self._index += 1
+        line_number = None
+        if types[self._index] == 'N':
+            self._index += 1
+            if types[self._index] not in ('POSITIVE_INTEGER', 'POSITIVE_REAL'):
+                self._error()
+            line_number = values[self._index]
+            self._index += 1
+
+        items.append(self._parse_segment())
+        while True:
+            token_type = types[self._index]
+            if token_type in self.MID_LINE_LETTERS or token_type in ('INLINE_COMMENT', 'PARAMETER_SIGN'):
+                items.append(self._parse_segment())
+            else:
+                break
+
+        if token_type == 'EOF_COMMENT':
+            if line_number is not None:
+                line.line_number = line_number
+            line.comment = values[self._index]
+            self._index += 1
+            if types[self._index] not in line_ends:
+                self._error()
+        elif token_type in line_ends:
+            if line_number is not None:
+                line.line_number = line_number
+        else:
+            self._error()
+        if deleted:
+            line.deleted = True
+
+    ##############################################
+
+    def _parse_segment(self):
+
+        """Parse a segment: a mid line word, a comment or a parameter setting"""
+
+        index = self._index
+        token_type = self._types[index]
+        if token_type in self.MID_LINE_LETTERS:
+            self._index = index + 1
+            return Ast.Word(self._values[index], self._parse_real_value(), self._machine)
+        elif token_type == 'INLINE_COMMENT':
+            self._index = index + 1
+            return Ast.Comment(self._values[index], self._machine)
+        elif token_type == 'PARAMETER_SIGN':
+            self._index = index + 1
+            parameter = self._parse_real_value()
+            if self._types[self._index] != 'EQUAL_SIGN':
+                self._error()
+            self._index += 1
+            return Ast.ParameterSetting(parameter, self._parse_real_value(), self._machine)
+        else:
+            self._error()
+
+    ##############################################
+
+    def _parse_real_value(self):
+
+        """Parse a real value: a number, an expression, a parameter value or an unary combo"""
+
+        index = self._index
+        token_type = self._types[index]
+        if token_type in self.NUMBERS:
+            self._index = index + 1
+            return self._values[index]
+        elif token_type == 'LEFT_BRACKET':
+            return self._parse_expression()
+        elif token_type == 'PARAMETER_SIGN':
+            self._index = index + 1
+            return Ast.Parameter(self._parse_real_value(), self._machine)
+        elif token_type in self.UNARY_OPERATIONS:
+            self._index = index + 1
+            operation = self.__operation_map__[self._values[index]]
+            return operation(self._parse_expression())
+        elif token_type == 'ARC_TANGENT':
+            # atan[1.5]/[1.0]
+            self._index = index + 1
+            arg1 = self._parse_expression()
+            if self._types[self._index] != 'DIVIDED_BY':
+                self._error()
+            self._index += 1
+            return Ast.DividedBy(Ast.ArcTangent(arg1), self._parse_expression())
+        else:
+            self._error()
+
+    ##############################################
+
+    def _parse_expression(self):
+
+        """Parse an expression: ``[ real_value {binary_operation real_value} ]``"""
+
+        if self._types[self._index] != 'LEFT_BRACKET':
+            self._error()
+        self._index += 1
+        types = self._types
+        values = self._values
+        operation_map = self.__operation_map__
+        binary_operations = self.BINARY_OPERATIONS
+        value = self._parse_real_value()
+        while True:
+            index = self._index
+            token_type = types[index]
+            if token_type in binary_operations:
+                self._index = index + 1
+                value = operation_map[values[index]](value, self._parse_real_value())
+            elif token_type == 'RIGHT_BRACKET':
+                self._index = index + 1
+                return value
+            else:
+                self._error()
@@ -0,0 +1,270 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to implement a look-ahead feed planner which emulates the block buffer of a controller.
+
+Usage::
+
+   toolpath = Toolpath(program)
+   planner = FeedPlanner(toolpath, acceleration=500, junction_deviation=0.01, buffer_size=16)
+
+   planner.feed # achieved feed rate of each line in mm/min
+   planner.time # duration of each line in s
+   planner.total_time
+
+**Implementation**
+
+The planner works like the one of `Grbl <https://github.com/gnea/grbl>`_. Each motion is executed
+with a trapezoidal velocity profile using a constant acceleration. The velocity at a junction
+between two motions is limited by:
+
+* the path control mode of modal group 13: a stop for exact stop mode (G61.1), a stop at a corner
+  for exact path mode (G61) and the junction deviation for continuous mode (G64),
+* the programmed feed rates of the two motions,
+* the distance required to stop at the end of the last motion in the block buffer.
+
+The velocity on an arc is also limited by the centripetal acceleration.
+
+The achievable velocities are then computed with a backward and a forward pass, which are solved
+in closed form using cumulative sums and cumulative minimums on NumPy arrays.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'FeedPlanner',
+]
+
+####################################################################################################
+
+import numpy as np
+
+from .Toolpath import Toolpath
+
+####################################################################################################
+
+class FeedPlanner:
+
+    """Class to compute the achievable velocities and the duration of the motions of a toolpath.
+
+    Parameters:
+
+    * *acceleration*: maximum acceleration in mm/s²,
+    * *junction_deviation*: distance in mm between the corner and the circular arc used to compute
+      the cornering velocity in G64 mode,
+    * *buffer_size*: number of blocks in the planner buffer,
+    * *rapid_feed*: feed rate for rapid motions in mm/min,
+    * *max_feed*: maximum feed rate in mm/min, unlimited if None,
+    * *angular_tolerance*: angle in radians under which a junction is tangent.
+
+    Arrays have one row per line of the program:
+
+    * :attr:`entry_feed`, :attr:`exit_feed`: feed rate at the start and at the end of the line,
+    * :attr:`peak_feed`: maximum feed rate reached on the line,
+    * :attr:`feed`: achieved feed rate, i.e. the length divided by the time,
+    * :attr:`time`: duration in s, including dwells.
+
+    Feed rates are expressed in mm/min. A feed motion without feed rate has an infinite duration.
+
+    """
+
+    ##############################################
+
+    def __init__(self, toolpath,
+                 acceleration=500.,
+                 junction_deviation=0.01,
+                 buffer_size=16,
+                 rapid_feed=5000.,
+                 max_feed=None,
+                 angular_tolerance=1e-3,
+    ):
+
+        self._toolpath = toolpath
+        self._acceleration = float(acceleration)
+        self._junction_deviation = float(junction_deviation)
+        self._buffer_size = int(buffer_size)
+        if self._buffer_size < 1:
+            raise ValueError('Invalid buffer size {}'.format(buffer_size))
+        self._rapid_feed = float(rapid_feed)
+        self._max_feed = float(max_feed) if max_feed is not None else None
+        self._angular_tolerance = float(angular_tolerance)
+
+        self._plan()
+
+    ##############################################
+
+    @property
+    def toolpath(self):
+        return self._toolpath
+
+    @property
+    def acceleration(self):
+        return self._acceleration
+
+    @property
+    def junction_deviation(self):
+        return self._junction_deviation
+
+    @property
+    def buffer_size(self):
+        return self._buffer_size
+
+    @property
+    def rapid_feed(self):
+        return self._rapid_feed
+
+    @property
+    def max_feed(self):
+        return self._max_feed
+
+    ##############################################
+
+    @property
+    def total_time(self):
+        """Duration of the program in s"""
+        return float(np.sum(self.time))
+
+    ##############################################
+
+    def _nominal_velocity(self, blocks):
+
+        """Return the programmed velocity of the blocks in mm/s"""
+
+        toolpath = self._toolpath
+        feed = np.where(toolpath.motion[blocks] == Toolpath.RAPID, self._rapid_feed, toolpath.feed[blocks])
+        if self._max_feed is not None:
+            feed = np.minimum(feed, self._max_feed)
+        velocity = feed / 60
+
+        # centripetal acceleration on an arc
+        is_arc = toolpath.is_arc[blocks]
+        if np.any(is_arc):
+            radius = toolpath.arc_geometry()[0][blocks]
+            velocity[is_arc] = np.minimum(velocity[is_arc], np.sqrt(self._acceleration * radius[is_arc]))
+
+        return velocity
+
+    ##############################################
+
+    def _junction_velocity(self, blocks, nominal_velocity):
+
+        """Return the squared maximum velocity at the start of each block"""
+
+        toolpath = self._toolpath
+        number_of_blocks = blocks.shape[0]
+
+        start_tangent, end_tangent = toolpath.tangents()
+        previous = blocks[:-1]
+        current = blocks[1:]
+        cos_theta = np.clip(np.sum(end_tangent[previous] * start_tangent[current], axis=1), -1, 1)
+        is_tangent = cos_theta >= np.cos(self._angular_tolerance)
+
+        # Grbl: the velocity on a circle tangent to both motions at the junction deviation
+        sin_theta_d2 = np.sqrt(0.5 * (1 + cos_theta))
+        with np.errstate(divide='ignore'):
+            velocity2 = self._acceleration * self._junction_deviation * sin_theta_d2 / (1 - sin_theta_d2)
+        velocity2[is_tangent] = np.inf
+
+        path_control = toolpath.path_control[previous]
+        velocity2[np.isclose(path_control, 61) & ~is_tangent] = 0
+        velocity2[np.isclose(path_control, 61.1)] = 0
+
+        # a dwell or a tool change between the blocks stops the motion
+        stops = (toolpath.dwell > 0) | np.concatenate(([False], toolpath.tool[1:] != toolpath.tool[:-1]))
+        stop_count = np.cumsum(stops)
+        velocity2[stop_count[current] != stop_count[previous]] = 0
+
+        junction_velocity2 = np.zeros(number_of_blocks)
+        junction_velocity2[1:] = np.minimum(
+            velocity2,
+            np.minimum(nominal_velocity[:-1], nominal_velocity[1:])**2,
+        )
+        return junction_velocity2
+
+    ##############################################
+
+    def _plan(self):
+
+        toolpath = self._toolpath
+        number_of_lines = len(toolpath)
+        acceleration = self._acceleration
+
+        lengths = toolpath.lengths
+        blocks = np.flatnonzero(toolpath.is_motion & (lengths > 0))
+        length = lengths[blocks]
+        nominal_velocity = self._nominal_velocity(blocks)
+
+        # Work on the squared velocity, where the acceleration constraints are linear.
+        #   v[k] is the velocity at the start of block k, and v[-1] the final velocity
+        number_of_blocks = blocks.shape[0]
+        limit = np.zeros(number_of_blocks + 1)
+        limit[:-1] = self._junction_velocity(blocks, nominal_velocity)
+
+        # the last block in the buffer must be able to stop
+        cumulative_length = np.concatenate(([0], np.cumsum(length)))
+        last = np.minimum(np.arange(number_of_blocks) + self._buffer_size, number_of_blocks)
+        stop_distance = cumulative_length[last] - cumulative_length[1:]
+        limit[1:] = np.minimum(limit[1:], 2 * acceleration * stop_distance)
+
+        increment = 2 * acceleration * length
+        # Backward pass: v[k] <= v[k+1] + 2 a L[k]
+        #   v[k] = min_{j >= k} (limit[j] + S[k] - S[j]) with S[k] = sum_{i >= k} 2 a L[i]
+        suffix = np.concatenate((np.cumsum(increment[::-1])[::-1], [0]))
+        backward = suffix + np.minimum.accumulate((limit - suffix)[::-1])[::-1]
+        # Forward pass: v[k+1] <= v[k] + 2 a L[k]
+        prefix = np.concatenate(([0], np.cumsum(increment)))
+        velocity2 = prefix + np.minimum.accumulate(backward - prefix)
+        velocity = np.sqrt(np.maximum(velocity2, 0))
+
+        entry_velocity = velocity[:-1]
+        exit_velocity = velocity[1:]
+        time, peak_velocity = self._trapezoidal_profile(length, entry_velocity, exit_velocity, nominal_velocity)
+
+        self.entry_feed = np.zeros(number_of_lines)
+        self.exit_feed = np.zeros(number_of_lines)
+        self.peak_feed = np.zeros(number_of_lines)
+        self.feed = np.zeros(number_of_lines)
+        self.time = toolpath.dwell.copy()
+        self.entry_feed[blocks] = entry_velocity * 60
+        self.exit_feed[blocks] = exit_velocity * 60
+        self.peak_feed[blocks] = peak_velocity * 60
+        self.time[blocks] += time
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.feed[blocks] = np.where(time > 0, length / time * 60, 0)
+
+    ##############################################
+
+    def _trapezoidal_profile(self, length, entry_velocity, exit_velocity, nominal_velocity):
+
+        """Return the duration and the peak velocity of each block"""
+
+        acceleration = self._acceleration
+        with np.errstate(divide='ignore', invalid='ignore'):
+            peak_velocity = np.sqrt(acceleration * length + (entry_velocity**2 + exit_velocity**2) / 2)
+            peak_velocity = np.minimum(peak_velocity, nominal_velocity)
+            acceleration_distance = (peak_velocity**2 - entry_velocity**2) / (2 * acceleration)
+            deceleration_distance = (peak_velocity**2 - exit_velocity**2) / (2 * acceleration)
+            cruise_distance = np.maximum(length - acceleration_distance - deceleration_distance, 0)
+            time = ((peak_velocity - entry_velocity) / acceleration +
+                    (peak_velocity - exit_velocity) / acceleration +
+                    cruise_distance / peak_velocity)
+        time[nominal_velocity <= 0] = np.inf
+        return time, peak_velocity
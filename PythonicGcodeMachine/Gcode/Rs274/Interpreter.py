@@ -0,0 +1,460 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to interpret G-code lines one at a time.
+
+Usage::
+
+   state = MachineState(number_of_axes=3)
+   interpreter = GcodeInterpreter(state)
+   for line in program:
+       block = interpreter.execute(line)
+       if block is not None:
+           print(block.end, block.length, block.duration)
+
+:class:`.Toolpath.Toolpath` interprets a whole program in batch, :class:`GcodeInterpreter` updates
+a :class:`.MachineState.MachineState` line by line, as a controller which receives a stream.
+
+The conventions and the rules are the ones of :class:`.Toolpath.Toolpath`: the positions are
+absolute machine coordinates in millimetres, the work offsets are read from the parameters, G10 L2
+sets them, the G92 axis offset is saved in the parameters 5211 and following, G28 and G30 are rapid
+motions to the home positions of the parameters 5161 and 5181, and the parameter settings are
+applied after the line.
+
+Supported codes: G0 to G3 (arcs in the centre or the radius format), G4, G10 L2, G17 to G19, G20,
+G21, G28, G30, G53, G54 to G59.3, G80, G90, G91, G92 to G92.3, G93, G94, M3 to M6, F, S and T. The
+canned cycles G81 to G89 are rejected. The other codes are accepted and ignored. The intermediate
+point of G28 and G30 is ignored, as in the toolpath.
+
+A line which cannot be executed raises ValueError and leaves the state unchanged, as a controller
+which rejects a line.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'Block',
+    'GcodeInterpreter',
+]
+
+####################################################################################################
+
+from collections import namedtuple
+import math
+
+from . import Ast
+from .MachineState import FeedRateMode, MachineState, MotionMode, PlaneSelection, SpindleDirection
+from .Toolpath import Toolpath, evaluate
+
+####################################################################################################
+
+Block = namedtuple('Block', ('line', 'motion', 'start', 'end', 'length', 'duration'))
+Block.__doc__ = """Block to execute: *motion* is a :class:`.MachineState.MotionMode` or None for a
+dwell, the length is in millimetres and the duration in seconds.
+"""
+
+####################################################################################################
+
+class GcodeInterpreter:
+
+    """Class to interpret G-code lines against a :class:`.MachineState.MachineState`.
+
+    *parameters* is the initial parameter table and *rapid_feed* the feed rate of the rapid motions
+    in mm/min.
+
+    """
+
+    AXES = Toolpath.AXES
+    NUMBER_OF_LINEAR_AXES = Toolpath.NUMBER_OF_LINEAR_AXES
+    PLANE_AXES = Toolpath.PLANE_AXES
+    ARC_OFFSET_LETTERS = Toolpath.ARC_OFFSET_LETTERS
+    MM_PER_INCH = Toolpath.MM_PER_INCH
+    WORK_OFFSET_PARAMETER = Toolpath.WORK_OFFSET_PARAMETER
+    WORK_OFFSET_STRIDE = Toolpath.WORK_OFFSET_STRIDE
+    AXIS_OFFSET_PARAMETER = Toolpath.AXIS_OFFSET_PARAMETER
+    HOME_PARAMETERS = {
+        int(code[1:]): parameter for code, parameter in Toolpath.HOME_PARAMETERS.items()
+    }
+
+    COORDINATE_SYSTEMS = {
+        54: 1, 55: 2, 56: 3, 57: 4, 58: 5, 59: 6,
+        59.1: 7, 59.2: 8, 59.3: 9,
+    }
+
+    # G-codes which use the axis words for another purpose than a motion
+    AXIS_CONSUMER_GCODES = (10, 28, 30, 92)
+
+    AXIS_OFFSET_GCODES = (92, 92.1, 92.2, 92.3)
+
+    CANNED_CYCLE_GCODES = tuple(range(81, 90))
+
+    DEFAULT_RAPID_FEED = 5000.
+
+    ##############################################
+
+    def __init__(self, state=None, parameters=None, rapid_feed=DEFAULT_RAPID_FEED):
+
+        if state is None:
+            state = MachineState(number_of_axes=self.NUMBER_OF_LINEAR_AXES)
+        self._state = state
+        self._axes = self.AXES[:state.number_of_axes]
+        self._parameters = dict(parameters) if parameters is not None else {}
+        self._rapid_feed = float(rapid_feed)
+        self._selected_tool = None
+        self._tool_number = 0
+        self._axis_offset = [0.] * len(self._axes)
+
+    ##############################################
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def parameters(self):
+        return self._parameters
+
+    @property
+    def rapid_feed(self):
+        return self._rapid_feed
+
+    @property
+    def tool_number(self):
+        """Number of the tool loaded by the last M6, 0 if none"""
+        return self._tool_number
+
+    @property
+    def position(self):
+        """Current position in machine coordinates"""
+        return tuple(float(x) for x in self._state.coordinate)
+
+    @property
+    def axis_offset(self):
+        """Current G92 axis offset"""
+        return tuple(self._axis_offset)
+
+    ##############################################
+
+    def _work_offset(self, coordinate_system):
+        index = self.WORK_OFFSET_PARAMETER + self.WORK_OFFSET_STRIDE * coordinate_system
+        return [self._parameters.get(index + i, 0.) for i in range(len(self._axes))]
+
+    ##############################################
+
+    def _modal(self, modal, name):
+        """Return the value of a modal state, as set by the line"""
+        return modal[name] if name in modal else getattr(self._state, name)
+
+    ##############################################
+
+    def _axis_values(self, words, modal):
+        """Return the axis words of the line in millimetres, None if not set"""
+        scale = 1. if self._modal(modal, 'use_metric') else self.MM_PER_INCH
+        values = []
+        for i, axis in enumerate(self._axes):
+            value = words.get(axis)
+            if value is not None and i < self.NUMBER_OF_LINEAR_AXES:
+                value *= scale
+            values.append(value)
+        return values
+
+    ##############################################
+
+    def execute(self, line):
+
+        """Execute a :class:`.Ast.Line` and return the :class:`Block` of its motion or dwell, or None.
+
+        Raise ValueError if the line cannot be executed, the state is then left unchanged.
+        """
+
+        if line.deleted:
+            return None
+
+        state = self._state
+        parameters = self._parameters
+        gcodes = []
+        mcodes = []
+        words = {}
+        settings = []
+        try:
+            for item in line:
+                if isinstance(item, Ast.Word):
+                    value = item.value
+                    if not isinstance(value, (int, float)):
+                        value = evaluate(value, parameters)
+                    letter = item.letter
+                    if letter == 'G':
+                        gcodes.append(value)
+                    elif letter == 'M':
+                        mcodes.append(value)
+                    else:
+                        words[letter] = value
+                elif isinstance(item, Ast.ParameterSetting):
+                    settings.append((item.parameter, evaluate(item.value, parameters)))
+        except (ArithmeticError, TypeError) as exception:
+            # e.g. a division by zero, or a complex result
+            raise ValueError('Invalid expression: {}'.format(exception)) from exception
+
+        # the new modal states are committed when the line is validated
+        # same order as the RS-274 execution order
+        modal = {}
+        if 'F' in words:
+            modal['feed_rate'] = float(words['F'])
+        if 'S' in words:
+            if words['S'] < 0:
+                raise ValueError('Negative spindle rate {}'.format(words['S']))
+            modal['spindle_rate'] = float(words['S'])
+        selected_tool = int(words['T']) if 'T' in words else self._selected_tool
+        is_tool_changed = False
+        for code in mcodes:
+            if code == 6 and selected_tool is not None:
+                is_tool_changed = True
+            elif code in (3, 4, 5):
+                modal['spindle_direction'] = SpindleDirection(code)
+
+        block = None
+        use_machine_coordinates = False
+        is_axis_consumed = False
+        home_code = None
+        axis_offset_code = None
+        is_coordinate_system_data = False
+        for code in gcodes:
+            if code in (17, 18, 19):
+                modal['plane'] = PlaneSelection(code)
+            elif code in (20, 21):
+                modal['use_metric'] = code == 21
+            elif code in (90, 91):
+                modal['use_absolut'] = code == 90
+            elif code in (93, 94):
+                modal['feed_rate_mode'] = FeedRateMode(code)
+            elif code in self.COORDINATE_SYSTEMS:
+                modal['coordinate_system'] = self.COORDINATE_SYSTEMS[code]
+            elif code in (0, 1, 2, 3, 80):
+                modal['motion_mode'] = MotionMode(code)
+            elif code in self.CANNED_CYCLE_GCODES:
+                raise ValueError('Canned cycle G{} is not supported'.format(code))
+            elif code == 4:
+                position = self.position
+                block = Block(line, None, position, position, 0., float(words.get('P', 0)))
+            elif code == 53:
+                use_machine_coordinates = True
+            elif code in self.HOME_PARAMETERS:
+                home_code = code
+            elif code in self.AXIS_OFFSET_GCODES:
+                axis_offset_code = code
+            elif code == 10:
+                is_coordinate_system_data = True
+            if code in self.AXIS_CONSUMER_GCODES:
+                is_axis_consumed = True
+
+        new_parameters = {}
+        axis_offset = self._axis_offset
+        if axis_offset_code is not None:
+            axis_offset = self._new_axis_offset(axis_offset_code, words, modal)
+            if axis_offset_code in (92, 92.1):
+                # the axis offset is saved
+                for i, value in enumerate(axis_offset):
+                    new_parameters[self.AXIS_OFFSET_PARAMETER + i] = value
+        elif is_coordinate_system_data:
+            new_parameters.update(self._coordinate_system_data(words, modal))
+
+        end = None
+        if home_code is not None:
+            block = self._home(line, home_code)
+            end = block.end
+        # the axis offset line doesn't move
+        elif (axis_offset_code is None and not is_axis_consumed
+              and any(axis in words for axis in self._axes)):
+            block = self._move(line, words, modal, use_machine_coordinates)
+            end = block.end
+
+        # commit
+        for name, value in modal.items():
+            setattr(state, name, value)
+        self._selected_tool = selected_tool
+        if is_tool_changed:
+            if selected_tool in state.tool_set:
+                state.load_tool(selected_tool)
+            self._tool_number = selected_tool
+        if end is not None:
+            state.coordinate.set(end)
+        self._axis_offset = axis_offset
+        parameters.update(new_parameters)
+        for parameter, value in settings:
+            parameters[parameter] = value
+
+        return block
+
+    ##############################################
+
+    def _new_axis_offset(self, code, words, modal):
+
+        """Return the axis offset set by G92, G92.1, G92.2 or G92.3"""
+
+        number_of_axes = len(self._axes)
+        if code == 92:
+            # the current position is set to the axis words
+            position = self.position
+            work_offset = self._work_offset(self._modal(modal, 'coordinate_system'))
+            axis_offset = list(self._axis_offset)
+            for i, value in enumerate(self._axis_values(words, modal)):
+                if value is not None:
+                    axis_offset[i] = position[i] - work_offset[i] - value
+            return axis_offset
+        elif code == 92.3:
+            # restore the saved axis offset
+            return [self._parameters.get(self.AXIS_OFFSET_PARAMETER + i, 0.)
+                    for i in range(number_of_axes)]
+        else:
+            return [0.] * number_of_axes
+
+    ##############################################
+
+    def _coordinate_system_data(self, words, modal):
+
+        """Return the work offset parameters set by G10 L2"""
+
+        if words.get('L') != 2:
+            return {}
+        number = int(words.get('P', 0)) or self._modal(modal, 'coordinate_system')
+        index = self.WORK_OFFSET_PARAMETER + self.WORK_OFFSET_STRIDE * number
+        return {index + i: value
+                for i, value in enumerate(self._axis_values(words, modal))
+                if value is not None}
+
+    ##############################################
+
+    def _home(self, line, code):
+
+        """Return the block of the rapid motion to the home position of G28 or G30"""
+
+        index = self.HOME_PARAMETERS[code]
+        start = self.position
+        end = tuple(float(self._parameters.get(index + i, 0.)) for i in range(len(self._axes)))
+        length = self._straight_length(start, end)
+        return Block(line, MotionMode.RAPID, start, end, length, length / self._rapid_feed * 60)
+
+    ##############################################
+
+    def _straight_length(self, start, end):
+        """Return the length of a straight motion, in degrees for a rotary motion"""
+        number_of_linear_axes = self.NUMBER_OF_LINEAR_AXES
+        delta = [x1 - x0 for x0, x1 in zip(start, end)]
+        linear_delta = delta[:number_of_linear_axes]
+        if not any(linear_delta):
+            # rotary motion, in degrees
+            linear_delta = delta[number_of_linear_axes:]
+        return math.sqrt(sum(x**2 for x in linear_delta))
+
+    ##############################################
+
+    def _move(self, line, words, modal, use_machine_coordinates):
+
+        """Return the block of the motion to the axis words, *modal* are the modal states set by the
+        line.
+
+        """
+
+        motion = self._modal(modal, 'motion_mode')
+        if motion == MotionMode.CANCEL:
+            raise ValueError('Axis words without motion mode')
+        use_metric = self._modal(modal, 'use_metric')
+        use_absolut = self._modal(modal, 'use_absolut')
+        feed_rate = self._modal(modal, 'feed_rate')
+
+        scale = 1. if use_metric else self.MM_PER_INCH
+        start = self.position
+        end = list(start)
+        work_offset = self._work_offset(self._modal(modal, 'coordinate_system'))
+        for i, value in enumerate(self._axis_values(words, modal)):
+            if value is None:
+                continue
+            if not use_absolut:
+                end[i] += value
+            elif use_machine_coordinates:
+                end[i] = value
+            else:
+                end[i] = value + work_offset[i] + self._axis_offset[i]
+
+        if motion in (MotionMode.CW_ARC, MotionMode.CCW_ARC):
+            delta = [x1 - x0 for x0, x1 in zip(start, end)]
+            plane = self._modal(modal, 'plane')
+            length = self._arc_length(motion, plane, words, delta, scale)
+        else:
+            length = self._straight_length(start, end)
+
+        if motion == MotionMode.RAPID:
+            duration = length / self._rapid_feed * 60
+        elif self._modal(modal, 'feed_rate_mode') == FeedRateMode.INVERSE_TIME:
+            if not feed_rate:
+                raise ValueError('Undefined inverse time feed rate')
+            duration = 60 / feed_rate
+        else:
+            if not feed_rate:
+                raise ValueError('Undefined feed rate')
+            duration = length / (feed_rate * scale) * 60
+
+        return Block(line, motion, start, tuple(end), length, duration)
+
+    ##############################################
+
+    def _arc_length(self, motion, plane, words, delta, scale):
+
+        """Return the length of an arc in the centre or the radius format"""
+
+        u, v, w = self.PLANE_AXES[plane.value]
+        if 'R' in words:
+            i, j = self._radius_centre(motion, words['R'] * scale, delta[u], delta[v])
+        else:
+            offsets = {letter: words[letter] for letter in self.ARC_OFFSET_LETTERS if letter in words}
+            if not offsets:
+                raise ValueError('Arc without centre offset or radius')
+            i = offsets.get(self.ARC_OFFSET_LETTERS[u], 0.) * scale
+            j = offsets.get(self.ARC_OFFSET_LETTERS[v], 0.) * scale
+        radius = math.hypot(i, j)
+        start_angle = math.atan2(-j, -i)
+        end_angle = math.atan2(delta[v] - j, delta[u] - i)
+        # absolute value of the sweep
+        sweep = end_angle - start_angle
+        if motion == MotionMode.CW_ARC:
+            sweep = -sweep
+        sweep %= 2*math.pi
+        if math.isclose(sweep, 0, abs_tol=1e-9) or math.isclose(sweep, 2*math.pi):
+            # full circle
+            sweep = 2*math.pi
+        return math.hypot(radius * sweep, delta[w])
+
+    ##############################################
+
+    @staticmethod
+    def _radius_centre(motion, radius, du, dv):
+
+        """Return the centre of a radius format arc relative to the start point, in the plane.
+
+        The centre is on the chord bisector, the sign of R selects the short or the long arc.
+        """
+
+        chord = math.hypot(du, dv)
+        if chord == 0:
+            raise ValueError('Arc with R word must have distinct start and end points')
+        height = math.sqrt(max(radius**2 - (chord/2)**2, 0))
+        side = 1 if (motion == MotionMode.CCW_ARC) == (radius > 0) else -1
+        return du/2 - side * height * dv / chord, dv/2 + side * height * du / chord
@@ -18,11 +18,47 @@
 #
 ####################################################################################################
 
-"""Module to implement a RS-274 G-code lexer."""
+"""Module to implement a RS-274 G-code lexer.
+
+G-code is case insensitive. Instead of compiling the rules with the flag :data:`re.IGNORECASE`,
+which slows every match, the input is normalized once by :meth:`GcodeLexerMixin.normalize`: the
+ASCII letters are lowered out of the comments. The length of the input is unchanged, so the
+offsets of the tokens and of the errors refer to the original input, and the comments keep their
+case. The values of the tokens are the normalized texts, e.g. ``g`` for a ``G`` letter.
+
+A whole buffer can be tokenized in one pass, the newlines are emitted as ``END_OF_BLOCK`` tokens
+and the ``lineno`` attribute of the tokens is the line number starting at 1.
+
+If a :class:`.Statistics.Statistics` instance is passed as *stats*, the lexer counts the characters
+and the tokens, and the time spent in the ``lex`` stage.
+
+:meth:`GcodeLexerMixin.tokenize_array` returns the tokens of a buffer as parallel NumPy arrays
+instead of token objects::
+
+   token_array = lexer.tokenize_array(gcode_text)
+   is_x = token_array.types == lexer.token_code('X')
+   x_values = token_array.values[np.flatnonzero(is_x) + 1]
+
+The type of a token is given by its code, which is the index of the type in
+:attr:`GcodeTokenMixin.tokens`, and the token spans ``text[start:end]``. The value is the number of
+the ``POSITIVE_INTEGER``, ``POSITIVE_REAL`` and ``REAL`` tokens, else NaN.
+
+The buffer can also be a bytes-like object, like :class:`bytes`, :class:`memoryview` or
+:class:`mmap.mmap`, since G-code is ASCII. Then the offsets are byte offsets and the buffer is not
+decoded, the text of the comments is decoded on demand by :meth:`GcodeLexerMixin.token_value`::
+
+   with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+       token_array = lexer.tokenize_array(data)
+       comment = lexer.token_value(data, token_array, i)
+
+   token_array = lexer.tokenize_file(path)
+
+"""
 
 ####################################################################################################
 
 __all__ = [
+    'TokenArray',
     'GcodeLexerError',
     'GcodeLexer',
     'GcodeLexerMixin',
@@ -31,13 +67,21 @@ __all__ = [
 
 ####################################################################################################
 
+from collections import namedtuple
+import mmap
 import re
+import string
+import time
+
+import numpy as np
 
 try:
     import ply.lex as lexer
 except ModuleNotFoundError:
     import PythonicGcodeMachine.PythonLexYacc.lex as lexer
 
+from .Compression import MAGIC_SIZE, decompress, detect_compression
+
 ####################################################################################################
 
 class GcodeLexerError(ValueError):
@@ -45,6 +89,10 @@ class GcodeLexerError(ValueError):
 
 ####################################################################################################
 
+TokenArray = namedtuple('TokenArray', ('types', 'starts', 'ends', 'values'))
+
+####################################################################################################
+
 class GcodeTokenMixin:
 
     """Mixin to define RS-274 G-code tokens. """
@@ -92,6 +140,8 @@ class GcodeTokenMixin:
         'REAL',
         'INLINE_COMMENT',
         'EOF_COMMENT',
+
+        'END_OF_BLOCK',
     )
 
     # Regular expression rules for simple tokens
@@ -181,7 +231,7 @@ class GcodeTokenMixin:
         return t
 
     def t_INLINE_COMMENT(self, t):
-        r'\([^\)]*\)'
+        r'\([^\)\r\n]*\)'
         value = t.value[1:-1]
         position = value.find('(')
         if position != -1:
@@ -194,6 +244,11 @@ class GcodeTokenMixin:
         t.value = t.value[1:].strip()
         return t
 
+    def t_END_OF_BLOCK(self, t):
+        r'\r?\n|\r'
+        t.lexer.lineno += 1
+        return t
+
     # Ignored characters (spaces and tabs)
     t_ignore  = ' \t'
 
@@ -211,16 +266,43 @@ class GcodeLexerMixin:
 
     ##############################################
 
-    def __init__(self):
+    # translation tables to lower the ASCII letters
+    LOWER_TABLE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+    LOWER_BYTES_TABLE = bytes.maketrans(string.ascii_uppercase.encode('ascii'),
+                                        string.ascii_lowercase.encode('ascii'))
+
+    # the comments as matched by t_INLINE_COMMENT and t_EOF_COMMENT
+    COMMENT_RE = re.compile(r'\([^\)\r\n]*\)|;.*')
+    COMMENT_BYTES_RE = re.compile(rb'\([^\)\r\n]*\)|;.*')
+
+    # a regular expression made of plain and escaped characters
+    LITERAL_RE = re.compile(r'(?:\\.|[^\\.^$*+?{}\[\]|()])+')
+
+    ##############################################
+
+    def __init__(self, stats=None):
+        self._stats = stats
+        self._scanner = None
         self._build()
 
     ##############################################
 
+    @property
+    def stats(self):
+        return self._stats
+
+    @stats.setter
+    def stats(self, value):
+        self._stats = value
+
+    ##############################################
+
     def _build(self, **kwargs):
         """Build the lexer"""
         self._lexer = lexer.lex(
             module=self,
-            reflags=int(re.VERBOSE + re.IGNORECASE),
+            # the input is normalized, see normalize
+            reflags=int(re.VERBOSE),
             optimize=1,
             lextab='_lextab',
             **kwargs,
@@ -228,12 +310,126 @@ class GcodeLexerMixin:
 
     ##############################################
 
+    def normalize(self, data):
+
+        """Return a string or a bytes-like object where the ASCII letters are lowered, except in the
+        comments.
+
+        """
+
+        if isinstance(data, str):
+            table, comment_re, markers = self.LOWER_TABLE, self.COMMENT_RE, '(;'
+        else:
+            table, comment_re, markers = self.LOWER_BYTES_TABLE, self.COMMENT_BYTES_RE, b'(;'
+        if markers[:1] not in data and markers[1:] not in data:
+            return data.translate(table)
+
+        parts = []
+        position = 0
+        for match in comment_re.finditer(data):
+            start, end = match.span()
+            parts.append(data[position:start].translate(table))
+            parts.append(data[start:end])
+            position = end
+        parts.append(data[position:].translate(table))
+        return data[:0].join(parts)
+
+    ##############################################
+
+    def clone(self):
+
+        """Return a copy of the lexer which shares the compiled rules, so as to tokenize in another
+        thread.
+
+        """
+
+        lexer = self.__class__.__new__(self.__class__)
+        lexer.__dict__.update(self.__dict__)
+        if self._scanner is not None:
+            lexer._scanner = dict(self._scanner)
+        lexer._lexer = self._lexer.clone(lexer)
+        # clone only rebinds the rules of the states
+        lexer._lexer.begin('INITIAL')
+        return lexer
+
+    ##############################################
+
+    def _get_scanner(self, binary=False, ignore_case=False):
+
+        """Return a regular expression which matches a token, and a dictionary which maps the
+        literals to their token type. If *binary* is set, the regular expression and the literals
+        are bytes. The regular expression matches a normalized input, see :meth:`normalize`, or
+        any input if *ignore_case* is set.
+
+        The tokens defined by a function are matched by a named group, in the same order than the
+        lexer, the tokens defined by a literal string are matched by the alternation of the group
+        ``LITERAL``, sorted by decreasing length, and their type is found by a dictionary lookup
+        using the lowered literal if the case is ignored. The regular expression starts by the
+        ignored characters.
+
+        """
+
+        key = (binary, ignore_case)
+        if self._scanner is None:
+            self._scanner = {}
+        elif key in self._scanner:
+            return self._scanner[key]
+
+        lexer = self._lexer
+        flags = lexer.lexreflags & ~re.IGNORECASE
+        if ignore_case:
+            flags |= re.IGNORECASE
+        patterns = []
+        literals = {}
+        for regex, functions in lexer.lexre:
+            for item in functions:
+                if item is None:
+                    continue
+                function, token_type = item
+                if function is not None:
+                    pattern = getattr(function, 'regex', function.__doc__)
+                    patterns.append('(?P<{}>{})'.format(token_type, pattern))
+                else:
+                    # lexmodule is not set in optimize mode
+                    pattern = getattr(self, 't_' + token_type)
+                    if not self.LITERAL_RE.fullmatch(pattern):
+                        raise ValueError('Token {} is not a literal'.format(token_type))
+                    literal = re.sub(r'\\(.)', r'\1', pattern)
+                    literals[literal.lower()] = token_type
+        sorted_literals = sorted(literals, key=len, reverse=True)
+        patterns.append('(?P<LITERAL>{})'.format('|'.join(re.escape(literal) for literal in sorted_literals)))
+        ignore = '[{}]*'.format(re.escape(lexer.lexignore)) if lexer.lexignore else ''
+        pattern = ignore + '(?:' + '|'.join(patterns) + ')'
+        if binary:
+            pattern = pattern.encode('ascii')
+            flags &= ~re.UNICODE
+            literals = {literal.encode('ascii'): token_type for literal, token_type in literals.items()}
+        scanner = self._scanner[key] = re.compile(pattern, flags), literals
+        return scanner
+
+    ##############################################
+
+    def token_code(self, token_type):
+        """Return the code of a token type used by :meth:`tokenize_array`"""
+        return self.tokens.index(token_type)
+
+    ##############################################
+
     def input(self, data):
-        return self._lexer.input(data)
+        self._lexer.lineno = 1
+        return self._lexer.input(self.normalize(data))
 
     ##############################################
 
     def tokenize(self, data):
+        """Return an iterator on the tokens of *data*"""
+        if self._stats is not None:
+            return self._tokenize_with_stats(data)
+        return self._tokenize(data)
+
+    ##############################################
+
+    def _tokenize(self, data):
         self.input(data)
         while True:
             token = self._lexer.token()
@@ -241,6 +437,189 @@ class GcodeLexerMixin:
                 break
             yield token
 
+    ##############################################
+
+    def _tokenize_with_stats(self, data):
+        self._stats.count('characters', len(data))
+        self.input(data)
+        token_function = self.instrumented_token_function()
+        while True:
+            token = token_function()
+            if not token:
+                break
+            yield token
+
+    ##############################################
+
+    def tokenize_array(self, data):
+
+        """Tokenize a buffer and return a :class:`TokenArray` of NumPy arrays: the token type codes as
+        uint8, the start and end offsets as uint32, or uint64 for a buffer larger than 4 GB, and the
+        values as float64.
+
+        The buffer is a string or a bytes-like object, then the offsets are byte offsets. A
+        :class:`str`, :class:`bytes` or :class:`bytearray` buffer is normalized, see
+        :meth:`normalize`, the other buffers like :class:`mmap.mmap` are matched with a case
+        insensitive regular expression so as to not copy them.
+
+        The token objects are not created, the tokens are matched by a regular expression built
+        from the rules of the lexer, see :meth:`_get_scanner`. A :exc:`GcodeLexerError` is raised
+        for an illegal character.
+
+        """
+
+        if self._stats is not None:
+            with self._stats.timer('lex'):
+                token_array = self._tokenize_array(data)
+            self._stats.count('characters' if isinstance(data, str) else 'bytes', len(data))
+            self._stats.count('tokens', token_array.types.shape[0])
+            return token_array
+        return self._tokenize_array(data)
+
+    ##############################################
+
+    def _tokenize_array(self, data):
+
+        binary = not isinstance(data, str)
+        ignore_case = not isinstance(data, (str, bytes, bytearray))
+        if isinstance(data, memoryview):
+            data = data.cast('B')
+        if not ignore_case:
+            data = self.normalize(data)
+        scanner, literals = self._get_scanner(binary, ignore_case)
+        codes = {token_type: code for code, token_type in enumerate(self.tokens)}
+        literal_codes = {literal: codes[token_type] for literal, token_type in literals.items()}
+        dot, parenthesis = (b'.', b'(') if binary else ('.', '(')
+        real_codes = {
+            True: codes['POSITIVE_REAL'],
+            False: codes['REAL'],
+        }
+        integer_code = codes['POSITIVE_INTEGER']
+        comment_code = codes['INLINE_COMMENT']
+        nan = float('nan')
+
+        types = []
+        starts = []
+        ends = []
+        values = []
+        position = 0
+        for match in scanner.finditer(data):
+            if match.start() != position:
+                break
+            token_type = match.lastgroup
+            start, end = match.span(token_type)
+            value = nan
+            if token_type == 'LITERAL':
+                text = match.group(token_type)
+                code = literal_codes[text.lower() if ignore_case else text]
+            elif token_type == 'REAL':
+                # same as GcodeTokenMixin.t_REAL
+                text = match.group(token_type)
+                value = float(text)
+                if dot in text:
+                    code = real_codes[value > 0]
+                else:
+                    code = integer_code
+            else:
+                code = codes[token_type]
+                if code == comment_code:
+                    position = match.group(token_type).find(parenthesis, 1)
+                    if position != -1:
+                        raise GcodeLexerError(start + position)
+            types.append(code)
+            starts.append(start)
+            ends.append(end)
+            values.append(value)
+            position = end
+
+        # skip the ignored characters to locate an error
+        length = len(data)
+        ignore = self._lexer.lexignore
+        if binary:
+            ignore = ignore.encode('ascii')
+        while position < length and data[position:position+1] in ignore:
+            position += 1
+        if position != length:
+            raise GcodeLexerError(position)
+
+        offset_dtype = np.uint32 if length < 2**32 else np.uint64
+        return TokenArray(
+            np.array(types, dtype=np.uint8),
+            np.array(starts, dtype=offset_dtype),
+            np.array(ends, dtype=offset_dtype),
+            np.array(values, dtype=np.float64),
+        )
+
+    ##############################################
+
+    def tokenize_file(self, path):
+
+        """Tokenize a file using a memory map, see :meth:`tokenize_array`. A compressed file is
+        decompressed in memory, then the offsets refer to the decompressed data.
+
+        """
+
+        with open(str(path), 'rb') as fh:
+            compression = detect_compression(fh.read(MAGIC_SIZE))
+            if compression is not None:
+                fh.seek(0)
+                return self.tokenize_array(decompress(fh.read(), compression))
+            if not fh.seek(0, 2):
+                # an empty file cannot be mapped
+                return self._tokenize_array(b'')
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return self.tokenize_array(data)
+
+    ##############################################
+
+    def token_value(self, data, token_array, index):
+
+        """Return the value of the token *index* of a :class:`TokenArray` computed from *data*, as
+        the lexer does: a number, the text of a comment, or the normalized text of the token.
+
+        """
+
+        start = int(token_array.starts[index])
+        end = int(token_array.ends[index])
+        text = data[start:end]
+        if not isinstance(text, str):
+            text = bytes(text).decode('utf-8')
+        token_type = self.tokens[token_array.types[index]]
+        if token_type == 'INLINE_COMMENT':
+            return text[1:-1]
+        elif token_type == 'EOF_COMMENT':
+            return text[1:].strip()
+        elif token_type in ('POSITIVE_INTEGER', 'POSITIVE_REAL', 'REAL'):
+            value = token_array.values[index]
+            return int(value) if token_type == 'POSITIVE_INTEGER' else float(value)
+        else:
+            return text.translate(self.LOWER_TABLE)
+
+    ##############################################
+
+    def instrumented_token_function(self):
+
+        """Return a function which returns the next token like :meth:`lex.Lexer.token`, and which
+        updates the statistics.
+
+        """
+
+        stats = self._stats
+        token_function = self._lexer.token
+        clock = time.perf_counter
+
+        def instrumented_token():
+            start = clock()
+            try:
+                token = token_function()
+            finally:
+                stats.add_time('lex', clock() - start)
+            if token is not None:
+                stats.count('tokens')
+            return token
+
+        return instrumented_token
+
 ####################################################################################################
 
 class GcodeLexer(GcodeLexerMixin, GcodeTokenMixin):
@@ -19,6 +19,10 @@
 ####################################################################################################
 
 """Module to implement a basic G-code machine.
+
+If a :class:`.Statistics.Statistics` instance is passed as *stats*, the loading of the
+configuration and the setup of the parser are timed, and the statistics are passed to the parser.
+
 """
 
 ####################################################################################################
@@ -42,7 +46,9 @@ class GcodeMachine:
 
     ##############################################
 
-    def __init__(self):
+    def __init__(self, stats=None):
+
+        self._stats = stats
 
         self._config = None
         self.load_config()
@@ -54,6 +60,16 @@ class GcodeMachine:
 
     def load_config(self):
 
+        if self._stats is not None:
+            with self._stats.timer('config_load'):
+                self._load_config()
+        else:
+            self._load_config()
+
+    ##############################################
+
+    def _load_config(self):
+
         data_path = Path(__file__).parent.joinpath('data')
         self._config = Config(
             execution_order=data_path.joinpath('rs274-execution-order.yaml'),
@@ -67,7 +83,11 @@ class GcodeMachine:
 
     def setup_parser(self):
 
-        self._parser = self.PARSER_CLS(machine=self)
+        if self._stats is not None:
+            with self._stats.timer('parser_setup'):
+                self._parser = self.PARSER_CLS(machine=self, stats=self._stats)
+        else:
+            self._parser = self.PARSER_CLS(machine=self)
 
     ##############################################
 
@@ -79,6 +99,16 @@ class GcodeMachine:
     def parser(self):
         return self._parser
 
+    @property
+    def stats(self):
+        return self._stats
+
+    @stats.setter
+    def stats(self, value):
+        self._stats = value
+        if self._parser is not None:
+            self._parser.stats = value
+
     ##############################################
 
     def reset():
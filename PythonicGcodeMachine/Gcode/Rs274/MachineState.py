@@ -24,26 +24,44 @@
 ####################################################################################################
 
 __all__ = [
+    'FeedRateMode',
     'MachineState',
+    'MotionMode',
+    'PlaneSelection',
+    'SpindleDirection',
 ]
 
 ####################################################################################################
 
-from enum import Enum, auto
+from enum import Enum
 
 from .Coordinate import Coordinate
-from .ToolSet import ToolSet
+from .Tool import ToolSet
 
 ####################################################################################################
 
-class PlaneSelection:
-    XY = auto()
-    XZ = auto()
-    YZ = auto()
+# The values are the G-code numbers
 
-class FeedRateMode:
-    UNITS_PER_MINUTE = auto()
-    INVERSE_TIME = auto()
+class PlaneSelection(Enum):
+    XY = 17
+    XZ = 18
+    YZ = 19
+
+class FeedRateMode(Enum):
+    UNITS_PER_MINUTE = 94
+    INVERSE_TIME = 93
+
+class MotionMode(Enum):
+    RAPID = 0
+    LINEAR = 1
+    CW_ARC = 2
+    CCW_ARC = 3
+    CANCEL = 80
+
+class SpindleDirection(Enum):
+    CLOCKWISE = 3
+    COUNTERCLOCKWISE = 4
+    STOPPED = 5
 
 ####################################################################################################
 
@@ -71,17 +89,22 @@ class MachineState:
         # G17 XY-plane selection
         # G18 XZ-plane selection
         # G19 YZ-plane selection
-        self._plane = None
+        self._plane = PlaneSelection.XY
 
         # G54 G55 G56 G57 G58 G59 G59.1 G59.2 G59.3
- 	self._coordinate_system = None
+        self._coordinate_system = 1
+
+        # G0 rapid / G1 linear / G2 G3 arc / G80 cancel
+        self._motion_mode = MotionMode.RAPID
 
         self._feed_rate = 0 # F
-        # G93 units per minute
-        # G94 inverse time
+        # G93 inverse time
+        # G94 units per minute
         self._feed_rate_mode = FeedRateMode.UNITS_PER_MINUTE
 
         self._spindle_rate = 0 # S
+        # M3 clockwise / M4 counterclockwise / M5 stop
+        self._spindle_direction = SpindleDirection.STOPPED
 
         ### 4 	M0 M1 M2 M30 M60 	stopping
         ### 6 	M6 	tool change
@@ -101,6 +124,14 @@ class MachineState:
     def coordinate(self):
         return self._coordinate
 
+    @property
+    def motion_mode(self):
+        return self._motion_mode
+
+    @motion_mode.setter
+    def motion_mode(self, value):
+        self._motion_mode = MotionMode(value)
+
     ##############################################
 
     @property
@@ -154,16 +185,22 @@ class MachineState:
     def tool_set(self):
         return self._tool_set
 
+    @property
+    def tool(self):
+        return self._tool
+
     def load_tool(self, pocket):
         """Load the tool at the given carousel pocket.
 
         Raise ValueError if KeyError.
         """
-        self._tool.toggle_loaded()
         try:
-            self._tool = self._tool_set[pocket].toggle_loaded()
+            tool = self._tool_set[pocket]
         except KeyError:
             raise ValueError('Invalid carousel pocket {}'.format(pocket))
+        if self._tool is not None:
+            self._tool.toggle_loaded()
+        self._tool = tool.toggle_loaded()
 
     ##############################################
 
@@ -197,3 +234,10 @@ class MachineState:
             raise ValueError('Negative spindle rate {}'.format(value))
         self._spindle_rate = _value
 
+    @property
+    def spindle_direction(self):
+        return self._spindle_direction
+
+    @spindle_direction.setter
+    def spindle_direction(self, value):
+        self._spindle_direction = SpindleDirection(value)
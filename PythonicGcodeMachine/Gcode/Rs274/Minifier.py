@@ -0,0 +1,413 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to minify a G-code program.
+
+Usage::
+
+   minifier = ProgramMinifier(program, strip_comments=True, decimals=4)
+   text = minifier.to_text()
+   assert minifier.verify()
+
+The minifier removes the words which don't change the state of the machine:
+
+* a G or M code of a modal group which is already in effect, the modal groups are given by the
+  :class:`.Config.ModalGroupSet` of the machine,
+* an axis word of a G0 or G1 motion which doesn't change the position, in absolute distance mode
+  without cutter radius compensation,
+* an F or S word which doesn't change the feed rate or the spindle speed, except F in inverse time
+  mode.
+
+Non-modal codes, stop codes, tool changes and coolant codes are always kept. The positions are
+forgotten when they can be changed by something else than an axis word: G10, G28, G30, G53, G92,
+a change of units, cutter radius compensation, coordinate system or tool length offset, or an
+expression. The feed rate is also forgotten after G92 and a change of units, cutter radius
+compensation or tool length offset. A line deleted by
+``/`` is kept as is and resets the state.
+
+Line numbers and comments can be removed, a line which becomes empty is removed, and numbers are
+written with the minimal number of digits. The end of line comment of an empty line becomes a
+comment in parentheses.
+
+The equivalence of the minified program is checked by :meth:`ProgramMinifier.verify`, which
+compares the interpreted toolpaths.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'ProgramMinifier',
+]
+
+####################################################################################################
+
+import numpy as np
+
+from . import Ast
+from .Toolpath import Toolpath
+
+####################################################################################################
+
+def format_minimal_number(value):
+
+    """Format a number with the minimal number of digits, e.g. ``.5`` for 0.5"""
+
+    if isinstance(value, int):
+        return str(value)
+    text = np.format_float_positional(value, trim='-')
+    if text.startswith('0.'):
+        text = text[1:]
+    elif text.startswith('-0.'):
+        text = '-' + text[2:]
+    elif text == '-0':
+        text = '0'
+    return text
+
+####################################################################################################
+
+class ProgramMinifier:
+
+    """Class to minify a program.
+
+    Parameters:
+
+    * *config*: :class:`.Config.Config` instance, by default the configuration of the program's
+      machine,
+    * *strip_line_numbers*: remove the N words,
+    * *strip_comments*: remove the comments,
+    * *decimals*: round the numbers to the given number of decimals if it is set.
+
+    """
+
+    # groups of codes which are never removed
+    __kept_groups__ = (
+        ('G', 0), # non-modal codes
+        ('M', 4), # stopping
+        ('M', 6), # tool change
+        ('M', 8), # coolant, M7 and M8 may be active at the same time
+    )
+
+    # groups which change the meaning of the positions
+    __position_groups__ = (
+        ('G', 6), # units
+        ('G', 7), # cutter radius compensation
+        ('G', 8), # tool length offset
+        ('G', 12), # coordinate system selection
+    )
+
+    # groups which change the meaning of the positions and of the feed rate
+    __feed_groups__ = (
+        ('G', 6), # units
+        ('G', 7), # cutter radius compensation
+        ('G', 8), # tool length offset
+    )
+
+    # non-modal codes which change the meaning of the positions and of the feed rate
+    __feed_codes__ = ('G92',)
+
+    # codes of the states which are used to interpret axis words, and their initial values
+    __initial_states__ = {
+        ('G', 1): 'G0',
+        ('G', 3): 'G90',
+        ('G', 5): 'G94',
+        ('G', 7): 'G40',
+    }
+
+    __droppable_motions__ = ('G0', 'G1')
+
+    ##############################################
+
+    def __init__(self, program,
+                 config=None,
+                 strip_line_numbers=False,
+                 strip_comments=False,
+                 decimals=None,
+    ):
+
+        self._program = program
+        if config is None:
+            machine = program.machine
+            if machine is None:
+                from .Machine import GcodeMachine
+                machine = GcodeMachine()
+            config = machine.config
+        self._config = config
+        self._strip_line_numbers = bool(strip_line_numbers)
+        self._strip_comments = bool(strip_comments)
+        self._decimals = decimals
+
+        self._axis_letters = config.letters.AXIS_LETTERS
+        self._minify()
+
+    ##############################################
+
+    @property
+    def program(self):
+        return self._program
+
+    @property
+    def minified_program(self):
+        return self._minified_program
+
+    ##############################################
+
+    def _group_of(self, code):
+
+        """Return the (letter, index) key of the modal group of a code, None if the code is not
+        modal, or False if the code is unknown.
+
+        """
+
+        gcodes = self._config.gcodes
+        if code not in gcodes:
+            return False
+        group = gcodes[code].modal_group
+        if group is None:
+            return None
+        return group.key
+
+    ##############################################
+
+    def _value(self, word):
+        value = word.value
+        if self._decimals is not None and isinstance(value, float):
+            value = round(value, self._decimals)
+            if value.is_integer():
+                value = int(value)
+        return value
+
+    ##############################################
+
+    def _minify(self):
+
+        program = self._program
+        machine = program.machine
+        axis_letters = self._axis_letters
+        kept_groups = self.__kept_groups__
+        position_groups = self.__position_groups__
+        initial_states = self.__initial_states__
+
+        groups = {}   # (letter, group index) -> code in effect
+        values = {}   # letter -> value in effect
+        minified_program = Ast.Program(machine=machine)
+
+        for line in program:
+            if not line:
+                minified_program += line.clone()
+                groups.clear()
+                values.clear()
+                continue
+
+            # read the codes of the line
+            codes = []
+            is_unknown = False
+            has_non_modal = False
+            line_groups = dict(groups)
+            for word in line.iter_on_word():
+                if word.letter in 'GM':
+                    value = word.value
+                    if not isinstance(value, (int, float)):
+                        is_unknown = True
+                        continue
+                    if isinstance(value, float) and value.is_integer():
+                        value = int(value)
+                    code = '{}{}'.format(word.letter, value)
+                    group = self._group_of(code)
+                    if group is False:
+                        is_unknown = True
+                    elif group is not None:
+                        if group == ('G', 0):
+                            has_non_modal = True
+                        else:
+                            line_groups[group] = code
+                    codes.append(code)
+            if is_unknown:
+                groups.clear()
+                values.clear()
+
+            def state(group):
+                return line_groups.get(group, initial_states.get(group))
+
+            can_drop_axes = (not has_non_modal and not is_unknown and
+                             state(('G', 1)) in self.__droppable_motions__ and
+                             state(('G', 3)) == 'G90' and
+                             state(('G', 7)) == 'G40')
+            can_drop_feed = not is_unknown and state(('G', 5)) == 'G94'
+            changes_positions = has_non_modal or is_unknown or any(
+                line_groups.get(group) != groups.get(group) for group in position_groups)
+            if changes_positions:
+                for letter in axis_letters:
+                    values.pop(letter, None)
+            if (is_unknown or
+                any(line_groups.get(group) != groups.get(group) for group in self.__feed_groups__) or
+                any(code in self.__feed_codes__ for code in codes)):
+                values.pop('F', None)
+
+            # filter the items
+            items = []
+            code_index = 0
+            for item in line:
+                if isinstance(item, Ast.Comment):
+                    if not self._strip_comments:
+                        items.append(item)
+                    continue
+                elif not isinstance(item, Ast.Word):
+                    # parameter setting
+                    items.append(item)
+                    continue
+                letter = item.letter
+                if letter in 'GM':
+                    if isinstance(item.value, (int, float)):
+                        code = codes[code_index]
+                        code_index += 1
+                        group = self._group_of(code)
+                        if (group and group not in kept_groups and
+                            not is_unknown and groups.get(group) == code):
+                            continue
+                    items.append(item)
+                    continue
+                value = self._value(item)
+                if not isinstance(value, (int, float)):
+                    values.pop(letter, None)
+                    items.append(item)
+                    continue
+                if letter in axis_letters:
+                    if can_drop_axes and values.get(letter) == value:
+                        continue
+                    if can_drop_axes:
+                        values[letter] = value
+                    else:
+                        values.pop(letter, None)
+                elif letter == 'F' or letter == 'S':
+                    if values.get(letter) == value and (letter == 'S' or can_drop_feed):
+                        continue
+                    values[letter] = value
+                if value is not item.value:
+                    item = Ast.Word(letter, value, machine)
+                items.append(item)
+
+            if not is_unknown:
+                groups = line_groups
+            # positions are unknown after an incremental or compensated motion
+            if not can_drop_axes:
+                for letter in axis_letters:
+                    values.pop(letter, None)
+
+            comment = None if self._strip_comments else line.comment
+            if not items:
+                # a line must have a segment, an end of line comment is moved to a comment segment
+                if comment and '(' not in comment and ')' not in comment:
+                    items.append(Ast.Comment(comment, machine))
+                    comment = None
+                else:
+                    continue
+            line_number = None if self._strip_line_numbers else line.line_number
+            new_line = Ast.Line(line_number=line_number, comment=comment, machine=machine)
+            new_line._items[:] = [item.clone() if isinstance(item, Ast.Word) else item for item in items]
+            minified_program += new_line
+
+        self._minified_program = minified_program
+
+    ##############################################
+
+    def to_program(self):
+        """Return the minified program"""
+        return self._minified_program.clone()
+
+    ##############################################
+
+    def _item_to_text(self, item):
+        if isinstance(item, Ast.Word) and isinstance(item.value, (int, float)):
+            if item.letter in 'GM':
+                return str(item)
+            return item.letter + format_minimal_number(item.value)
+        return str(item)
+
+    ##############################################
+
+    def to_text(self, compact=True):
+
+        """Return the minified program as G-code text, words are not separated if *compact* is set"""
+
+        separator = '' if compact else ' '
+        lines = []
+        for line in self._minified_program:
+            text = '/' if not line else ''
+            if line.line_number is not None:
+                text += 'N{}'.format(line.line_number) + separator
+            text += separator.join([self._item_to_text(item) for item in line])
+            if line.comment:
+                text += ';' + line.comment
+            lines.append(text)
+        return '\n'.join(lines)
+
+    ##############################################
+
+    @property
+    def report(self):
+        """Dictionary which reports the size reduction"""
+        text = str(self._program)
+        minified_text = self.to_text()
+        return {
+            'lines': len(self._program),
+            'minified_lines': len(self._minified_program),
+            'bytes': len(text),
+            'minified_bytes': len(minified_text),
+        }
+
+    ##############################################
+
+    def verify(self, tolerance=None, parameters=None):
+
+        """Test if the minified program has the same toolpath than the original program.
+
+        The motions longer than the tolerance are compared, the tolerance is given by *decimals* if
+        it is not set.
+
+        """
+
+        if tolerance is None:
+            tolerance = 10**-self._decimals if self._decimals is not None else 1e-9
+        parser = self._program.machine.parser if self._program.machine is not None else None
+        if parser is None:
+            from .Parser import GcodeParser
+            parser = GcodeParser()
+        minified_program = parser.parse_lines(self.to_text())
+
+        toolpaths = [Toolpath(program, parameters) for program in (self._program, minified_program)]
+        columns = []
+        for toolpath in toolpaths:
+            rows = toolpath.is_motion & ((toolpath.lengths > tolerance) | toolpath.is_arc)
+            rows |= toolpath.dwell > 0
+            columns.append((
+                toolpath.motion[rows],
+                toolpath.start[rows],
+                toolpath.end[rows],
+                np.nan_to_num(toolpath.centre[rows]),
+                toolpath.feed[rows],
+                toolpath.dwell[rows],
+            ))
+        for column1, column2 in zip(*columns):
+            if column1.shape != column2.shape:
+                return False
+            if not np.allclose(column1, column2, rtol=0, atol=tolerance):
+                return False
+        return True
@@ -0,0 +1,144 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to share a parser between threads.
+
+Usage::
+
+   pool = ParserPool(machine.parser)
+   # or
+   pool = ParserPool(parser_cls=GcodeDescentParser, line_cache_size=1024, collect_stats=True)
+
+   # in any thread
+   with pool as parser:
+       program = parser.parse_text(gcode_text)
+
+   print(pool.stats.report)
+
+A parser keeps the state of the parsing in its attributes, so it cannot be used by several threads
+at the same time. A :class:`ParserPool` hands out a parser per thread, which is created by
+:meth:`.Parser.GcodeParserMixin.clone` at the first request of the thread. The clones share the
+tables of the parser and the compiled rules of the lexer, and are reused by the following requests
+of the thread, so the parsing doesn't require a lock or the construction of a parser.
+
+The pool only keeps a weak reference to the parsers, so the parser of a thread is released when the
+thread ends, and its statistics are added to the statistics of the pool.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'ParserPool',
+]
+
+####################################################################################################
+
+import threading
+import weakref
+
+from .Parser import GcodeParser
+from .Statistics import Statistics
+
+####################################################################################################
+
+class ParserPool:
+
+    """Class to hand out a clone of *parser* per thread, by default a parser of class *parser_cls*
+    is built using the keyword arguments.
+
+    If *collect_stats* is set, each parser has a :class:`.Statistics.Statistics` instance, they are
+    merged by :attr:`stats`.
+
+    """
+
+    ##############################################
+
+    def __init__(self, parser=None, parser_cls=GcodeParser, collect_stats=False, **kwargs):
+
+        if parser is None:
+            parser = parser_cls(**kwargs)
+        # build the program parser once, so the clones share its tables
+        parser._get_program_parser()
+        self._parser = parser
+        self._collect_stats = bool(collect_stats)
+        self._local = threading.local()
+        # the parsers of the live threads, this lock is only acquired when a parser is created or
+        # released
+        self._parsers = weakref.WeakSet()
+        self._number_of_parsers = 0
+        # statistics of the released parsers
+        self._released_stats = Statistics()
+        # a parser can be released by the garbage collector while the lock is held
+        self._lock = threading.RLock()
+
+    ##############################################
+
+    def __len__(self):
+        """Number of parsers which were created"""
+        return self._number_of_parsers
+
+    ##############################################
+
+    @property
+    def stats(self):
+        """Merged statistics of the parsers, or None"""
+        if not self._collect_stats:
+            return None
+        stats = Statistics()
+        with self._lock:
+            stats.merge(self._released_stats)
+            for parser in list(self._parsers):
+                stats.merge(parser.stats)
+        return stats
+
+    ##############################################
+
+    def _release(self, stats):
+        with self._lock:
+            self._released_stats.merge(stats)
+
+    ##############################################
+
+    def get(self):
+
+        """Return the parser of the current thread"""
+
+        try:
+            return self._local.parser
+        except AttributeError:
+            with self._lock:
+                stats = Statistics() if self._collect_stats else None
+                parser = self._parser.clone(stats=stats)
+                self._parsers.add(parser)
+                self._number_of_parsers += 1
+                if stats is not None:
+                    weakref.finalize(parser, self._release, stats)
+            # the thread local storage is cleared when the thread ends
+            self._local.parser = parser
+            return parser
+
+    ##############################################
+
+    def __enter__(self):
+        return self.get()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
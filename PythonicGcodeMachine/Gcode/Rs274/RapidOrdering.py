@@ -0,0 +1,413 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to reorder the cut groups of a program in order to reduce the rapid motions.
+
+Usage::
+
+   toolpath = Toolpath(program)
+   ordering = RapidOrdering(toolpath, rapid_feed=5000)
+   new_program = ordering.to_program()
+   print(ordering.report)
+
+A program is split into cut groups at the retracts, a retract is a G0 motion which only raises the
+Z axis. A cut group starts after a retract and ends with the next retract, it usually starts with
+a rapid traverse to its entry point followed by a plunge.
+
+Consecutive cut groups can be reordered when:
+
+* they only contain motions, dwells and modal codes of the motion groups, i.e. there is no tool
+  change, spindle or coolant command, parameter setting, etc.,
+* they are in absolute distance mode and don't use G10, G28, G30, G53 or G92,
+* they start and end in the same modal state, with the same tool, work offset and retract
+  height; the feed rate can differ at the start of a group if the group sets it before its first
+  feed motion.
+
+A group which can't be reordered splits the sequence of groups in blocks, each block is reordered
+independently: the rapid distance from the exit point of a group to the entry point of the next one
+is minimised using a nearest neighbour tour refined by 2-opt moves.
+
+A rapid traverse to the entry point is added to a group when its position is not fully set by its
+first rapid motions, and after a block if the following lines depend on the position.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'RapidOrdering',
+]
+
+####################################################################################################
+
+import numpy as np
+
+from . import Ast
+from .Toolpath import Toolpath
+
+####################################################################################################
+
+def _nearest_neighbour_tour(start_distance, distance):
+
+    """Return a tour which starts at the nearest node of the start and goes to the nearest unvisited
+    node.
+
+    """
+
+    number_of_nodes = distance.shape[0]
+    visited = np.zeros(number_of_nodes, dtype=bool)
+    tour = np.empty(number_of_nodes, dtype=np.intp)
+    row = start_distance
+    for k in range(number_of_nodes):
+        node = int(np.argmin(np.where(visited, np.inf, row)))
+        tour[k] = node
+        visited[node] = True
+        row = distance[node]
+    return tour
+
+####################################################################################################
+
+def _two_opt(tour, start_distance, distance, max_iterations):
+
+    """Improve an open tour with a fixed start using 2-opt moves.
+
+    The distance matrix is asymmetric, the cost of a reversed segment is computed using cumulative
+    sums of the forward and backward costs along the tour. The best move is applied at each
+    iteration.
+
+    """
+
+    number_of_nodes = tour.shape[0]
+    if number_of_nodes < 2:
+        return tour
+    # the first edge comes from the start, the last node of the tour has no exit edge
+    for _ in range(max_iterations):
+        forward = distance[tour[:-1], tour[1:]]
+        backward = distance[tour[1:], tour[:-1]]
+        cumulative_forward = np.concatenate(([0], np.cumsum(forward)))
+        cumulative_backward = np.concatenate(([0], np.cumsum(backward)))
+        # reverse tour[i:j+1], for 0 <= i < j < n
+        i = np.arange(number_of_nodes)[:,np.newaxis]
+        j = np.arange(number_of_nodes)[np.newaxis,:]
+        valid = j > i
+        i_, j_ = np.broadcast_arrays(i, j)
+        i_, j_ = i_[valid], j_[valid]
+        entry_old = np.where(i_ > 0, distance[tour[np.maximum(i_ - 1, 0)], tour[i_]], start_distance[tour[i_]])
+        entry_new = np.where(i_ > 0, distance[tour[np.maximum(i_ - 1, 0)], tour[j_]], start_distance[tour[j_]])
+        has_exit = j_ < number_of_nodes - 1
+        next_node = tour[np.minimum(j_ + 1, number_of_nodes - 1)]
+        exit_old = np.where(has_exit, distance[tour[j_], next_node], 0)
+        exit_new = np.where(has_exit, distance[tour[i_], next_node], 0)
+        inner_old = cumulative_forward[j_] - cumulative_forward[i_]
+        inner_new = cumulative_backward[j_] - cumulative_backward[i_]
+        gain = (entry_old + inner_old + exit_old) - (entry_new + inner_new + exit_new)
+        best = int(np.argmax(gain))
+        if gain[best] <= 1e-9:
+            break
+        tour[i_[best]:j_[best]+1] = tour[i_[best]:j_[best]+1][::-1].copy()
+    return tour
+
+####################################################################################################
+
+class RapidOrdering:
+
+    """Class to reorder the cut groups of a toolpath.
+
+    Parameters:
+
+    * *rapid_feed*: feed rate of rapid motions in mm/min, used to estimate the time,
+    * *max_iterations*: maximum number of 2-opt moves for a block.
+
+    :attr:`order` gives the new order of the groups, a list of indexes in :attr:`groups` which is
+    a list of (first line, last line) tuples. :attr:`blocks` gives the range of groups which are
+    reordered.
+
+    """
+
+    # G-codes which are allowed in a group which is reordered
+    __group_gcodes__ = (0, 1, 2, 3, 4, 17, 18, 19, 61, 61.1, 64, 90, 94)
+    __group_letters__ = 'XYZABCIJKRFP'
+
+    # state columns which must be identical at the start and at the end of the groups of a block
+    __state_columns__ = (
+        'units',
+        'distance_mode',
+        'coordinate_system',
+        'plane',
+        'cutter_compensation',
+        'tool',
+        'path_control',
+        'feed_rate_mode',
+    )
+
+    ##############################################
+
+    def __init__(self, toolpath, rapid_feed=5000., max_iterations=1000):
+
+        self._toolpath = toolpath
+        self._rapid_feed = float(rapid_feed)
+        self._max_iterations = int(max_iterations)
+
+        self._find_groups()
+        self._find_blocks()
+        self._order()
+
+    ##############################################
+
+    @property
+    def toolpath(self):
+        return self._toolpath
+
+    @property
+    def rapid_feed(self):
+        return self._rapid_feed
+
+    ##############################################
+
+    @property
+    def report(self):
+
+        """Dictionary which reports the rapid distance in mm and the rapid time in s of the reordered
+        blocks, before and after the reordering.
+
+        """
+
+        rapid_feed = self._rapid_feed / 60
+        return {
+            'groups': len(self.groups),
+            'reordered_groups': sum(stop - start for start, stop in self.blocks),
+            'blocks': len(self.blocks),
+            'rapid_distance': self.rapid_distance,
+            'new_rapid_distance': self.new_rapid_distance,
+            'saved_distance': self.rapid_distance - self.new_rapid_distance,
+            'saved_time': (self.rapid_distance - self.new_rapid_distance) / rapid_feed,
+        }
+
+    ##############################################
+
+    def _is_group_line(self, line):
+
+        """Test if a line can be moved within a group"""
+
+        for item in line:
+            if isinstance(item, Ast.Word):
+                letter = item.letter
+                if letter == 'G':
+                    if item.value not in self.__group_gcodes__:
+                        return False
+                elif letter not in self.__group_letters__:
+                    return False
+            elif not isinstance(item, Ast.Comment):
+                return False
+        return True
+
+    ##############################################
+
+    def _find_groups(self):
+
+        toolpath = self._toolpath
+        program = toolpath.program
+        start = toolpath.start
+        end = toolpath.end
+
+        is_retract = ((toolpath.motion == Toolpath.RAPID) &
+                      (end[:,2] > start[:,2]) &
+                      np.all(end[:,:2] == start[:,:2], axis=1))
+        retracts = np.flatnonzero(is_retract)
+        self.groups = [(int(a) + 1, int(b)) for a, b in zip(retracts[:-1], retracts[1:])]
+
+        is_feed_motion = toolpath.is_motion & (toolpath.motion != Toolpath.RAPID)
+        has_feed = ~np.isnan(toolpath._word_column('F'))
+        has_xy = np.all(~np.isnan(toolpath.axis_words[:,:2]), axis=1)
+        is_fixed = np.zeros(len(toolpath), dtype=bool)
+        for code in ('G10', 'G28', 'G30', 'G53', 'G92', 'G92.1', 'G92.2', 'G92.3', 'M6'):
+            is_fixed |= toolpath._flag_column(code)
+
+        # entry line index, i.e. the first feed motion, and group properties
+        self._entry = []
+        self._is_movable = []
+        self._has_traverse = []
+        self._is_self_fed = []
+        for first, last in self.groups:
+            feed_motions = np.flatnonzero(is_feed_motion[first:last+1])
+            if not feed_motions.shape[0]:
+                self._entry.append(first)
+                self._is_movable.append(False)
+                self._has_traverse.append(False)
+                self._is_self_fed.append(False)
+                continue
+            entry = first + int(feed_motions[0])
+            self._entry.append(entry)
+            is_movable = (not np.any(is_fixed[first:last+1]) and
+                          np.all(toolpath.distance_mode[first:last+1] == 90) and
+                          all(self._is_group_line(program[i]) for i in range(first, last + 1)))
+            self._is_movable.append(is_movable)
+            self._has_traverse.append(bool(np.any(has_xy[first:entry] & toolpath.is_motion[first:entry])))
+            self._is_self_fed.append(bool(np.any(has_feed[first:entry+1])))
+
+    ##############################################
+
+    def _state(self, i):
+        toolpath = self._toolpath
+        state = [getattr(toolpath, name)[i] for name in self.__state_columns__]
+        state.extend(toolpath.offset[i])
+        state.extend(toolpath.end[i,2:])
+        return tuple(state)
+
+    ##############################################
+
+    def _find_blocks(self):
+
+        """Find the runs of groups which can be reordered.
+
+        The groups of a block have the same state at their start and end. If the feed rate at the
+        start of the block differs from the feed rate at the end of the groups, then the groups must
+        set the feed rate before their first feed motion.
+
+        """
+
+        toolpath = self._toolpath
+        self.blocks = []
+        block_start = None
+        for k, (first, last) in enumerate(self.groups):
+            if self._is_movable[k]:
+                entry_state = self._state(first - 1)
+                exit_state = self._state(last), toolpath.feed[last]
+                if entry_state == exit_state[0]:
+                    if (block_start is not None and exit_state == block_state and
+                        (not requires_feed or self._is_self_fed[k])):
+                        continue
+                    self._close_block(block_start, k)
+                    requires_feed = toolpath.feed[first - 1] != exit_state[1]
+                    if not requires_feed or self._is_self_fed[k]:
+                        block_start = k
+                        block_state = exit_state
+                        continue
+            self._close_block(block_start, k)
+            block_start = None
+        self._close_block(block_start, len(self.groups))
+
+    ##############################################
+
+    def _close_block(self, block_start, block_stop):
+        if block_start is not None and block_stop - block_start > 1:
+            self.blocks.append((block_start, block_stop))
+
+    ##############################################
+
+    def _order(self):
+
+        toolpath = self._toolpath
+        self.order = list(range(len(self.groups)))
+        self.rapid_distance = 0.
+        self.new_rapid_distance = 0.
+
+        for block_start, block_stop in self.blocks:
+            groups = self.groups[block_start:block_stop]
+            start = toolpath.end[groups[0][0] - 1,:2]
+            entry = toolpath.start[self._entry[block_start:block_stop],:2]
+            exit = toolpath.end[[last for first, last in groups],:2]
+
+            start_distance = np.hypot(*(entry - start).T)
+            difference = exit[:,np.newaxis,:] - entry[np.newaxis,:,:]
+            distance = np.hypot(difference[...,0], difference[...,1])
+
+            number_of_groups = block_stop - block_start
+            identity = np.arange(number_of_groups)
+            tour = _nearest_neighbour_tour(start_distance, distance)
+            tour = _two_opt(tour, start_distance, distance, self._max_iterations)
+
+            old_distance = start_distance[0] + np.sum(distance[identity[:-1], identity[1:]])
+            new_distance = start_distance[tour[0]] + np.sum(distance[tour[:-1], tour[1:]])
+            if new_distance < old_distance:
+                self.order[block_start:block_stop] = (block_start + tour).tolist()
+            else:
+                new_distance = old_distance
+            self.rapid_distance += float(old_distance)
+            self.new_rapid_distance += float(new_distance)
+
+    ##############################################
+
+    def _traverse(self, i, position):
+
+        """Return a G0 line to the XY position in machine coordinates at line *i*"""
+
+        toolpath = self._toolpath
+        machine = toolpath.program.machine
+        scale = Toolpath.MM_PER_INCH if toolpath.units[i] == 20 else 1.
+        x, y = (position - toolpath.offset[i,:2]) / scale
+        line = Ast.Line(machine=machine)
+        for letter, value in (('G', 0), ('X', round(float(x), 6)), ('Y', round(float(y), 6))):
+            line += Ast.Word(letter, value, machine)
+        return line
+
+    ##############################################
+
+    def _depends_on_position(self, i):
+
+        """Test if the first motion from line *i* depends on the current XY position"""
+
+        toolpath = self._toolpath
+        for i in range(i, len(toolpath)):
+            if toolpath.is_motion[i]:
+                if toolpath.motion[i] == Toolpath.RAPID and toolpath.distance_mode[i] == 90:
+                    has_x, has_y = ~np.isnan(toolpath.axis_words[i,:2])
+                    if has_x and has_y:
+                        return False
+                    if has_x or has_y:
+                        return True
+                    continue
+                return True
+        return False
+
+    ##############################################
+
+    def to_program(self):
+
+        """Return the program where the groups are reordered"""
+
+        toolpath = self._toolpath
+        program = toolpath.program
+        new_program = Ast.Program(machine=program.machine)
+
+        lines = list(program)
+        position = 0
+        for block_start, block_stop in self.blocks:
+            first_line = self.groups[block_start][0]
+            last_line = self.groups[block_stop - 1][1]
+            for line in lines[position:first_line]:
+                new_program += line.clone()
+            for k in self.order[block_start:block_stop]:
+                first, last = self.groups[k]
+                if not self._has_traverse[k]:
+                    new_program += self._traverse(first, toolpath.start[self._entry[k],:2])
+                for line in lines[first:last+1]:
+                    new_program += line.clone()
+            # restore the original position
+            new_last = self.groups[self.order[block_stop - 1]][1]
+            if (new_last != last_line and
+                np.any(toolpath.end[new_last,:2] != toolpath.end[last_line,:2]) and
+                self._depends_on_position(last_line + 1)):
+                new_program += self._traverse(last_line, toolpath.end[last_line,:2])
+            position = last_line + 1
+        for line in lines[position:]:
+            new_program += line.clone()
+
+        return new_program
@@ -0,0 +1,270 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to check the syntax of G-code without building an AST.
+
+Usage::
+
+   recognizer = GcodeRecognizer()
+   if recognizer.is_valid(gcode_line):
+       ...
+   for error in recognizer.validate_lines(gcode_lines):
+       print(error.line, error.column)
+
+   errors = parser.validate_lines(gcode_lines)
+
+The recognizer uses the LALR tables of a :class:`.Parser.GcodeParser` but runs its own parsing loop,
+which only maintains the stack of states: no grammar action is called and no AST node is created.
+Likewise, the tokens are matched using the regular expressions of the lexer, but only their types are
+computed, the token objects and their values are not created. Since the syntax only depends on the
+sequence of the token types, the result of the automaton is cached for each sequence, a program
+generated by a CAM software has only a few different sequences.
+The positions of the errors are reported as :class:`ErrorPosition` tuples: the index of the line
+and the column of the offending character in the line.
+
+Only the syntax is checked, the errors which are raised by the AST classes during a parsing, e.g. a
+parameter index which is an expression, are not detected.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'ErrorPosition',
+    'GcodeRecognizer',
+]
+
+####################################################################################################
+
+from collections import namedtuple
+
+from .Compression import iter_text_chunks, open_compressed
+
+
+####################################################################################################
+
+ErrorPosition = namedtuple('ErrorPosition', ('line', 'column'))
+
+####################################################################################################
+
+class GcodeRecognizer:
+
+    """Class to implement a G-code recognizer using the tables of *parser*, by default a new
+    :class:`.Parser.GcodeParser`.
+
+    """
+
+    # maximum number of token type sequences in the cache
+    CACHE_SIZE = 4096
+
+    ##############################################
+
+    def __init__(self, parser=None):
+
+        if parser is None:
+            from .Parser import GcodeParser
+            parser = GcodeParser()
+        self._build_scanner(parser.__lexer_cls__())
+        self._cache = {}
+        lr_parser = parser._parser
+        self._action = lr_parser.action
+        self._goto = lr_parser.goto
+        self._productions = [(production.name, production.len) for production in lr_parser.productions]
+
+    ##############################################
+
+    def _build_scanner(self, gcode_lexer):
+        """Use the scanner of a :class:`.Lexer.GcodeLexer`, see :meth:`.Lexer.GcodeLexerMixin._get_scanner`"""
+        self._scanner, self._literals = gcode_lexer._get_scanner()
+        self._normalize = gcode_lexer.normalize
+        self._ignore = gcode_lexer._lexer.lexignore
+
+    ##############################################
+
+    def _tokens(self, line):
+
+        """Return the types and the positions of the tokens of a line, followed by an end token, and
+        the position of the lexer error if any, then the tokens stop before the error.
+
+        The token types which are computed by the token functions of
+        :class:`.Lexer.GcodeTokenMixin` are computed here in the same way.
+        """
+
+        line = self._normalize(line)
+        literals = self._literals
+        types = []
+        positions = []
+        position = 0
+        for match in self._scanner.finditer(line):
+            if match.start() != position:
+                break
+            token_type = match.lastgroup
+            start = match.start(token_type)
+            value = match.group(token_type)
+            if token_type == 'LITERAL':
+                token_type = literals[value]
+            elif token_type == 'REAL':
+                if '.' in value:
+                    token_type = 'POSITIVE_REAL' if float(value) > 0 else 'REAL'
+                else:
+                    token_type = 'POSITIVE_INTEGER'
+            elif token_type == 'INLINE_COMMENT':
+                parenthesis = value.find('(', 1)
+                if parenthesis != -1:
+                    return types, positions, start + parenthesis
+            types.append(token_type)
+            positions.append(start)
+            position = match.end()
+
+        # skip the ignored characters to locate an error
+        length = len(line)
+        while position < length and line[position] in self._ignore:
+            position += 1
+        if position != length:
+            return types, positions, position
+        types.append('$end')
+        positions.append(length)
+        return types, positions, None
+
+    ##############################################
+
+    def _run(self, types):
+
+        """Run the LALR automaton on a tuple of token types, return the index of the token where an
+        error occurs, the number of tokens if the tokens are exhausted, or None if they are accepted,
+        and the last state.
+
+        """
+
+        action = self._action
+        goto = self._goto
+        productions = self._productions
+
+        states = [0]
+        i = 0
+        number_of_tokens = len(types)
+        while i < number_of_tokens:
+            operation = action[states[-1]].get(types[i])
+            if operation is None:
+                return i, states[-1]
+            elif operation > 0:
+                # shift
+                states.append(operation)
+                i += 1
+            elif operation < 0:
+                # reduce
+                name, length = productions[-operation]
+                if length:
+                    del states[-length:]
+                states.append(goto[states[-1]][name])
+            else:
+                # accept
+                return None, states[-1]
+        return number_of_tokens, states[-1]
+
+    ##############################################
+
+    def recognize(self, line):
+
+        """Return the position of the first error in a stripped line, or None if it is valid"""
+
+        types, positions, lexer_error = self._tokens(line)
+        types = tuple(types)
+        # the syntax only depends on the sequence of the token types
+        cache = self._cache
+        try:
+            index = cache[types]
+        except KeyError:
+            if len(cache) >= self.CACHE_SIZE:
+                cache.clear()
+            index = cache[types] = self._run(types)[0]
+        if index is None:
+            return None
+        elif index < len(positions):
+            return positions[index]
+        else:
+            return lexer_error
+
+    ##############################################
+
+    def diagnose(self, line):
+
+        """Return a tuple (column, offending token, expected token types) for the first error in a
+        stripped line, or None if it is valid.
+
+        The offending token is an empty string at the end of the line, and the expected token types
+        are the ones which are accepted by the LALR state where the error occurs.
+        """
+
+        types, positions, lexer_error = self._tokens(line)
+        index, state = self._run(tuple(types))
+        if index is None:
+            return None
+        elif index < len(positions):
+            position = positions[index]
+        else:
+            position = lexer_error
+        match = self._scanner.match(self._normalize(line), position)
+        if match is not None and match.start(match.lastgroup) == position:
+            token = line[position:match.end()]
+        else:
+            token = line[position:position+1]
+        expected = tuple(sorted(token_type for token_type in self._action[state] if token_type != 'error'))
+        return position, token, expected
+
+    ##############################################
+
+    def is_valid(self, line):
+        return self.recognize(line.strip()) is None
+
+    ##############################################
+
+    def validate_lines(self, lines):
+
+        """Check G-code lines given as a list or a text, return the list of the error positions"""
+
+        if not isinstance(lines, (list, tuple)):
+            lines = lines.split('\n')
+
+        recognize = self.recognize
+        errors = []
+        for i, line in enumerate(lines):
+            stripped_line = line.strip()
+            position = recognize(stripped_line)
+            if position is not None:
+                indent = len(line) - len(line.lstrip())
+                errors.append(ErrorPosition(i, indent + position))
+        return errors
+
+    ##############################################
+
+    def validate_file(self, path):
+
+        """Check a G-code file, which can be compressed, see :meth:`validate_lines`"""
+
+        errors = []
+        line_index = 0
+        with open_compressed(path) as fh:
+            for text in iter_text_chunks(fh):
+                lines = text.splitlines()
+                errors.extend(error._replace(line=error.line + line_index)
+                              for error in self.validate_lines(lines))
+                line_index += len(lines)
+        return errors
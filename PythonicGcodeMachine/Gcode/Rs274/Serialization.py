@@ -0,0 +1,659 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to implement a binary format and a cache for parsed programs.
+
+Usage::
+
+   data = ProgramSerializer.dumps(program, source_hash=ProgramSerializer.hash(source))
+   serialized_program = SerializedProgram(data)
+   program = serialized_program.to_program(machine)
+
+   ProgramSerializer.dump(program, 'program.pgc')
+   with SerializedProgram.open('program.pgc') as serialized_program:
+       x = serialized_program.item_value[serialized_program.item_letter == ord('X')]
+
+   cache = ProgramCache('~/.cache/gcode')
+   parser = GcodeParser(cache=cache)
+   program = parser.parse_file('program.ngc')   # parsed and stored
+   program = parser.parse_file('program.ngc')   # loaded from the cache
+   print(cache.hits, cache.misses)
+
+**Format**
+
+The file starts by a header, see :attr:`ProgramSerializer.HEADER`, which contains a magic string, the
+format version, the size of the tables and the SHA-256 hash of the G-code source. The tables follow
+as columns, each column is aligned on 8 bytes:
+
+* the lines: deleted flag, line number (NaN if unset), comment (index in the string pool or -1),
+  and the index of the first item of each line, the items of the line *i* are in the range
+  ``line_item_start[i]:line_item_start[i+1]``,
+* the items: kind (word, comment or parameter setting), letter as ASCII code, flags, numeric
+  value, expression (index in the node table or -1) and index (string index of a comment or a
+  named parameter, or parameter number of a setting),
+* the expression nodes, in post order so the arguments of a node precede it: operation code,
+  flags, value (number or parameter number) and arguments,
+* the string pool: UTF-8 data and offsets.
+
+A :class:`SerializedProgram` maps the columns to NumPy arrays without copy, from a :class:`bytes`
+object or a memory mapped file. The AST is only built by :meth:`SerializedProgram.to_program`.
+
+:class:`ProgramCache` stores the serialized programs in a directory, the key is the hash of the
+source, so a cached program is only used if the source is unchanged.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'SerializationError',
+    'ProgramSerializer',
+    'SerializedProgram',
+    'ProgramCache',
+]
+
+####################################################################################################
+
+import gc
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from . import Ast
+from .Builder import _make_line, _make_word
+
+####################################################################################################
+
+class SerializationError(ValueError):
+    pass
+
+####################################################################################################
+
+class ProgramSerializer:
+
+    """Class to serialize a program to the binary format"""
+
+    MAGIC = b'PGCM'
+    VERSION = 1
+
+    # magic, version, reserved,
+    # number of lines, items, nodes, strings, string bytes,
+    # source hash
+    HEADER = struct.Struct('<4sHHQQQQQ32s')
+    ALIGNMENT = 8
+
+    # item kinds
+    WORD = 0
+    COMMENT = 1
+    SETTING = 2
+
+    # flags
+    IS_INTEGER = 1
+    IS_NAMED = 2
+
+    # node operations
+    NUMBER = 0
+    PARAMETER = 1
+    OPERATIONS = (
+        # unary
+        Ast.AbsoluteValue,
+        Ast.ArcCosine,
+        Ast.ArcSine,
+        Ast.ArcTangent,
+        Ast.Cosine,
+        Ast.ERaisedTo,
+        Ast.FixDown,
+        Ast.FixUp,
+        Ast.NaturalLogOf,
+        Ast.Round,
+        Ast.Sine,
+        Ast.SquareRoot,
+        Ast.Tangent,
+        # binary
+        Ast.Power,
+        Ast.DividedBy,
+        Ast.Modulo,
+        Ast.Multiply,
+        Ast.And,
+        Ast.ExclusiveOr,
+        Ast.Subtraction,
+        Ast.Or,
+        Ast.Addition,
+    )
+    FIRST_OPERATION = 2
+
+    # (name, dtype, size key) in file order
+    COLUMNS = (
+        ('line_deleted', np.uint8, 'lines'),
+        ('line_number', np.float64, 'lines'),
+        ('line_comment', np.int32, 'lines'),
+        ('line_item_start', np.int64, 'lines+1'),
+        ('item_kind', np.uint8, 'items'),
+        ('item_letter', np.uint8, 'items'),
+        ('item_flags', np.uint8, 'items'),
+        ('item_value', np.float64, 'items'),
+        ('item_node', np.int32, 'items'),
+        ('item_index', np.int64, 'items'),
+        ('node_operation', np.uint8, 'nodes'),
+        ('node_flags', np.uint8, 'nodes'),
+        ('node_value', np.float64, 'nodes'),
+        ('node_arg1', np.int32, 'nodes'),
+        ('node_arg2', np.int32, 'nodes'),
+        ('string_offset', np.int64, 'strings+1'),
+        ('string_data', np.uint8, 'string_bytes'),
+    )
+
+    ##############################################
+
+    @staticmethod
+    def hash(source):
+        """Return the SHA-256 hash of a source given as :class:`str` or :class:`bytes`"""
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        return hashlib.sha256(source).digest()
+
+    ##############################################
+
+    @classmethod
+    def layout(cls, sizes):
+
+        """Return the offset of each column and the total size for a dictionary of table sizes"""
+
+        offsets = {}
+        offset = cls._align(cls.HEADER.size)
+        for name, dtype, key in cls.COLUMNS:
+            offsets[name] = offset
+            offset = cls._align(offset + cls._column_size(sizes, dtype, key))
+        return offsets, offset
+
+    @classmethod
+    def _align(cls, offset):
+        return (offset + cls.ALIGNMENT - 1) // cls.ALIGNMENT * cls.ALIGNMENT
+
+    @staticmethod
+    def _column_length(sizes, key):
+        if key.endswith('+1'):
+            return sizes[key[:-2]] + 1
+        return sizes[key]
+
+    @classmethod
+    def _column_size(cls, sizes, dtype, key):
+        return cls._column_length(sizes, key) * np.dtype(dtype).itemsize
+
+    ##############################################
+
+    def __init__(self, program):
+
+        self._strings = []
+        self._string_index = {}
+        self._columns = {name: [] for name, dtype, key in self.COLUMNS}
+        self._operation_code = {cls: self.FIRST_OPERATION + i for i, cls in enumerate(self.OPERATIONS)}
+        self._serialize(program)
+
+    ##############################################
+
+    def _string(self, text):
+        index = self._string_index.get(text)
+        if index is None:
+            index = self._string_index[text] = len(self._strings)
+            self._strings.append(text)
+        return index
+
+    ##############################################
+
+    def _parameter(self, parameter):
+        """Return the flags and the value of a parameter index"""
+        if isinstance(parameter, str):
+            return self.IS_NAMED, self._string(parameter)
+        return 0, parameter
+
+    ##############################################
+
+    def _value(self, value):
+
+        """Return the flags, the numeric value and the node of a value"""
+
+        if isinstance(value, int):
+            return self.IS_INTEGER, value, -1
+        elif isinstance(value, float):
+            return 0, value, -1
+        return 0, 0., self._node(value)
+
+    ##############################################
+
+    def _node(self, value):
+
+        """Append the nodes of an expression and return the index of its root"""
+
+        columns = self._columns
+        if isinstance(value, (int, float)):
+            operation = self.NUMBER
+            flags = self.IS_INTEGER if isinstance(value, int) else 0
+            arg1 = arg2 = -1
+        elif isinstance(value, Ast.Parameter):
+            operation = self.PARAMETER
+            flags, value = self._parameter(value.parameter)
+            arg1 = arg2 = -1
+        else:
+            operation = self._operation_code.get(value.__class__)
+            if operation is None:
+                raise SerializationError('Unsupported node {}'.format(value.__class__.__name__))
+            flags = 0
+            if isinstance(value, Ast.UnaryOperation):
+                arg1 = self._node(value.arg)
+                arg2 = -1
+            else:
+                arg1 = self._node(value.arg1)
+                arg2 = self._node(value.arg2)
+            value = 0
+        columns['node_operation'].append(operation)
+        columns['node_flags'].append(flags)
+        columns['node_value'].append(value)
+        columns['node_arg1'].append(arg1)
+        columns['node_arg2'].append(arg2)
+        return len(columns['node_operation']) - 1
+
+    ##############################################
+
+    def _serialize(self, program):
+
+        columns = self._columns
+        line_deleted = columns['line_deleted']
+        line_number = columns['line_number']
+        line_comment = columns['line_comment']
+        line_item_start = columns['line_item_start']
+        item_kind = columns['item_kind']
+        item_letter = columns['item_letter']
+        item_flags = columns['item_flags']
+        item_value = columns['item_value']
+        item_node = columns['item_node']
+        item_index = columns['item_index']
+
+        for line in program:
+            line_deleted.append(not line)
+            number = line.line_number
+            line_number.append(np.nan if number is None else number)
+            comment = line.comment
+            line_comment.append(-1 if comment is None else self._string(comment))
+            line_item_start.append(len(item_kind))
+            for item in line:
+                if isinstance(item, Ast.Word):
+                    kind = self.WORD
+                    letter = ord(item.letter)
+                    flags, value, node = self._value(item.value)
+                    index = 0
+                elif isinstance(item, Ast.Comment):
+                    kind = self.COMMENT
+                    letter = flags = node = 0
+                    value = 0.
+                    index = self._string(item.text)
+                elif isinstance(item, Ast.ParameterSetting):
+                    kind = self.SETTING
+                    letter = 0
+                    flags, value, node = self._value(item.value)
+                    parameter_flags, index = self._parameter(item.parameter)
+                    flags |= parameter_flags
+                else:
+                    raise SerializationError('Unsupported item {}'.format(item.__class__.__name__))
+                item_kind.append(kind)
+                item_letter.append(letter)
+                item_flags.append(flags)
+                item_value.append(value)
+                item_node.append(node)
+                item_index.append(index)
+        line_item_start.append(len(item_kind))
+
+        encoded_strings = [text.encode('utf-8') for text in self._strings]
+        lengths = np.array([len(data) for data in encoded_strings], dtype=np.int64)
+        columns['string_offset'] = np.concatenate(([0], np.cumsum(lengths)))
+        columns['string_data'] = np.frombuffer(b''.join(encoded_strings), dtype=np.uint8)
+
+    ##############################################
+
+    def to_bytes(self, source_hash=b''):
+
+        """Return the binary representation"""
+
+        columns = self._columns
+        sizes = {
+            'lines': len(columns['line_deleted']),
+            'items': len(columns['item_kind']),
+            'nodes': len(columns['node_operation']),
+            'strings': len(self._strings),
+            'string_bytes': len(columns['string_data']),
+        }
+        offsets, size = self.layout(sizes)
+
+        buffer = bytearray(size)
+        self.HEADER.pack_into(
+            buffer, 0,
+            self.MAGIC, self.VERSION, 0,
+            sizes['lines'], sizes['items'], sizes['nodes'], sizes['strings'], sizes['string_bytes'],
+            source_hash.ljust(32, b'\0')[:32],
+        )
+        for name, dtype, key in self.COLUMNS:
+            array = np.asarray(columns[name], dtype=dtype)
+            start = offsets[name]
+            buffer[start:start + array.nbytes] = array.tobytes()
+        return bytes(buffer)
+
+    ##############################################
+
+    @classmethod
+    def dumps(cls, program, source_hash=b''):
+        """Return the binary representation of a program"""
+        return cls(program).to_bytes(source_hash)
+
+    ##############################################
+
+    @classmethod
+    def dump(cls, program, path, source_hash=b''):
+
+        """Write the binary representation of a program to a file, the file is replaced
+        atomically.
+
+        """
+
+        data = cls.dumps(program, source_hash)
+        path = Path(path)
+        fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            os.replace(tmp_path, str(path))
+        except BaseException:
+            # also on KeyboardInterrupt, the exception is re-raised
+            os.unlink(tmp_path)
+            raise
+
+####################################################################################################
+
+class SerializedProgram:
+
+    """Class to access a serialized program.
+
+    The columns are available as read-only NumPy arrays, using the names of
+    :attr:`ProgramSerializer.COLUMNS`, e.g. :attr:`item_value`.
+
+    """
+
+    ##############################################
+
+    @classmethod
+    def open(cls, path):
+        """Map a file in memory"""
+        with open(str(path), 'rb') as fh:
+            buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    ##############################################
+
+    def __init__(self, buffer):
+
+        self._buffer = buffer
+        header = ProgramSerializer.HEADER
+        if len(buffer) < header.size:
+            raise SerializationError('Truncated header')
+        (magic, version, _,
+         number_of_lines, number_of_items, number_of_nodes, number_of_strings, number_of_string_bytes,
+         self._source_hash) = header.unpack_from(buffer, 0)
+        if magic != ProgramSerializer.MAGIC:
+            raise SerializationError('Bad magic {!r}'.format(magic))
+        if version != ProgramSerializer.VERSION:
+            raise SerializationError('Unsupported version {}'.format(version))
+
+        sizes = {
+            'lines': number_of_lines,
+            'items': number_of_items,
+            'nodes': number_of_nodes,
+            'strings': number_of_strings,
+            'string_bytes': number_of_string_bytes,
+        }
+        offsets, size = ProgramSerializer.layout(sizes)
+        if len(buffer) < size:
+            raise SerializationError('Truncated data')
+
+        self._columns = {}
+        for name, dtype, key in ProgramSerializer.COLUMNS:
+            count = ProgramSerializer._column_length(sizes, key)
+            self._columns[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=offsets[name])
+
+    ##############################################
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['_columns'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    ##############################################
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Release the buffer, the column arrays must not be used after"""
+        self._columns = {}
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = None
+
+    ##############################################
+
+    @property
+    def source_hash(self):
+        return self._source_hash
+
+    @property
+    def columns(self):
+        return self._columns
+
+    def __len__(self):
+        return self._columns['line_deleted'].shape[0]
+
+    ##############################################
+
+    def string(self, index):
+        offsets = self._columns['string_offset']
+        data = self._columns['string_data']
+        return data[offsets[index]:offsets[index + 1]].tobytes().decode('utf-8')
+
+    ##############################################
+
+    def _nodes(self, machine, strings):
+
+        """Return the list of the expression nodes"""
+
+        columns = self._columns
+        operations = ProgramSerializer.OPERATIONS
+        first_operation = ProgramSerializer.FIRST_OPERATION
+        nodes = []
+        for operation, flags, value, arg1, arg2 in zip(
+                columns['node_operation'].tolist(),
+                columns['node_flags'].tolist(),
+                columns['node_value'].tolist(),
+                columns['node_arg1'].tolist(),
+                columns['node_arg2'].tolist(),
+        ):
+            if operation == ProgramSerializer.NUMBER:
+                node = int(value) if flags & ProgramSerializer.IS_INTEGER else value
+            elif operation == ProgramSerializer.PARAMETER:
+                parameter = strings[int(value)] if flags & ProgramSerializer.IS_NAMED else int(value)
+                node = Ast.Parameter(parameter, machine)
+            else:
+                cls = operations[operation - first_operation]
+                if issubclass(cls, Ast.UnaryOperation):
+                    node = cls(nodes[arg1], machine)
+                else:
+                    node = cls(nodes[arg1], nodes[arg2], machine)
+            nodes.append(node)
+        return nodes
+
+    ##############################################
+
+    def to_program(self, machine=None):
+
+        """Build the :class:`.Ast.Program` instance"""
+
+        program = Ast.Program(machine=machine)
+        is_gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            program._lines = self._make_lines(machine)
+        finally:
+            if is_gc_enabled:
+                gc.enable()
+        return program
+
+    ##############################################
+
+    def _make_lines(self, machine):
+
+        columns = self._columns
+        offsets = columns['string_offset'].tolist()
+        data = columns['string_data'].tobytes()
+        strings = [data[start:stop].decode('utf-8') for start, stop in zip(offsets[:-1], offsets[1:])]
+        nodes = self._nodes(machine, strings)
+
+        WORD = ProgramSerializer.WORD
+        COMMENT = ProgramSerializer.COMMENT
+        IS_INTEGER = ProgramSerializer.IS_INTEGER
+        IS_NAMED = ProgramSerializer.IS_NAMED
+
+        items = []
+        for kind, letter, flags, value, node, index in zip(
+                columns['item_kind'].tolist(),
+                columns['item_letter'].tolist(),
+                columns['item_flags'].tolist(),
+                columns['item_value'].tolist(),
+                columns['item_node'].tolist(),
+                columns['item_index'].tolist(),
+        ):
+            if kind == COMMENT:
+                items.append(Ast.Comment(strings[index], machine))
+                continue
+            if node != -1:
+                value = nodes[node]
+            elif flags & IS_INTEGER:
+                value = int(value)
+            if kind == WORD:
+                items.append(_make_word(chr(letter), value, machine))
+            else:
+                parameter = strings[index] if flags & IS_NAMED else index
+                items.append(Ast.ParameterSetting(parameter, value, machine))
+
+        lines = []
+        item_start = columns['line_item_start'].tolist()
+        for i, (deleted, line_number, comment) in enumerate(zip(
+                columns['line_deleted'].tolist(),
+                columns['line_number'].tolist(),
+                columns['line_comment'].tolist(),
+        )):
+            if line_number != line_number:
+                line_number = None
+            elif line_number.is_integer():
+                line_number = int(line_number)
+            comment = strings[comment] if comment != -1 else None
+            line = _make_line(bool(deleted), line_number, comment, machine)
+            line._items = items[item_start[i]:item_start[i+1]]
+            lines.append(line)
+        return lines
+
+####################################################################################################
+
+class ProgramCache:
+
+    """Class to implement a cache of parsed programs in a directory.
+
+    The programs are stored in files named by the hash of their source, of a *key* which identifies
+    the parser, see :meth:`.Parser.GcodeParserMixin.cache_key`, and by the version of the format, so
+    a program parsed by another parser or grammar is not reused. :attr:`hits` and :attr:`misses`
+    count the lookups.
+
+    """
+
+    EXTENSION = '.pgc'
+
+    ##############################################
+
+    def __init__(self, directory):
+        self._directory = Path(directory).expanduser()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    ##############################################
+
+    @property
+    def directory(self):
+        return self._directory
+
+    ##############################################
+
+    def path(self, source_hash, key=''):
+        key_hash = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+        return self._directory.joinpath('{}-{}-v{}{}'.format(
+            source_hash.hex(), key_hash, ProgramSerializer.VERSION, self.EXTENSION))
+
+    ##############################################
+
+    def get(self, source, machine=None, key=''):
+
+        """Return the program of a source parsed by the parser *key*, or None if it is not in the
+        cache
+
+        """
+
+        source_hash = ProgramSerializer.hash(source)
+        path = self.path(source_hash, key)
+        try:
+            serialized_program = SerializedProgram.open(path)
+        except (OSError, ValueError):
+            # a missing, empty or corrupted file
+            self.misses += 1
+            return None
+        with serialized_program:
+            if serialized_program.source_hash != source_hash:
+                self.misses += 1
+                return None
+            program = serialized_program.to_program(machine)
+        self.hits += 1
+        return program
+
+    ##############################################
+
+    def put(self, source, program, key=''):
+        """Store the program of a source parsed by the parser *key*"""
+        source_hash = ProgramSerializer.hash(source)
+        ProgramSerializer.dump(program, self.path(source_hash, key), source_hash)
+
+    ##############################################
+
+    def clear(self):
+        for path in self._directory.glob('*' + self.EXTENSION):
+            path.unlink()
@@ -0,0 +1,365 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to simplify the G1 polylines of a program.
+
+Usage::
+
+   toolpath = Toolpath(program)
+   simplification = PolylineSimplification(toolpath, tolerance=0.01)
+   new_program = simplification.to_program()
+   print(simplification.report)
+
+CAM software often outputs a lot of tiny G1 motions which are almost collinear. This module removes
+the lines which can be dropped without moving the toolpath more than a chord tolerance, using the
+`Ramer–Douglas–Peucker <https://en.wikipedia.org/wiki/Ramer-Douglas-Peucker_algorithm>`_
+algorithm.
+
+A polyline is a run of consecutive G1 motions with the same feed rate, plane and modal states, see
+:class:`Polylines`. A line can only be removed if it contains nothing else than X Y Z words, G1
+and an F word which doesn't change the feed rate, a line with a comment, a parameter setting or any
+other word is kept.
+
+**Implementation**
+
+The algorithm is applied to all the polylines at once: at each iteration, the distance of each
+point to the chord of the interval which contains it is computed on NumPy arrays, and the farthest
+point of each interval is kept if its distance exceeds the tolerance. The number of iterations is
+the depth of the recursion of the original algorithm.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'Polylines',
+    'PolylineSimplification',
+]
+
+####################################################################################################
+
+import numpy as np
+
+from . import Ast
+from .Toolpath import Toolpath, last_index
+from .Transform import rewrite_items
+
+####################################################################################################
+
+class Polylines:
+
+    """Class to find the G1 polylines of a toolpath.
+
+    The points of the polylines are stored in :attr:`points`, a (m, 3) array, where each polyline
+    is made of its start point followed by the end points of its lines:
+
+    * :attr:`members`: index of the lines which belong to a polyline,
+    * :attr:`is_first`: flag the members which start a polyline,
+    * :attr:`end_point`: index of the end point of each member,
+    * :attr:`start_point`, :attr:`last_point`: index of the first and last point of each polyline.
+
+    The interior points of a polyline are the end of lines which can be removed.
+
+    """
+
+    # columns which must be identical in a polyline
+    __state_columns__ = (
+        'feed',
+        'units',
+        'distance_mode',
+        'coordinate_system',
+        'plane',
+        'path_control',
+        'tool',
+    )
+
+    ##############################################
+
+    def __init__(self, toolpath):
+
+        self._toolpath = toolpath
+
+        n = Toolpath.NUMBER_OF_LINEAR_AXES
+        is_member, is_chained = self._find_polylines()
+        self.members = np.flatnonzero(is_member)
+        self.is_first = ~is_chained[self.members]
+        self.number_of_polylines = int(np.count_nonzero(self.is_first))
+        self.number_of_points = self.members.shape[0] + self.number_of_polylines
+
+        self.end_point = np.arange(self.members.shape[0]) + np.cumsum(self.is_first)
+        self.start_point = self.end_point[self.is_first] - 1
+        self.last_point = np.append(self.start_point[1:] - 1, self.number_of_points - 1)
+        self.last_point = self.last_point[:self.number_of_polylines]
+
+        self.points = np.empty((self.number_of_points, n))
+        self.points[self.end_point] = toolpath.end[self.members,:n]
+        self.points[self.start_point] = toolpath.start[self.members[self.is_first],:n]
+
+    ##############################################
+
+    @staticmethod
+    def is_removable(line):
+        """Test if a line contains only X Y Z words, G1 and F"""
+        if line.comment:
+            return False
+        for item in line:
+            if not isinstance(item, Ast.Word):
+                return False
+            letter = item.letter
+            if letter not in 'XYZF' and not (letter == 'G' and item.value == 1):
+                return False
+        return True
+
+    ##############################################
+
+    def _find_polylines(self):
+
+        """Return a mask of the lines which belong to a polyline and a mask of the lines which
+        continue the polyline of the previous line.
+
+        """
+
+        toolpath = self._toolpath
+        n = Toolpath.NUMBER_OF_LINEAR_AXES
+
+        is_member = ((toolpath.motion == Toolpath.LINEAR) &
+                     (toolpath.feed_rate_mode == 94) &
+                     (toolpath.cutter_compensation == 40))
+
+        same_state = np.all(toolpath.offset[1:] == toolpath.offset[:-1], axis=1)
+        # rotary axes must not move
+        same_state &= np.all(toolpath.end[1:,n:] == toolpath.start[1:,n:], axis=1)
+        for name in self.__state_columns__:
+            column = getattr(toolpath, name)
+            same_state &= column[1:] == column[:-1]
+
+        # an F word can only be removed if it doesn't change the feed rate
+        previous_feed = np.zeros(len(toolpath))
+        previous_feed[1:] = toolpath.feed[:-1]
+        same_feed = toolpath.feed == previous_feed
+
+        program = toolpath.program
+        is_removable = np.zeros(len(toolpath), dtype=bool)
+        for i in np.flatnonzero(is_member[:-1] & is_member[1:] & same_state & same_feed[:-1]):
+            is_removable[i] = self.is_removable(program[int(i)])
+
+        is_chained = np.zeros(len(toolpath), dtype=bool)
+        is_chained[1:] = is_member[1:] & is_member[:-1] & same_state & is_removable[:-1]
+
+        return is_member, is_chained
+
+####################################################################################################
+
+class PolylineSimplification:
+
+    """Class to simplify the G1 polylines of a toolpath.
+
+    The *tolerance* is the maximum distance in mm between a removed point and the simplified
+    polyline. :attr:`removed` flags the lines which are removed.
+
+    The motion mode and the feed rate of a removed line are written on the next kept line.
+
+    """
+
+    MOTION_GCODES = (0, 1, 2, 3, 38.2, 80, 81, 82, 83, 84, 85, 86, 87, 88, 89)
+
+    ##############################################
+
+    def __init__(self, toolpath, tolerance=0.01):
+
+        self._toolpath = toolpath
+        self._tolerance = float(tolerance)
+        self._simplify()
+
+    ##############################################
+
+    @property
+    def toolpath(self):
+        return self._toolpath
+
+    @property
+    def tolerance(self):
+        return self._tolerance
+
+    ##############################################
+
+    @property
+    def number_of_lines(self):
+        return len(self._toolpath)
+
+    @property
+    def number_of_removed_lines(self):
+        return int(np.count_nonzero(self.removed))
+
+    @property
+    def report(self):
+        """Dictionary which reports the line count reduction"""
+        number_of_lines = self.number_of_lines
+        number_of_removed_lines = self.number_of_removed_lines
+        return {
+            'lines': number_of_lines,
+            'removed_lines': number_of_removed_lines,
+            'remaining_lines': number_of_lines - number_of_removed_lines,
+            'polylines': self.number_of_polylines,
+            'reduction': number_of_removed_lines / number_of_lines if number_of_lines else 0.,
+        }
+
+    ##############################################
+
+    def _simplify(self):
+
+        toolpath = self._toolpath
+        tolerance = self._tolerance
+
+        polylines = Polylines(toolpath)
+        self.number_of_polylines = polylines.number_of_polylines
+        is_kept = np.zeros(polylines.number_of_points, dtype=bool)
+        is_kept[polylines.start_point] = True
+        is_kept[polylines.last_point] = True
+
+        self._rdp(polylines.points, is_kept, tolerance)
+
+        self.removed = np.zeros(len(toolpath), dtype=bool)
+        self.removed[polylines.members] = ~is_kept[polylines.end_point]
+
+    ##############################################
+
+    @staticmethod
+    def _rdp(points, is_kept, tolerance):
+
+        """Apply the Ramer–Douglas–Peucker algorithm on all the intervals between the kept points"""
+
+        number_of_points = points.shape[0]
+        indexes = np.arange(number_of_points)
+        while number_of_points:
+            left = last_index(is_kept)
+            right = number_of_points - 1 - last_index(is_kept[::-1])[::-1]
+            a = points[left]
+            chord = points[right] - a
+            delta = points - a
+            chord_length2 = np.sum(chord**2, axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                t = np.clip(np.sum(delta * chord, axis=1) / chord_length2, 0, 1)
+            t[chord_length2 == 0] = 0
+            distance = np.sqrt(np.sum((delta - t[:,np.newaxis] * chord)**2, axis=1))
+            distance[is_kept] = 0
+
+            # farthest point of each interval
+            interval_starts = np.flatnonzero(is_kept)
+            maximum = np.maximum.reduceat(distance, interval_starts)
+            interval = np.cumsum(is_kept) - 1
+            is_candidate = (distance == maximum[interval]) & (distance > tolerance)
+            if not np.any(is_candidate):
+                break
+            candidates = indexes[is_candidate]
+            _, first = np.unique(interval[candidates], return_index=True)
+            is_kept[candidates[first]] = True
+
+    ##############################################
+
+    def _new_words(self):
+
+        """Return a dictionary line index -> {letter: new value} for the kept lines which follow a
+        removed line.
+
+        """
+
+        toolpath = self._toolpath
+        n = Toolpath.NUMBER_OF_LINEAR_AXES
+        removed = self.removed
+
+        is_rewritten = np.zeros(len(toolpath), dtype=bool)
+        is_rewritten[1:] = removed[:-1] & ~removed[1:]
+        lines = np.flatnonzero(is_rewritten)
+
+        # start of the line in the simplified program, i.e. the end of the last kept line or the
+        # start of the program
+        kept = last_index(~removed)[lines - 1]
+        position = toolpath.program_position()[:,:n]
+        first_position = toolpath.program_position(toolpath.start)[0,:n]
+        start = np.where((kept >= 0)[:,np.newaxis], position[np.maximum(kept, 0)], first_position)
+        end = position[lines]
+
+        words = toolpath.axis_words[lines,:n]
+        is_written = ~np.isnan(words)
+        is_incremental = (toolpath.distance_mode[lines] == 91)[:,np.newaxis]
+        is_moved = end != start
+        values = np.where(is_incremental, end - start, end)
+        # absolute words are kept
+        is_new = np.where(is_incremental, is_written | is_moved, ~is_written & is_moved)
+
+        new_words = {}
+        letters = Toolpath.LINEAR_AXES
+        for i, line_values, line_is_new in zip(lines.tolist(), values.tolist(), is_new.tolist()):
+            new_words[i] = {letter: value
+                            for letter, value, flag in zip(letters, line_values, line_is_new) if flag}
+        return new_words
+
+    ##############################################
+
+    def to_program(self, decimals=None):
+
+        """Return the simplified program, new values are rounded to the given number of decimals if
+        it is set.
+
+        """
+
+        program = self._toolpath.program
+
+        def make_word(letter, value):
+            if decimals is not None:
+                value = round(value, decimals)
+            return Ast.Word(letter, value, program.machine)
+
+        new_words = self._new_words()
+        removed = self.removed.tolist()
+        new_program = Ast.Program(machine=program.machine)
+        # modal words of the removed lines which must be restored, e.g. the G1 of a polyline
+        modal_words = {}
+        for i, line in enumerate(program):
+            if removed[i]:
+                for word in line.iter_on_letter('GF'):
+                    if word.letter == 'F':
+                        modal_words['F'] = word
+                    elif word.value in self.MOTION_GCODES:
+                        modal_words['G'] = word
+                continue
+            line = line.clone()
+            words = new_words.get(i)
+            if words:
+                line._items[:] = rewrite_items(line, words, make_word)
+            if modal_words and line:
+                self._restore_modal_words(line, modal_words)
+                modal_words = {}
+            new_program += line
+
+        return new_program
+
+    ##############################################
+
+    def _restore_modal_words(self, line, modal_words):
+
+        """Insert the modal words which are not overridden by the line"""
+
+        if 'F' in modal_words and not any(line.iter_on_letter('F')):
+            line._items.insert(0, modal_words['F'].clone())
+        if 'G' in modal_words:
+            if not any(word.value in self.MOTION_GCODES for word in line.iter_on_g_word()):
+                line._items.insert(0, modal_words['G'].clone())
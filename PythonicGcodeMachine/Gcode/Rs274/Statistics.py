@@ -0,0 +1,281 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to collect statistics on the processing of G-code.
+
+Usage::
+
+   stats = Statistics()
+   machine = GcodeMachine(stats=stats)
+   program = machine.parser.parse_file('program.ngc')
+   print(stats.report)
+   stats.dump('gcode.json')
+   stats.dump('gcode.prom')   # OpenMetrics text
+
+   lexer = GcodeLexer(stats=stats)
+   parser = GcodeParser(stats=stats)
+   parser.stats = None   # disable
+
+The instrumentation is opt-in: :class:`.Lexer.GcodeLexer`, :class:`.Parser.GcodeParser` and
+:class:`.Machine.GcodeMachine` only update a :class:`Statistics` instance if one is set, else the
+cost is a test per call.
+
+The statistics are made of cumulative timers per processing stage, in seconds, and counters. The
+stages are:
+
+* ``lex``: tokenization,
+* ``parse``: LALR parsing including the construction of the AST, the time of the tokenization is
+  excluded,
+* ``read``, ``decode`` and ``decompress``: reading, decoding and decompression of the files,
+* ``program_cache``: lookups of the program cache,
+* ``validate``: syntax checks,
+* ``config_load`` and ``parser_setup``: construction of a machine.
+
+The counters are ``characters``, ``tokens``, ``lines``, ``nodes`` (AST nodes), ``errors``,
+``bytes`` (read from files) and the ``<cache>_hits`` and ``<cache>_misses`` counters of the line
+cache and the program cache, from which the hit rates are computed.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'Statistics',
+]
+
+####################################################################################################
+
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
+import re
+import tempfile
+import time
+
+####################################################################################################
+
+class Statistics:
+
+    """Class to accumulate timers and counters"""
+
+    # prefix of the OpenMetrics metric names
+    METRIC_PREFIX = 'pythonic_gcode'
+
+    METRIC_NAME_RE = re.compile(r'[^a-zA-Z0-9_]')
+
+    # mode of the dumped files, a temporary file is only readable by its owner
+    FILE_MODE = 0o644
+
+    ##############################################
+
+    def __init__(self):
+        self.reset()
+
+    ##############################################
+
+    def reset(self):
+        self._times = {}
+        self._calls = {}
+        self._counters = {}
+
+    ##############################################
+
+    def add_time(self, stage, seconds):
+        """Add a duration to the timer of a stage"""
+        self._times[stage] = self._times.get(stage, 0.) + seconds
+        self._calls[stage] = self._calls.get(stage, 0) + 1
+
+    ##############################################
+
+    @contextmanager
+    def timer(self, stage):
+        """Context manager to time a block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    ##############################################
+
+    def count(self, name, value=1):
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    ##############################################
+
+    def merge(self, other):
+
+        """Add the timers and the counters of another instance"""
+
+        for stage, seconds in other._times.items():
+            self._times[stage] = self._times.get(stage, 0.) + seconds
+        for stage, calls in other._calls.items():
+            self._calls[stage] = self._calls.get(stage, 0) + calls
+        for name, value in other._counters.items():
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    ##############################################
+
+    def time(self, stage):
+        """Return the cumulative time of a stage"""
+        return self._times.get(stage, 0.)
+
+    def calls(self, stage):
+        """Return the number of timed calls of a stage"""
+        return self._calls.get(stage, 0)
+
+    def counter(self, name):
+        return self._counters.get(name, 0)
+
+    ##############################################
+
+    @property
+    def times(self):
+        return dict(self._times)
+
+    @property
+    def counters(self):
+        return dict(self._counters)
+
+    ##############################################
+
+    @property
+    def hit_rates(self):
+
+        """Dictionary of the hit rates of the caches, computed from the ``<cache>_hits`` and
+        ``<cache>_misses`` counters.
+
+        """
+
+        hit_rates = {}
+        for name, hits in self._counters.items():
+            if name.endswith('_hits'):
+                cache = name[:-len('_hits')]
+                lookups = hits + self._counters.get(cache + '_misses', 0)
+                hit_rates[cache] = hits / lookups if lookups else 0.
+        for name in self._counters:
+            if name.endswith('_misses'):
+                hit_rates.setdefault(name[:-len('_misses')], 0.)
+        return hit_rates
+
+    ##############################################
+
+    def to_dict(self):
+        return {
+            'times': self.times,
+            'calls': dict(self._calls),
+            'counters': self.counters,
+            'hit_rates': self.hit_rates,
+        }
+
+    ##############################################
+
+    @property
+    def report(self):
+
+        """Text report of the statistics"""
+
+        lines = []
+        for stage in sorted(self._times):
+            lines.append('{:<20} {:12.6f} s {:10} calls'.format(stage, self._times[stage], self._calls[stage]))
+        for name in sorted(self._counters):
+            lines.append('{:<20} {:12}'.format(name, self._counters[name]))
+        for cache, hit_rate in sorted(self.hit_rates.items()):
+            lines.append('{:<20} {:12.1%}'.format(cache + ' hit rate', hit_rate))
+        return '\n'.join(lines)
+
+    ##############################################
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent, sort_keys=True)
+
+    ##############################################
+
+    def _metric_name(self, name):
+        return self.METRIC_PREFIX + '_' + self.METRIC_NAME_RE.sub('_', name)
+
+    ##############################################
+
+    def to_openmetrics(self):
+
+        """Return the statistics in the OpenMetrics text format"""
+
+        lines = []
+
+        def add_family(name, metric_type, unit, help_text, samples):
+            lines.append('# TYPE {} {}'.format(name, metric_type))
+            if unit:
+                lines.append('# UNIT {} {}'.format(name, unit))
+            lines.append('# HELP {} {}'.format(name, help_text))
+            suffix = '_total' if metric_type == 'counter' else ''
+            for labels, value in samples:
+                lines.append('{}{}{} {!r}'.format(name, suffix, labels, value))
+
+        def stage_samples(values):
+            return [('{{stage="{}"}}'.format(stage), values[stage]) for stage in sorted(values)]
+
+        if self._times:
+            add_family(self._metric_name('stage_seconds'), 'counter', 'seconds',
+                       'Cumulative time per processing stage.', stage_samples(self._times))
+            add_family(self._metric_name('stage_calls'), 'counter', '',
+                       'Number of timed calls per processing stage.', stage_samples(self._calls))
+        for name in sorted(self._counters):
+            add_family(self._metric_name(name), 'counter', '',
+                       'Number of {}.'.format(name.replace('_', ' ')), [('', self._counters[name])])
+        hit_rates = self.hit_rates
+        if hit_rates:
+            add_family(self._metric_name('cache_hit_ratio'), 'gauge', '',
+                       'Hit rate of the caches.',
+                       [('{{cache="{}"}}'.format(cache), hit_rates[cache]) for cache in sorted(hit_rates)])
+        lines.append('# EOF')
+
+        return '\n'.join(lines) + '\n'
+
+    ##############################################
+
+    def dump(self, path, format=None):
+
+        """Write the statistics to a file as JSON or OpenMetrics text. The format is ``'json'`` or
+        ``'openmetrics'``, by default it is JSON if the file suffix is ``.json``. The file is
+        replaced atomically, so it can be read at any time by a monitoring agent, and its mode is
+        :attr:`FILE_MODE`.
+
+        """
+
+        path = Path(path)
+        if format is None:
+            format = 'json' if path.suffix == '.json' else 'openmetrics'
+        if format == 'json':
+            text = self.to_json() + '\n'
+        elif format == 'openmetrics':
+            text = self.to_openmetrics()
+        else:
+            raise ValueError('Unknown format {}'.format(format))
+
+        fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as fh:
+                fh.write(text)
+            os.chmod(tmp_path, self.FILE_MODE)
+            os.replace(tmp_path, str(path))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
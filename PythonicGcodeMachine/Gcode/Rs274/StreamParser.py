@@ -0,0 +1,248 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to parse a G-code stream with :mod:`asyncio`.
+
+Usage::
+
+   stream_parser = GcodeStreamParser(machine.parser, batch_size=256)
+
+   reader, writer = await asyncio.open_connection(host, port)
+   async for line in stream_parser.parse(reader):
+       ...
+
+   diagnostics = []
+   async for line in stream_parser.parse(async_byte_iterator, diagnostics):
+       ...
+
+The source is an :class:`asyncio.StreamReader`, or any object having a ``read(size)`` coroutine, or
+an asynchronous iterator of :class:`bytes` or :class:`str` chunks. The lines are yielded as soon as
+they are complete and parsed, before the end of the stream.
+
+**Implementation**
+
+The complete lines of the chunks read from the source are grouped in batches of at most
+*batch_size* lines, a batch isn't delayed to wait for more lines. A batch is parsed by
+:meth:`.Parser.GcodeParser.parse_lines` in *executor*, by default the executor of the event loop,
+using a parser of a :class:`.ParserPool.ParserPool`, so the event loop isn't blocked and the
+batches can be parsed concurrently. The lines are yielded in order.
+
+The parsed batches are yielded as soon as they are ready, without waiting for the next chunk of
+the source, so an interactive source which waits for the consumer doesn't deadlock. At most
+*max_pending_batches* batches are read ahead of the consumer. Then the source isn't read until the
+consumer requests the next lines, so the buffer of the stream fills up and the flow control of the
+transport throttles the sender.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'GcodeStreamParser',
+]
+
+####################################################################################################
+
+from collections import deque
+import asyncio
+import codecs
+import re
+
+from .ParserPool import ParserPool
+
+####################################################################################################
+
+class GcodeStreamParser:
+
+    """Class to parse a G-code stream, using a clone of *parser* per thread of the executor.
+
+    If *collect_stats* is set, the statistics of the parsers are available from :attr:`stats`.
+
+    """
+
+    # same as GcodeTokenMixin.t_END_OF_BLOCK
+    LINE_END_RE = re.compile(r'\r?\n|\r')
+
+    ##############################################
+
+    def __init__(self,
+                 parser=None,
+                 batch_size=256,
+                 max_pending_batches=4,
+                 executor=None,
+                 chunk_size=2**16,
+                 encoding='utf-8',
+                 collect_stats=False,
+    ):
+
+        if batch_size < 1:
+            raise ValueError('Invalid batch size {}'.format(batch_size))
+        if max_pending_batches < 1:
+            raise ValueError('Invalid number of pending batches {}'.format(max_pending_batches))
+
+        self._pool = ParserPool(parser, collect_stats=collect_stats)
+        self._batch_size = int(batch_size)
+        self._max_pending_batches = int(max_pending_batches)
+        self._executor = executor
+        self._chunk_size = int(chunk_size)
+        self._encoding = encoding
+
+    ##############################################
+
+    @property
+    def batch_size(self):
+        return self._batch_size
+
+    @property
+    def max_pending_batches(self):
+        return self._max_pending_batches
+
+    @property
+    def stats(self):
+        return self._pool.stats
+
+    ##############################################
+
+    async def _iter_chunks(self, source):
+
+        """Yield the chunks of the source"""
+
+        read = getattr(source, 'read', None)
+        if read is not None:
+            while True:
+                chunk = await read(self._chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        else:
+            async for chunk in source:
+                yield chunk
+
+    ##############################################
+
+    async def _iter_batches(self, source):
+
+        """Yield the complete lines of the source by batches"""
+
+        decoder = codecs.getincrementaldecoder(self._encoding)()
+        batch_size = self._batch_size
+        line_end_re = self.LINE_END_RE
+        text = ''
+        async for chunk in self._iter_chunks(source):
+            if not isinstance(chunk, str):
+                chunk = decoder.decode(chunk)
+            text += chunk
+            # a trailing CR could be followed by a LF
+            end = len(text) - 1 if text.endswith('\r') else len(text)
+            last_match = None
+            for last_match in line_end_re.finditer(text, 0, end):
+                pass
+            if last_match is None:
+                continue
+            lines = line_end_re.split(text[:last_match.start()])
+            text = text[last_match.end():]
+            for i in range(0, len(lines), batch_size):
+                yield lines[i:i+batch_size]
+
+        text += decoder.decode(b'', final=True)
+        if text:
+            lines = line_end_re.split(text)
+            if not lines[-1]:
+                # the last line is terminated
+                del lines[-1]
+            for i in range(0, len(lines), batch_size):
+                yield lines[i:i+batch_size]
+
+    ##############################################
+
+    def _parse_batch(self, lines, diagnostics):
+
+        """Parse a batch of lines in a thread of the executor"""
+
+        parser = self._pool.get()
+        program = parser.parse_lines(lines, diagnostics)
+        return list(program)
+
+    ##############################################
+
+    async def parse(self, source, diagnostics=None):
+
+        """Yield the :class:`.Ast.Line` of a G-code stream.
+
+        If *diagnostics* is a list, the errors are appended to it as :class:`.Parser.Diagnostic`,
+        where the line index is relative to the start of the stream, and the lines which have an
+        error are skipped, else the first error is raised.
+
+        """
+
+        loop = asyncio.get_running_loop()
+        batches = self._iter_batches(source)
+        # batches which are parsed, with the index of their first line and their diagnostics
+        pending = deque()
+        # task which reads the next batch
+        read_task = None
+        line_index = 0
+        is_exhausted = False
+
+        try:
+            while True:
+                if read_task is None and not is_exhausted and len(pending) < self._max_pending_batches:
+                    read_task = asyncio.ensure_future(batches.__anext__())
+
+                if pending and pending[0][0].done():
+                    future, first_line_index, batch_diagnostics = pending.popleft()
+                    lines = future.result()
+                    if batch_diagnostics:
+                        diagnostics.extend(diagnostic._replace(line=diagnostic.line + first_line_index)
+                                           for diagnostic in batch_diagnostics)
+                    for line in lines:
+                        yield line
+                    continue
+
+                # wait for the next batch or for the first parsed batch, whichever comes first, so
+                # the parsed lines are not delayed by a source which waits for the consumer
+                waited = [future for future in (read_task, pending[0][0] if pending else None)
+                          if future is not None]
+                if not waited:
+                    break
+                await asyncio.wait(waited, return_when=asyncio.FIRST_COMPLETED)
+
+                if read_task is not None and read_task.done():
+                    try:
+                        lines = read_task.result()
+                    except StopAsyncIteration:
+                        is_exhausted = True
+                    else:
+                        batch_diagnostics = [] if diagnostics is not None else None
+                        future = loop.run_in_executor(
+                            self._executor, self._parse_batch, lines, batch_diagnostics)
+                        pending.append((future, line_index, batch_diagnostics))
+                        line_index += len(lines)
+                    read_task = None
+        finally:
+            for future, _, _ in pending:
+                future.cancel()
+            if read_task is not None:
+                read_task.cancel()
+                try:
+                    await read_task
+                except (asyncio.CancelledError, StopAsyncIteration):
+                    pass
+            await batches.aclose()
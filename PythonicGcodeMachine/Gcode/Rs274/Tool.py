@@ -43,10 +43,10 @@ class Tool:
 
     def __init__(self, tool_id, offset, diameter=None, comment=None):
 
-        self._id = tool_id
-        self._tool_offset = offset
-        self._tool_diameter = diameter
-        self._comment = comment
+        self.id = tool_id
+        self.offset = offset
+        self.diameter = diameter
+        self.comment = comment
 
         self._tool_set = None
         self._pocket = None
@@ -59,9 +59,9 @@ class Tool:
     def id(self):
         return self._id
 
-    @tool_id.setter
+    @id.setter
     def id(self, value):
-        self._id = str(value)
+        self._id = int(value)
 
     @property
     def offset(self):
@@ -77,7 +77,16 @@ class Tool:
 
     @diameter.setter
     def diameter(self, value):
-        self._diameter = float(value)
+        if value is not None:
+            value = float(value)
+        self._diameter = value
+
+    @property
+    def radius(self):
+        if self._diameter is not None:
+            return self._diameter / 2
+        else:
+            return None
 
     @property
     def comment(self):
@@ -85,7 +94,9 @@ class Tool:
 
     @comment.setter
     def comment(self, value):
-        self._comment = str(value)
+        if value is not None:
+            value = str(value)
+        self._comment = value
 
     ##############################################
 
@@ -103,7 +114,9 @@ class Tool:
 
     @pocket.setter
     def pocket(self, value):
-        self._pocket = int(value)
+        if value is not None:
+            value = int(value)
+        self._pocket = value
 
     ##############################################
 
@@ -123,7 +136,8 @@ class Tool:
 
     def _to_dict(self, d, keys):
         for key in keys:
-            d[key] = geattr(self, key)
+            d[key] = getattr(self, key)
+        return d
 
     ##############################################
 
@@ -131,8 +145,8 @@ class Tool:
 
         keys = (
             'id',
-            'tool_offset',
-            'tool_diameter',
+            'offset',
+            'diameter',
             'comment',
             'pocket',
         )
@@ -221,12 +235,18 @@ class ToolSet:
 
     ##############################################
 
+    def __contains__(self, pocket):
+        return pocket in self._tools
+
+    ##############################################
+
     def remove_tool(self, pocket):
         if isinstance(pocket, Tool):
             pocket = pocket.pocket
-        tool = self._tools.pop(pocket)
-        tool.tool_set = None
-        tool.pocket = None
+        tool = self._tools.pop(pocket, None)
+        if tool is not None:
+            tool.tool_set = None
+            tool.pocket = None
         return tool
 
     ##############################################
@@ -243,14 +263,15 @@ class ToolSet:
     def load_yaml(self, path):
 
         with (open(path, 'r')) as fh:
-            yaml_data = yaml.load(fh.read())
+            yaml_data = yaml.safe_load(fh.read())
 
         for pocket, d in yaml_data.items():
             if 'front_angle' in d:
                 cls = LatheTool
             else:
                 cls = Tool
-            tool = cls(*d)
+            d = dict(d)
+            tool = cls(d.pop('id'), **d)
             self.add_tool(tool, pocket)
 
     ##############################################
@@ -0,0 +1,791 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to implement a columnar representation of the tool motions of a G-code program.
+
+Usage::
+
+   toolpath = Toolpath(program)
+
+   toolpath.start # (n, 6) array of start positions
+   toolpath.end # (n, 6) array of end positions
+   toolpath.motion # motion mode code
+   toolpath.lengths
+
+A program is interpreted once and each line is mapped to a row of NumPy arrays, so analyses can be
+done in batch on the whole toolpath. A line which doesn't move the tool has a :attr:`NO_MOTION` code
+and the same start and end position.
+
+Positions are normalised to absolute machine coordinates, lengths are expressed in millimetres and
+rotary axes in degrees.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'evaluate',
+    'Toolpath',
+]
+
+####################################################################################################
+
+import numpy as np
+
+from . import Ast
+
+####################################################################################################
+
+def evaluate(value, parameters):
+
+    """Evaluate a real value using the given parameter table.
+
+    *value* can be a number or an AST expression. Unknown parameters evaluate to zero.
+    """
+
+    if isinstance(value, (int, float)):
+        return float(value)
+    elif isinstance(value, Ast.Parameter):
+        return float(parameters.get(value.parameter, 0))
+    elif isinstance(value, Ast.UnaryOperation):
+        return float(value.__function__(evaluate(value.arg, parameters)))
+    elif isinstance(value, Ast.BinaryOperation):
+        arg1 = evaluate(value.arg1, parameters)
+        arg2 = evaluate(value.arg2, parameters)
+        return float(value.__function__(arg1, arg2))
+    else:
+        return float(value)
+
+####################################################################################################
+
+def last_index(mask):
+
+    """Return for each row the index of the last row, up to this one, where *mask* is true, -1 if
+    there is none.
+
+    """
+
+    index = np.where(mask, np.arange(mask.shape[0]), -1)
+    return np.maximum.accumulate(index)
+
+####################################################################################################
+
+class Toolpath:
+
+    """Class to implement a columnar representation of the tool motions of a program.
+
+    Each array has one row per line of the program:
+
+    * :attr:`start`, :attr:`end`: machine position before and after the line,
+    * :attr:`motion`: motion mode, see :attr:`NO_MOTION` etc.,
+    * :attr:`centre`: arc centre, NaN for a straight motion,
+    * :attr:`axis_words`: value of the axis words as written in the program, NaN if unset,
+    * :attr:`offset`: offset from the program to the machine coordinates, i.e. the work offset
+      plus the G92 axis offset,
+    * :attr:`units`: 20 for inch or 21 for millimetre,
+    * :attr:`distance_mode`: 90 for absolute or 91 for incremental,
+    * :attr:`coordinate_system`: 1 to 9 for G54 to G59.3,
+    * :attr:`plane`: selected plane, 17, 18 or 19,
+    * :attr:`feed`: feed rate in mm/min,
+    * :attr:`feed_rate_mode`: 93 for inverse time or 94 for units per minute,
+    * :attr:`cutter_compensation`: 40, 41 or 42,
+    * :attr:`compensation_number`: D word value, NaN if unset,
+    * :attr:`tool`: tool loaded in the spindle, 0 if none,
+    * :attr:`path_control`: 61, 61.1 or 64,
+    * :attr:`dwell`: dwell time in seconds,
+    * :attr:`canned_cycle`: True if the line executes a canned cycle (G81 to G89).
+
+    Axis values are evaluated using the parameter table, which is initialised from *parameters*, a
+    dictionary, or from the default parameters of the program's machine.
+
+    **Normalisation**
+
+    The program is read once to collect the words in sparse columns, then the positions are
+    normalised in batch to absolute machine coordinates in millimetres:
+
+    * the modal states are propagated from the lines where they are set,
+    * inch values are converted to millimetres,
+    * the work offset of the selected coordinate system (G54 to G59.3, parameters 5221 and
+      following) and the axis offset (G92, parameters 5211 to 5216) are applied to absolute values,
+      G53 values are applied without offset,
+    * incremental values are accumulated using cumulative sums from the last absolute value.
+
+    The computation is split at each G92 which depends on the current position.
+
+    Current limitations: canned cycles are not interpreted, their lines are only flagged by
+    :attr:`canned_cycle`, and the intermediate point of G28 and G30 is ignored.
+
+    """
+
+    AXES = 'XYZABC'
+    LINEAR_AXES = 'XYZ'
+    NUMBER_OF_AXES = len(AXES)
+    NUMBER_OF_LINEAR_AXES = len(LINEAR_AXES)
+
+    NO_MOTION = -1
+    CANNED_CYCLE = -2
+    RAPID = 0
+    LINEAR = 1
+    CW_ARC = 2
+    CCW_ARC = 3
+
+    # First plane axis, second plane axis, normal axis
+    #   for which an arc is clockwise when viewed from the positive normal axis
+    PLANE_AXES = {
+        17: (0, 1, 2),
+        18: (2, 0, 1),
+        19: (1, 2, 0),
+    }
+    ARC_OFFSET_LETTERS = 'IJK'
+
+    MM_PER_INCH = 25.4
+
+    # Home positions: parameters 5161-5166 for G28 and 5181-5186 for G30
+    HOME_PARAMETERS = {
+        'G28': 5161,
+        'G30': 5181,
+    }
+    AXIS_OFFSET_PARAMETER = 5211
+    COORDINATE_SYSTEM_PARAMETER = 5220
+    # coordinate system n starts at 5201 + 20*n
+    WORK_OFFSET_PARAMETER = 5201
+    WORK_OFFSET_STRIDE = 20
+
+    __columns__ = (
+        'start',
+        'end',
+        'motion',
+        'centre',
+        'axis_words',
+        'offset',
+        'units',
+        'distance_mode',
+        'coordinate_system',
+        'plane',
+        'feed',
+        'feed_rate_mode',
+        'cutter_compensation',
+        'compensation_number',
+        'tool',
+        'path_control',
+        'dwell',
+        'canned_cycle',
+    )
+
+    # Modal G-codes: column, value
+    __modal_gcodes__ = {
+        'G0': ('motion', RAPID),
+        'G1': ('motion', LINEAR),
+        'G2': ('motion', CW_ARC),
+        'G3': ('motion', CCW_ARC),
+        'G38.2': ('motion', LINEAR),
+        'G80': ('motion', NO_MOTION),
+        'G17': ('plane', 17),
+        'G18': ('plane', 18),
+        'G19': ('plane', 19),
+        'G20': ('units', 20),
+        'G21': ('units', 21),
+        'G40': ('cutter_compensation', 40),
+        'G41': ('cutter_compensation', 41),
+        'G42': ('cutter_compensation', 42),
+        'G54': ('coordinate_system', 1),
+        'G55': ('coordinate_system', 2),
+        'G56': ('coordinate_system', 3),
+        'G57': ('coordinate_system', 4),
+        'G58': ('coordinate_system', 5),
+        'G59': ('coordinate_system', 6),
+        'G59.1': ('coordinate_system', 7),
+        'G59.2': ('coordinate_system', 8),
+        'G59.3': ('coordinate_system', 9),
+        'G61': ('path_control', 61),
+        'G61.1': ('path_control', 61.1),
+        'G64': ('path_control', 64),
+        'G90': ('distance_mode', 90),
+        'G91': ('distance_mode', 91),
+        'G93': ('feed_rate_mode', 93),
+        'G94': ('feed_rate_mode', 94),
+    }
+    # canned cycles are not interpreted
+    for _code in range(81, 90):
+        __modal_gcodes__['G{}'.format(_code)] = ('motion', CANNED_CYCLE)
+
+    # Initial modal states
+    __initial_modal_states__ = {
+        'motion': RAPID,
+        'plane': 17,
+        'units': 21,
+        'cutter_compensation': 40,
+        'coordinate_system': 1,
+        'path_control': 64,
+        'distance_mode': 90,
+        'feed_rate_mode': 94,
+    }
+
+    __modal_dtypes__ = {
+        'motion': np.int8,
+        'plane': np.int8,
+        'units': np.int8,
+        'cutter_compensation': np.int8,
+        'coordinate_system': np.int8,
+        'path_control': np.float64,
+        'distance_mode': np.int8,
+        'feed_rate_mode': np.int8,
+    }
+
+    # Non-modal codes which are recorded
+    __non_modal_codes__ = (
+        'G4',
+        'G10',
+        'G28',
+        'G30',
+        'G53',
+        'G92',
+        'G92.1',
+        'G92.2',
+        'G92.3',
+        'M6',
+    )
+
+    # G-codes which use the axis words for another purpose than a motion
+    __axis_consumer_gcodes__ = ('G10', 'G28', 'G30', 'G92')
+
+    ##############################################
+
+    def __init__(self, program, parameters=None):
+
+        self._program = program
+
+        if parameters is None:
+            parameters = self._default_parameters(program)
+        self._parameters = dict(parameters)
+
+        self._read_program()
+        self._normalise()
+
+    ##############################################
+
+    def clone(self):
+
+        toolpath = self.__class__.__new__(self.__class__)
+        toolpath._program = self._program
+        toolpath._parameters = dict(self._parameters)
+        for name in self.__columns__:
+            setattr(toolpath, name, getattr(self, name).copy())
+
+        return toolpath
+
+    ##############################################
+
+    @staticmethod
+    def _default_parameters(program):
+        machine = program.machine
+        if machine is not None:
+            return {parameter.index: parameter.default_value
+                    for parameter in machine.config.parameters}
+        else:
+            return {}
+
+    ##############################################
+
+    @property
+    def program(self):
+        return self._program
+
+    @property
+    def parameters(self):
+        """Parameter table at the end of the program"""
+        return self._parameters
+
+    def __len__(self):
+        return self.motion.shape[0]
+
+    ##############################################
+
+    def _work_offset(self, coordinate_system):
+        parameters = self._parameters
+        index = self.WORK_OFFSET_PARAMETER + self.WORK_OFFSET_STRIDE * coordinate_system
+        return [parameters.get(index + i, 0.) for i in range(self.NUMBER_OF_AXES)]
+
+    ##############################################
+
+    def _read_program(self):
+
+        """Read the words of the program in sparse columns.
+
+        Parameters are evaluated line by line, the work offsets are recorded when a coordinate
+        system is selected or modified by G10 L2.
+        """
+
+        parameters = self._parameters
+        modal_gcodes = self.__modal_gcodes__
+        non_modal_codes = self.__non_modal_codes__
+
+        words = {}       # letter -> (line indexes, values)
+        modal_states = {}  # column -> (line indexes, values)
+        non_modal = {code: [] for code in non_modal_codes}
+        # Work offsets are recorded in millimetres
+        coordinate_system = int(parameters.get(self.COORDINATE_SYSTEM_PARAMETER, 1))
+        work_offsets = ([-1], [self._work_offset(coordinate_system)])
+        scale = 1.
+
+        for i, line in enumerate(self._program):
+            if not line:
+                continue
+            settings = None
+            line_words = None
+            for item in line:
+                if isinstance(item, Ast.Word):
+                    letter = item.letter
+                    value = item.value
+                    if not isinstance(value, (int, float)):
+                        value = evaluate(value, parameters)
+                    if letter in 'GM':
+                        if isinstance(value, float) and value.is_integer():
+                            value = int(value)
+                        code = '{}{}'.format(letter, value)
+                        modal_gcode = modal_gcodes.get(code)
+                        if modal_gcode is not None:
+                            column, state = modal_gcode
+                            indexes, values = modal_states.setdefault(column, ([], []))
+                            indexes.append(i)
+                            values.append(state)
+                            if column == 'units':
+                                scale = self.MM_PER_INCH if state == 20 else 1.
+                            elif column == 'coordinate_system':
+                                coordinate_system = state
+                                work_offsets[0].append(i)
+                                work_offsets[1].append(self._work_offset(state))
+                        elif code in non_modal_codes:
+                            non_modal[code].append(i)
+                            if code == 'G10':
+                                line_words = line
+                    else:
+                        indexes, values = words.setdefault(letter, ([], []))
+                        indexes.append(i)
+                        values.append(value)
+                elif isinstance(item, Ast.ParameterSetting):
+                    if settings is None:
+                        settings = []
+                    settings.append((item.parameter, evaluate(item.value, parameters)))
+            if line_words is not None:
+                if self._set_coordinate_system_data(line_words, scale, coordinate_system):
+                    work_offsets[0].append(i)
+                    work_offsets[1].append(self._work_offset(coordinate_system))
+            if settings is not None:
+                # parameters are set after the line is read
+                parameters.update(settings)
+
+        self._number_of_lines = len(self._program)
+        self._words = words
+        self._modal_states = modal_states
+        self._non_modal = non_modal
+        self._work_offsets = work_offsets
+
+    ##############################################
+
+    def _set_coordinate_system_data(self, line, scale, coordinate_system):
+
+        """Apply G10 L2 to the parameter table, return True if the current coordinate system is
+        modified.
+
+        """
+
+        values = {}
+        for word in line.iter_on_word():
+            if word.letter not in 'GM':
+                values[word.letter] = evaluate(word.value, self._parameters)
+        if values.get('L') != 2:
+            return False
+
+        number = int(values.get('P', 0)) or coordinate_system
+        index = self.WORK_OFFSET_PARAMETER + self.WORK_OFFSET_STRIDE * number
+        for i, letter in enumerate(self.AXES):
+            if letter in values:
+                value = values[letter]
+                if i < self.NUMBER_OF_LINEAR_AXES:
+                    value *= scale
+                self._parameters[index + i] = value
+
+        return number == coordinate_system
+
+    ##############################################
+
+    def _word_column(self, letter):
+        """Return a dense column for a letter, NaN if the word is not set on the line"""
+        column = np.full(self._number_of_lines, np.nan)
+        if letter in self._words:
+            indexes, values = self._words[letter]
+            column[indexes] = values
+        return column
+
+    ##############################################
+
+    def _modal_column(self, name):
+        """Return a dense column for a modal state, NaN if the state is not set on the line"""
+        column = np.full(self._number_of_lines, np.nan)
+        if name in self._modal_states:
+            indexes, values = self._modal_states[name]
+            column[indexes] = values
+        return column
+
+    ##############################################
+
+    def _flag_column(self, code):
+        column = np.zeros(self._number_of_lines, dtype=bool)
+        column[self._non_modal[code]] = True
+        return column
+
+    ##############################################
+
+    @staticmethod
+    def _fill_forward(column, initial):
+        """Propagate the set values of a column, NaN values are unset"""
+        is_set = ~np.isnan(column)
+        index = last_index(is_set)
+        return np.where(index >= 0, column[np.maximum(index, 0)], initial)
+
+    ##############################################
+
+    def _normalise(self):
+
+        number_of_lines = self._number_of_lines
+        number_of_axes = self.NUMBER_OF_AXES
+        n = self.NUMBER_OF_LINEAR_AXES
+
+        # Modal states
+        for name, initial in self.__initial_modal_states__.items():
+            column = self._fill_forward(self._modal_column(name), initial)
+            setattr(self, name, column.astype(self.__modal_dtypes__[name]))
+        motion_mode = self.motion
+
+        scale = np.where(self.units == 20, self.MM_PER_INCH, 1.)
+
+        self.feed = self._fill_forward(self._word_column('F') * scale, 0.)
+        self.compensation_number = self._fill_forward(self._word_column('D'), np.nan)
+        selected_tool = self._fill_forward(self._word_column('T'), 0)
+        tool_change = np.where(self._flag_column('M6'), selected_tool, np.nan)
+        self.tool = self._fill_forward(tool_change, 0).astype(np.int32)
+        self.dwell = np.where(self._flag_column('G4'), np.nan_to_num(self._word_column('P')), 0.)
+
+        # Axis words
+        self.axis_words = np.column_stack([self._word_column(letter) for letter in self.AXES])
+        axis_scale = np.ones((number_of_lines, number_of_axes))
+        axis_scale[:,:n] = scale[:,np.newaxis]
+        has_axis_word = np.any(~np.isnan(self.axis_words), axis=1)
+
+        consumer = np.zeros(number_of_lines, dtype=bool)
+        for code in self.__axis_consumer_gcodes__:
+            consumer |= self._flag_column(code)
+        is_home = self._flag_column('G28') | self._flag_column('G30')
+        is_move = has_axis_word & ~consumer & (motion_mode >= 0)
+        self.canned_cycle = has_axis_word & ~consumer & (motion_mode == self.CANNED_CYCLE)
+        self.motion = np.where(is_move, motion_mode, self.NO_MOTION).astype(np.int8)
+        self.motion[is_home] = self.RAPID
+
+        # Work offsets
+        offset_lines, offset_values = self._work_offsets
+        work_offset_index = np.searchsorted(offset_lines, np.arange(number_of_lines), side='right') - 1
+        work_offset = np.array(offset_values, dtype=np.float64)[work_offset_index]
+
+        # Reset values and increments
+        is_machine = self._flag_column('G53')
+        is_absolute = (self.distance_mode == 90) | is_machine
+        values = self.axis_words * axis_scale
+        is_set = ~np.isnan(values) & is_move[:,np.newaxis]
+        is_reset = is_set & is_absolute[:,np.newaxis]
+        increment = np.where(is_set & ~is_absolute[:,np.newaxis], values, 0)
+        # the home positions are machine positions
+        is_machine_position = is_machine | is_home
+        reset_value = np.where(is_machine_position[:,np.newaxis], 0, work_offset) + values
+
+        home_position = np.zeros((number_of_lines, number_of_axes))
+        for code, index in self.HOME_PARAMETERS.items():
+            home = [self._parameters.get(index + i, 0.) for i in range(number_of_axes)]
+            home_position[self._flag_column(code)] = home
+        is_reset[is_home] = True
+        reset_value[is_home] = home_position[is_home]
+        increment[is_home] = 0
+
+        self._accumulate(is_reset, reset_value, increment, values, work_offset, is_machine_position)
+
+        self._compute_arc_centres(scale)
+
+    ##############################################
+
+    def _accumulate(self, is_reset, reset_value, increment, values, work_offset, is_machine):
+
+        """Compute the positions by chunks split at the axis offset lines, the axis offset is not
+        applied to the machine positions flagged by *is_machine*, i.e. G53, G28 and G30.
+
+        """
+
+        number_of_lines = self._number_of_lines
+        number_of_axes = self.NUMBER_OF_AXES
+        parameters = self._parameters
+
+        events = {}
+        for code in ('G92', 'G92.1', 'G92.2', 'G92.3'):
+            for i in self._non_modal[code]:
+                events[i] = code
+        event_lines = sorted(events)
+
+        end = np.zeros((number_of_lines, number_of_axes))
+        axis_offset = np.zeros((number_of_lines, number_of_axes))
+        saved_offset = np.array([
+            parameters.get(self.AXIS_OFFSET_PARAMETER + i, 0.) for i in range(number_of_axes)])
+        current_offset = np.zeros(number_of_axes)
+        position = np.zeros(number_of_axes)
+
+        chunk_start = 0
+        for chunk_stop in event_lines + [number_of_lines]:
+            chunk = slice(chunk_start, chunk_stop)
+            if chunk_stop > chunk_start:
+                offset = np.where(is_machine[chunk,np.newaxis], 0, current_offset)
+                end[chunk] = self._accumulate_chunk(
+                    position, is_reset[chunk], reset_value[chunk] + offset, increment[chunk])
+                axis_offset[chunk] = current_offset
+                position = end[chunk_stop - 1]
+            if chunk_stop < number_of_lines:
+                # the axis offset line doesn't move
+                end[chunk_stop] = position
+                code = events[chunk_stop]
+                if code == 'G92':
+                    is_set = ~np.isnan(values[chunk_stop])
+                    new_offset = position - work_offset[chunk_stop] - values[chunk_stop]
+                    current_offset = np.where(is_set, new_offset, current_offset)
+                    saved_offset = current_offset.copy()
+                elif code == 'G92.1':
+                    current_offset = np.zeros(number_of_axes)
+                    saved_offset = current_offset.copy()
+                elif code == 'G92.2':
+                    current_offset = np.zeros(number_of_axes)
+                else:
+                    current_offset = saved_offset.copy()
+                axis_offset[chunk_stop] = current_offset
+                chunk_start = chunk_stop + 1
+        for i in range(number_of_axes):
+            parameters[self.AXIS_OFFSET_PARAMETER + i] = saved_offset[i]
+
+        self.end = end
+        self.start = np.empty_like(end)
+        self.start[1:] = end[:-1]
+        self.start[:1] = 0
+        self.offset = work_offset + axis_offset
+
+    ##############################################
+
+    @staticmethod
+    def _accumulate_chunk(position, is_reset, reset_value, increment):
+
+        """Compute the positions from the absolute values and the increments.
+
+        The position at line *i* is the last absolute value at line *k* plus the sum of the
+        increments from *k* to *i*: ``p[i] = r[k] - C[k] + C[i]`` where *C* is the cumulative sum of
+        the increments.
+        """
+
+        cumulative_increment = np.cumsum(increment, axis=0)
+        base = np.where(is_reset, reset_value - cumulative_increment, np.nan)
+        end = np.empty_like(base)
+        for axis in range(base.shape[1]):
+            end[:,axis] = Toolpath._fill_forward(base[:,axis], position[axis])
+        end += cumulative_increment
+        return end
+
+    ##############################################
+
+    def _compute_arc_centres(self, scale):
+
+        number_of_lines = self._number_of_lines
+        n = self.NUMBER_OF_LINEAR_AXES
+        self.centre = np.full((number_of_lines, n), np.nan)
+        arcs = np.flatnonzero(self.is_arc)
+        if not arcs.shape[0]:
+            return
+
+        axes = self.plane_axes(arcs)
+        start = self.to_plane(self.start[arcs,:n], arcs)
+        end = self.to_plane(self.end[arcs,:n], arcs)
+        arc_scale = scale[arcs]
+        offsets = np.column_stack([
+            np.nan_to_num(self._word_column(letter)[arcs]) for letter in self.ARC_OFFSET_LETTERS])
+        offsets = np.take_along_axis(offsets, axes, axis=1)
+        radius = self._word_column('R')[arcs] * arc_scale
+
+        # I J K are always incremental from the start point
+        centre = start + offsets * arc_scale[:,np.newaxis]
+
+        # the centre is on the chord bisector, the sign of R selects the short or the long arc
+        use_radius = ~np.isnan(radius)
+        du = end[:,0] - start[:,0]
+        dv = end[:,1] - start[:,1]
+        chord = np.hypot(du, dv)
+        if np.any(use_radius & (chord == 0)):
+            index = arcs[np.flatnonzero(use_radius & (chord == 0))[0]]
+            raise ValueError('Line {}: arc with R word must have distinct start and end points'.format(index))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            height = np.sqrt(np.maximum(radius**2 - (chord/2)**2, 0))
+            side = np.where((self.motion[arcs] == self.CCW_ARC) == (radius > 0), 1, -1)
+            centre_u = start[:,0] + du/2 - side * height * dv / chord
+            centre_v = start[:,1] + dv/2 + side * height * du / chord
+        centre[use_radius,0] = centre_u[use_radius]
+        centre[use_radius,1] = centre_v[use_radius]
+        centre[:,2] = np.nan
+
+        self.centre[arcs] = self.from_plane(centre, arcs)
+
+    ##############################################
+
+    def program_position(self, position=None):
+
+        """Return positions in program coordinates and units, the end positions by default"""
+
+        if position is None:
+            position = self.end
+        scale = np.ones_like(position)
+        scale[:,:self.NUMBER_OF_LINEAR_AXES] = np.where(self.units == 20, self.MM_PER_INCH, 1.)[:,np.newaxis]
+        return (position - self.offset) / scale
+
+    ##############################################
+
+    @property
+    def is_motion(self):
+        return self.motion != self.NO_MOTION
+
+    @property
+    def is_arc(self):
+        return (self.motion == self.CW_ARC) | (self.motion == self.CCW_ARC)
+
+    ##############################################
+
+    def plane_axes(self, indexes=None):
+        """Return a (n, 3) array of axis indexes: first plane axis, second plane axis, normal axis"""
+        axes = np.zeros((len(self), 3), dtype=np.intp)
+        for plane, plane_axes in self.PLANE_AXES.items():
+            axes[self.plane == plane] = plane_axes
+        if indexes is not None:
+            axes = axes[indexes]
+        return axes
+
+    ##############################################
+
+    def to_plane(self, xyz, indexes=None):
+        """Return a (n, 3) array of (u, v, w) coordinates in the plane of each line
+
+        *indexes* selects the lines corresponding to the rows of *xyz*.
+        """
+        return np.take_along_axis(xyz, self.plane_axes(indexes), axis=1)
+
+    ##############################################
+
+    def from_plane(self, uvw, indexes=None):
+        """Inverse of :meth:`to_plane`"""
+        xyz = np.empty_like(uvw)
+        np.put_along_axis(xyz, self.plane_axes(indexes), uvw, axis=1)
+        return xyz
+
+    ##############################################
+
+    def arc_geometry(self):
+
+        """Return the arc geometry in the plane coordinates.
+
+        Return a tuple (radius, start angle, sweep) of arrays, sweep is positive counterclockwise and
+        a full circle if the start and end points are identical. Values are NaN for a straight
+        motion.
+        """
+
+        n = self.NUMBER_OF_LINEAR_AXES
+        start = self.to_plane(self.start[:,:n])
+        end = self.to_plane(self.end[:,:n])
+        centre = self.to_plane(self.centre)
+
+        with np.errstate(invalid='ignore'):
+            radius = np.hypot(start[:,0] - centre[:,0], start[:,1] - centre[:,1])
+            start_angle = np.arctan2(start[:,1] - centre[:,1], start[:,0] - centre[:,0])
+            end_angle = np.arctan2(end[:,1] - centre[:,1], end[:,0] - centre[:,0])
+            sweep = np.mod(end_angle - start_angle, 2*np.pi)
+            full_circle = np.isclose(sweep, 0) | np.isclose(sweep, 2*np.pi)
+            sweep[full_circle] = 2*np.pi
+            is_cw = self.motion == self.CW_ARC
+            sweep[is_cw] -= 2*np.pi
+            sweep[is_cw & full_circle] = -2*np.pi
+
+        is_arc = self.is_arc
+        for array in (radius, start_angle, sweep):
+            array[~is_arc] = np.nan
+
+        return radius, start_angle, sweep
+
+    ##############################################
+
+    @property
+    def lengths(self):
+
+        """Return the path length of each line"""
+
+        n = self.NUMBER_OF_LINEAR_AXES
+        delta = self.end[:,:n] - self.start[:,:n]
+        lengths = np.sqrt(np.sum(delta**2, axis=1))
+
+        is_arc = self.is_arc
+        if np.any(is_arc):
+            radius, start_angle, sweep = self.arc_geometry()
+            normal = self.to_plane(delta)[:,2]
+            lengths[is_arc] = np.hypot(radius * sweep, normal)[is_arc]
+
+        return lengths
+
+    ##############################################
+
+    def tangents(self):
+
+        """Return the unit tangent vectors at the start and at the end of each line.
+
+        Tangents are null for a line without motion or a motion of zero length.
+        """
+
+        n = self.NUMBER_OF_LINEAR_AXES
+        delta = self.end[:,:n] - self.start[:,:n]
+        lengths = self.lengths
+        start_tangent = delta.copy()
+        end_tangent = delta.copy()
+
+        is_arc = self.is_arc
+        if np.any(is_arc):
+            radius, start_angle, sweep = self.arc_geometry()
+            normal = self.to_plane(delta)[:,2]
+            for tangent, angle in ((start_tangent, start_angle), (end_tangent, start_angle + sweep)):
+                # derivative of the helix with respect to the sweep parameter
+                direction = np.sign(sweep)
+                uvw = np.column_stack((
+                    -np.sin(angle) * radius * np.abs(sweep) * direction,
+                    np.cos(angle) * radius * np.abs(sweep) * direction,
+                    normal,
+                ))
+                tangent[is_arc] = self.from_plane(uvw)[is_arc]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            start_tangent /= lengths[:,np.newaxis]
+            end_tangent /= lengths[:,np.newaxis]
+        for tangent in (start_tangent, end_tangent):
+            tangent[~np.isfinite(tangent)] = 0
+
+        return start_tangent, end_tangent
@@ -0,0 +1,468 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to implement geometric transforms of G-code programs.
+
+Usage::
+
+   transform = AffineTransform.rotation(90, centre=(50, 50, 0)) @ AffineTransform.translation(x=10)
+
+   toolpath = Toolpath(program)
+   program_transform = ProgramTransform(toolpath, transform)
+   new_program = program_transform.to_program()
+   text = program_transform.to_text(decimals=3)
+
+The transform is applied to the program coordinates in millimetres, i.e. without the work offsets,
+so a program can be moved on its fixture. The positions of all the lines are transformed at once by
+a single matrix multiplication on the columns of the :class:`Toolpath`, then the axis words are
+computed according to the distance mode of each line:
+
+* an absolute line gets the transformed target, an axis word is added when the transform moves
+  an axis which was not written,
+* an incremental line gets the difference to the transformed previous position,
+* I J K arc offsets are transformed as vectors, R is scaled and G2 and G3 are swapped by a mirror,
+  on every line where they are written, so a modal G2 on a line without motion is also swapped.
+
+An arc must stay in its plane and can only be transformed by a similarity in this plane.
+
+Lines which use machine coordinates or set coordinates (G10, G28, G30, G53, G92) are not
+transformed. Expressions in transformed words are replaced by their values. Canned cycles (G81 to
+G89) are not supported since the toolpath doesn't interpret them, a ValueError is raised when a
+line executes one.
+
+Performance: only the computation of the new words is vectorised, it transforms about 3M lines/s.
+The construction of the toolpath (about 350k lines/s) and the output (about 180k lines/s as text,
+70k lines/s as an AST) are per-line Python loops, so a program is transformed end to end at about
+110k lines/s, i.e. 2M lines take about 18 s instead of the one second targeted. See the
+``transform`` benchmark of ``benchmark/benchmark-gcode.py``.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'AffineTransform',
+    'ProgramTransform',
+    'format_number',
+    'items_to_text',
+    'rewrite_items',
+]
+
+####################################################################################################
+
+import numpy as np
+
+from . import Ast
+from .Toolpath import Toolpath, last_index
+
+####################################################################################################
+
+class AffineTransform:
+
+    """Class to implement an affine transform of the XYZ space using a 4x4 homogeneous matrix.
+
+    Transforms are composed using the ``@`` operator, ``a @ b`` applies *b* then *a*.
+
+    """
+
+    AXES = 'XYZ'
+
+    ##############################################
+
+    def __init__(self, matrix=None):
+        if matrix is None:
+            matrix = np.identity(4)
+        matrix = np.array(matrix, dtype=np.float64)
+        if matrix.shape != (4, 4):
+            raise ValueError('Invalid matrix shape {}'.format(matrix.shape))
+        self._matrix = matrix
+
+    ##############################################
+
+    def clone(self):
+        return self.__class__(self._matrix)
+
+    ##############################################
+
+    @classmethod
+    def translation(cls, x=0, y=0, z=0):
+        matrix = np.identity(4)
+        matrix[:3,3] = (x, y, z)
+        return cls(matrix)
+
+    @classmethod
+    def _about(cls, linear, centre):
+        matrix = np.identity(4)
+        matrix[:3,:3] = linear
+        transform = cls(matrix)
+        if centre is not None:
+            centre = np.asarray(centre, dtype=np.float64)
+            transform = cls.translation(*centre) @ transform @ cls.translation(*-centre)
+        return transform
+
+    @classmethod
+    def rotation(cls, angle, axis='Z', centre=None):
+        """Rotation of *angle* in degrees around an axis, counterclockwise when viewed from the
+        positive axis"""
+        i = cls.AXES.index(axis.upper())
+        j, k = (i + 1) % 3, (i + 2) % 3
+        angle = np.radians(angle)
+        linear = np.identity(3)
+        linear[j,j] = linear[k,k] = np.cos(angle)
+        linear[k,j] = np.sin(angle)
+        linear[j,k] = -np.sin(angle)
+        return cls._about(linear, centre)
+
+    @classmethod
+    def scale(cls, x, y=None, z=None, centre=None):
+        if y is None:
+            y = x
+        if z is None:
+            z = x
+        return cls._about(np.diag((x, y, z)), centre)
+
+    @classmethod
+    def mirror(cls, axis, position=0):
+        """Mirror of an axis about the given position"""
+        factors = [1, 1, 1]
+        factors[cls.AXES.index(axis.upper())] = -1
+        centre = [0, 0, 0]
+        centre[cls.AXES.index(axis.upper())] = position
+        return cls.scale(*factors, centre=centre)
+
+    ##############################################
+
+    @property
+    def matrix(self):
+        return self._matrix
+
+    @property
+    def linear(self):
+        return self._matrix[:3,:3]
+
+    @property
+    def translation_vector(self):
+        return self._matrix[:3,3]
+
+    ##############################################
+
+    def __matmul__(self, other):
+        return self.__class__(self._matrix @ other.matrix)
+
+    def inverse(self):
+        return self.__class__(np.linalg.inv(self._matrix))
+
+    ##############################################
+
+    def transform_points(self, points):
+        """Transform a (n, 3) array of points"""
+        return points @ self.linear.T + self.translation_vector
+
+    def transform_vectors(self, vectors):
+        """Transform a (n, 3) array of vectors"""
+        return vectors @ self.linear.T
+
+    ##############################################
+
+    def plane_similarity(self, plane):
+
+        """Return the scale factor and the orientation of the transform in a plane, raise ValueError
+        if an arc in this plane cannot be transformed.
+
+        """
+
+        axis0, axis1, axis2 = Toolpath.PLANE_AXES[plane]
+        linear = self.linear
+        if (np.any(np.abs(linear[axis2,[axis0, axis1]]) > 1e-12) or
+            np.any(np.abs(linear[[axis0, axis1],axis2]) > 1e-12)):
+            raise ValueError('Transform moves arcs out of the plane G{}'.format(plane))
+        block = linear[np.ix_((axis0, axis1), (axis0, axis1))]
+        determinant = np.linalg.det(block)
+        factor = np.sqrt(abs(determinant))
+        if not np.allclose(block.T @ block, factor**2 * np.identity(2)):
+            raise ValueError('Transform is not a similarity in the plane G{}'.format(plane))
+        return factor, determinant < 0
+
+    ##############################################
+
+    def __repr__(self):
+        return 'AffineTransform({})'.format(self._matrix.tolist())
+
+####################################################################################################
+
+class ProgramTransform:
+
+    """Class to apply an affine transform to a program.
+
+    The new word values are available as columns: :attr:`axis_words` for X Y Z, :attr:`arc_words`
+    for I J K, :attr:`radius_words` for R, NaN if the word is not written, and :attr:`swap_arc` flags
+    the lines where a G2 or G3 word must be swapped.
+
+    """
+
+    __axis_letters__ = Toolpath.LINEAR_AXES
+    __arc_letters__ = Toolpath.ARC_OFFSET_LETTERS
+
+    # lines which are not transformed
+    __fixed_gcodes__ = ('G10', 'G28', 'G30', 'G53', 'G92', 'G92.1', 'G92.2', 'G92.3')
+
+    ##############################################
+
+    def __init__(self, toolpath, transform, tolerance=1e-9):
+
+        self._toolpath = toolpath
+        self._transform = transform
+        self._tolerance = float(tolerance)
+        self._compute()
+
+    ##############################################
+
+    @property
+    def toolpath(self):
+        return self._toolpath
+
+    @property
+    def transform(self):
+        return self._transform
+
+    ##############################################
+
+    def _compute(self):
+
+        toolpath = self._toolpath
+        transform = self._transform
+        tolerance = self._tolerance
+        n = Toolpath.NUMBER_OF_LINEAR_AXES
+        number_of_lines = len(toolpath)
+
+        canned_cycles = np.flatnonzero(toolpath.canned_cycle)
+        if canned_cycles.shape[0]:
+            raise ValueError('Canned cycles are not supported, line {}'.format(canned_cycles[0]))
+
+        is_fixed = np.zeros(number_of_lines, dtype=bool)
+        for code in self.__fixed_gcodes__:
+            is_fixed |= toolpath._flag_column(code)
+        is_transformed = toolpath.is_motion & ~is_fixed
+        self._is_transformed = is_transformed
+
+        scale = np.where(toolpath.units == 20, Toolpath.MM_PER_INCH, 1.)[:,np.newaxis]
+        # program coordinates in millimetres
+        position = toolpath.end[:,:n] - toolpath.offset[:,:n]
+        target = transform.transform_points(position)
+
+        # Position of the transformed program, a fixed line is not modified
+        coordinate_system_change = np.zeros(number_of_lines, dtype=bool)
+        coordinate_system_change[1:] = toolpath.coordinate_system[1:] != toolpath.coordinate_system[:-1]
+        is_anchor = toolpath.is_motion | is_fixed | coordinate_system_change
+        new_position = np.where(is_transformed[:,np.newaxis], target, position)
+        anchor = last_index(is_anchor)
+        new_position = np.where((anchor >= 0)[:,np.newaxis], new_position[np.maximum(anchor, 0)], position)
+        previous_position = np.zeros_like(new_position)
+        previous_position[1:] = new_position[:-1]
+
+        is_incremental = (toolpath.distance_mode == 91)[:,np.newaxis]
+        values = np.where(is_incremental, target - previous_position, target) / scale
+        old_words = toolpath.axis_words[:,:n]
+        moved = np.abs(new_position - previous_position) > tolerance
+        is_written = (~np.isnan(old_words) | moved) & is_transformed[:,np.newaxis]
+        self.axis_words = np.where(is_written, values, np.nan)
+
+        self._compute_arcs(is_transformed, previous_position, scale)
+
+    ##############################################
+
+    def _compute_arcs(self, is_transformed, previous_position, scale):
+
+        toolpath = self._toolpath
+        transform = self._transform
+        number_of_lines = len(toolpath)
+
+        self.arc_words = np.full((number_of_lines, 3), np.nan)
+        self.radius_words = np.full(number_of_lines, np.nan)
+        self.swap_arc = np.zeros(number_of_lines, dtype=bool)
+
+        arcs = np.flatnonzero(toolpath.is_arc & is_transformed)
+        if not arcs.shape[0]:
+            return
+
+        # the lines which set the motion mode to an arc, with or without motion
+        motion_mode = toolpath._modal_column('motion')
+        has_arc_word = (motion_mode == Toolpath.CW_ARC) | (motion_mode == Toolpath.CCW_ARC)
+        factors = np.ones(number_of_lines)
+        for plane in np.unique(toolpath.plane[arcs]):
+            factor, is_mirror = transform.plane_similarity(int(plane))
+            mask = toolpath.plane == plane
+            factors[mask] = factor
+            self.swap_arc[mask & has_arc_word] = is_mirror
+
+        # offsets from the transformed start point to the transformed centre, the centre is set in
+        # the plane of the start point
+        rows = np.arange(arcs.shape[0])
+        axes = toolpath.plane_axes(arcs)
+        start = toolpath.start[arcs,:3] - toolpath.offset[arcs,:3]
+        centre = toolpath.centre[arcs] - toolpath.offset[arcs,:3]
+        centre[rows,axes[:,2]] = start[rows,axes[:,2]]
+        offsets = (transform.transform_points(centre) - previous_position[arcs]) / scale[arcs]
+
+        radius = toolpath._word_column('R')[arcs]
+        use_radius = ~np.isnan(radius)
+        self.radius_words[arcs[use_radius]] = radius[use_radius] * factors[arcs[use_radius]]
+
+        arc_words = np.full((arcs.shape[0], 3), np.nan)
+        for k in (0, 1):
+            columns = axes[:,k]
+            arc_words[rows,columns] = offsets[rows,columns]
+        # keep the I J K words which are written or needed
+        is_written = ~np.isnan(np.column_stack([
+            toolpath._word_column(letter)[arcs] for letter in self.__arc_letters__]))
+        uses_offsets = np.any(is_written, axis=1)[:,np.newaxis]
+        is_written |= uses_offsets & (np.abs(arc_words) > self._tolerance)
+        arc_words[~is_written] = np.nan
+        self.arc_words[arcs] = arc_words
+
+    ##############################################
+
+    def _new_words(self):
+
+        """Return a dictionary line index -> {letter: new value} for the lines to rewrite, i.e. the
+        transformed lines and the lines where G2 and G3 are swapped.
+
+        """
+
+        new_words = {int(i): {} for i in np.flatnonzero(self._is_transformed | self.swap_arc)}
+        columns = [(letter, self.axis_words[:,k]) for k, letter in enumerate(self.__axis_letters__)]
+        columns += [(letter, self.arc_words[:,k]) for k, letter in enumerate(self.__arc_letters__)]
+        columns.append(('R', self.radius_words))
+        for letter, column in columns:
+            indexes = np.flatnonzero(~np.isnan(column))
+            for i, value in zip(indexes.tolist(), column[indexes].tolist()):
+                new_words[i][letter] = value
+        return new_words
+
+    ##############################################
+
+    def to_program(self, in_place=False, decimals=None):
+
+        """Return the transformed program, a clone of the original program if *in_place* is not set.
+
+        New values are rounded to the given number of decimals if it is set.
+        """
+
+        program = self._toolpath.program
+        if not in_place:
+            program = program.clone()
+
+        def make_word(letter, value):
+            if decimals is not None:
+                value = round(value, decimals)
+            return Ast.Word(letter, value, program.machine)
+
+        swap_arc = self.swap_arc
+        for i, words in self._new_words().items():
+            line = program[i]
+            line._items[:] = rewrite_items(line, words, make_word, swap_arc[i])
+
+        return program
+
+    ##############################################
+
+    def to_text(self, decimals=4):
+
+        """Return the transformed program as G-code text, number are formatted with the given number
+        of decimals.
+
+        """
+
+        def make_word(letter, value):
+            return '{}{}'.format(letter, format_number(value, decimals))
+
+        program = self._toolpath.program
+        new_words = self._new_words()
+        swap_arc = self.swap_arc.tolist()
+        lines = []
+        for i, line in enumerate(program):
+            words = new_words.get(i)
+            if words is not None:
+                items = rewrite_items(line, words, make_word, swap_arc[i])
+                lines.append(items_to_text(line, items))
+            else:
+                lines.append(str(line))
+
+        return '\n'.join(lines)
+
+####################################################################################################
+
+def format_number(value, decimals):
+
+    """Format a number with at most *decimals* decimals, trailing zeros are removed"""
+
+    text = '{:.{}f}'.format(value, decimals)
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    if text in ('-0', ''):
+        text = '0'
+    return text
+
+####################################################################################################
+
+def rewrite_items(line, words, make_word, swap_arc=False):
+
+    """Return the items of a line where the values of the words are replaced.
+
+    *words* is a dictionary letter -> new value for the X Y Z I J K R words, a missing word is
+    inserted after the last of these words. *make_word* builds a word from a letter and a value.
+    G2 and G3 are swapped if *swap_arc* is set.
+
+    """
+
+    words = dict(words)
+    items = []
+    last_word = 0
+    for item in line:
+        if isinstance(item, Ast.Word):
+            letter = item.letter
+            if letter in words:
+                item = make_word(letter, words.pop(letter))
+                last_word = len(items) + 1
+            elif letter in 'XYZIJKR':
+                last_word = len(items) + 1
+            elif swap_arc and letter == 'G' and item.value in (2, 3):
+                item = make_word('G', 5 - int(item.value))
+        items.append(item)
+    # add the missing words in the letter order
+    new_items = [make_word(letter, words[letter]) for letter in 'XYZIJKR' if letter in words]
+    items[last_word:last_word] = new_items
+    return items
+
+####################################################################################################
+
+def items_to_text(line, items):
+
+    """Format a line with the given items, which can be strings"""
+
+    text = ''
+    if not line:
+        text += '/ '
+    if line.line_number:
+        text += 'N{} '.format(line.line_number)
+    text += ' '.join(map(str, items))
+    if line.comment:
+        text += ' ; ' + line.comment
+    return text
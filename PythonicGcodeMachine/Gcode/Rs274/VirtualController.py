@@ -0,0 +1,556 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to implement a virtual controller and a sender which use a GRBL like streaming protocol.
+
+Usage::
+
+   controller = VirtualController(planner_size=16, block_rate=500)
+   server = await controller.start_server('127.0.0.1', 0)
+   port = server.sockets[0].getsockname()[1]
+   # or
+   path = await controller.open_pty()
+
+   sender = await GcodeSender.connect('127.0.0.1', port)
+   # or
+   sender = await GcodeSender.open_pty(path)
+   report = await sender.send(lines)
+   await sender.wait_idle()
+   print(report.blocks_per_second, report.errors)
+   await sender.close()
+
+   controller.close()
+   await controller.wait_closed()
+
+**Protocol**
+
+The protocol is a subset of the GRBL protocol:
+
+* the controller sends a banner at the TCP connection and after a soft reset, the realtime command
+  ``\x18``, which discards the partial line,
+* a line is terminated by a LF, a CR is ignored,
+* the controller answers ``ok`` or ``error:<code>`` to each line, when the line is parsed, executed by
+  the interpreter and its block is queued in the planner buffer, ``error:1`` is a syntax error and
+  ``error:20`` a line which cannot be executed, the lines starting by ``$`` are ignored,
+* the realtime command ``?`` is answered by a status report like
+  ``<Run|MPos:1.000,2.000,0.000|Bf:15,128>``, where ``Bf`` is the number of free blocks of the
+  planner buffer and of free bytes of the receive buffer.
+
+The flow control uses character counting: the sender keeps track of the size of the lines which
+are not acknowledged and only sends a line if it fits in the receive buffer of *rx_buffer_size*
+bytes. The controller counts the overflows of its receive buffer.
+
+**Simulation**
+
+The lines are parsed by a :class:`.Parser.GcodeParser` and executed by a
+:class:`.Interpreter.GcodeInterpreter` which updates a :class:`.MachineState.MachineState`. The
+motion and dwell blocks are queued in a planner buffer of *planner_size* blocks and executed by a
+task which waits the duration of the block multiplied by *time_scale*, and at least
+``1/block_rate`` if *block_rate* is set. When the planner buffer is full, the acknowledgement of
+the line is delayed, which throttles the sender.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'GcodeSender',
+    'SendReport',
+    'VirtualController',
+]
+
+####################################################################################################
+
+from collections import deque, namedtuple
+import asyncio
+import os
+import time
+import tty
+
+from .Interpreter import GcodeInterpreter
+from .Parser import GcodeParser
+
+####################################################################################################
+
+async def _open_fd_connection(fd):
+
+    """Return a (reader, writer, read transport) tuple for a terminal file descriptor"""
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    read_transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader),
+        os.fdopen(fd, 'rb', buffering=0),
+    )
+    transport, protocol = await loop.connect_write_pipe(
+        asyncio.streams.FlowControlMixin,
+        os.fdopen(os.dup(fd), 'wb', buffering=0),
+    )
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    return reader, writer, read_transport
+
+####################################################################################################
+
+class VirtualController:
+
+    """Class to implement a virtual controller.
+
+    *parser* is a :class:`.Parser.GcodeParser` and *interpreter* a
+    :class:`.Interpreter.GcodeInterpreter`, they are created by default.
+
+    The state of the machine is kept between the connections, which are served one at a time.
+
+    """
+
+    # the senders look for "Grbl"
+    BANNER = "Grbl 1.1h ['$' for help]"
+
+    SYNTAX_ERROR = 1
+    UNSUPPORTED_COMMAND_ERROR = 20
+
+    STATUS_REPORT_COMMAND = b'?'
+    SOFT_RESET_COMMAND = b'\x18'
+
+    DEFAULT_RX_BUFFER_SIZE = 128
+
+    ##############################################
+
+    def __init__(self,
+                 parser=None,
+                 interpreter=None,
+                 rx_buffer_size=DEFAULT_RX_BUFFER_SIZE,
+                 planner_size=16,
+                 block_rate=None,
+                 time_scale=0.,
+    ):
+
+        if planner_size < 1:
+            raise ValueError('Invalid planner size {}'.format(planner_size))
+
+        self._parser = parser if parser is not None else GcodeParser()
+        self._interpreter = interpreter if interpreter is not None else GcodeInterpreter()
+        self._rx_buffer_size = int(rx_buffer_size)
+        self._planner_size = int(planner_size)
+        self._block_rate = float(block_rate) if block_rate else None
+        self._time_scale = float(time_scale)
+
+        self._position = self._interpreter.position
+        self._number_of_lines = 0
+        self._number_of_errors = 0
+        self._number_of_executed_blocks = 0
+        self._number_of_rx_overflows = 0
+
+        self._servers = []
+        self._pty_slaves = []
+        self._tasks = set()
+        self._lock = asyncio.Lock()
+        self._planner = None
+
+    ##############################################
+
+    @property
+    def parser(self):
+        return self._parser
+
+    @property
+    def interpreter(self):
+        return self._interpreter
+
+    @property
+    def rx_buffer_size(self):
+        return self._rx_buffer_size
+
+    @property
+    def planner_size(self):
+        return self._planner_size
+
+    @property
+    def block_rate(self):
+        return self._block_rate
+
+    @property
+    def time_scale(self):
+        return self._time_scale
+
+    @property
+    def position(self):
+        """Position of the last executed block"""
+        return self._position
+
+    @property
+    def number_of_lines(self):
+        return self._number_of_lines
+
+    @property
+    def number_of_errors(self):
+        return self._number_of_errors
+
+    @property
+    def number_of_executed_blocks(self):
+        return self._number_of_executed_blocks
+
+    @property
+    def number_of_rx_overflows(self):
+        return self._number_of_rx_overflows
+
+    ##############################################
+
+    async def start_server(self, host='127.0.0.1', port=0):
+
+        """Listen on a TCP port and return the :class:`asyncio.Server`"""
+
+        server = await asyncio.start_server(self._serve_connection, host, port)
+        self._servers.append(server)
+        return server
+
+    async def _serve_connection(self, reader, writer):
+        # register the task, so it is cancelled by close
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        await self.serve(reader, writer)
+
+    ##############################################
+
+    async def open_pty(self):
+
+        """Open a pseudo-terminal and return the path of the terminal of the sender"""
+
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        # the slave is kept open, so the master doesn't raise EIO when the sender closes it
+        self._pty_slaves.append(slave)
+        reader, writer, read_transport = await _open_fd_connection(master)
+        # a terminal isn't connected, the sender requests the banner by a soft reset
+        task = asyncio.ensure_future(self.serve(reader, writer, send_banner=False))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda task: read_transport.close())
+        return os.ttyname(slave)
+
+    ##############################################
+
+    def close(self):
+
+        for server in self._servers:
+            server.close()
+        for task in self._tasks:
+            task.cancel()
+        for slave in self._pty_slaves:
+            os.close(slave)
+        self._pty_slaves = []
+
+    async def wait_closed(self):
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers = []
+        if self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+    ##############################################
+
+    def _status_report(self):
+
+        number_of_blocks = self._planner.qsize() + self._is_executing
+        return '<{}|MPos:{}|Bf:{},{}>'.format(
+            'Run' if number_of_blocks else 'Idle',
+            ','.join('{:.3f}'.format(x) for x in self._position),
+            self._planner_size - number_of_blocks,
+            max(self._rx_buffer_size - self._rx_bytes, 0),
+        )
+
+    ##############################################
+
+    async def serve(self, reader, writer, send_banner=True):
+
+        """Serve a connection"""
+
+        async with self._lock:
+            self._planner = asyncio.Queue()
+            self._planner_slots = asyncio.Semaphore(self._planner_size)
+            self._is_executing = False
+            self._rx_bytes = 0
+            lines = asyncio.Queue()
+            if send_banner:
+                writer.write((self.BANNER + '\r\n').encode('ascii'))
+
+            receive_task = asyncio.ensure_future(self._receive(reader, writer, lines))
+            execute_task = asyncio.ensure_future(self._execute())
+            try:
+                while True:
+                    line = await lines.get()
+                    if line is None:
+                        break
+                    response = await self._process_line(line)
+                    self._rx_bytes -= len(line) + 1
+                    writer.write(response.encode('ascii') + b'\r\n')
+                    await writer.drain()
+                # the sender is gone, finish the execution
+                await self._planner.join()
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                receive_task.cancel()
+                execute_task.cancel()
+                self._planner = None
+                writer.close()
+
+    ##############################################
+
+    async def _receive(self, reader, writer, lines):
+
+        """Read the lines and answer the realtime commands"""
+
+        buffer = b''
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                if self.SOFT_RESET_COMMAND in data:
+                    # discard the partial line
+                    data = data[data.rindex(self.SOFT_RESET_COMMAND)+1:]
+                    self._rx_bytes -= len(buffer)
+                    buffer = b''
+                    writer.write((self.BANNER + '\r\n').encode('ascii'))
+                if self.STATUS_REPORT_COMMAND in data:
+                    data = data.replace(self.STATUS_REPORT_COMMAND, b'')
+                    writer.write(self._status_report().encode('ascii') + b'\r\n')
+                self._rx_bytes += len(data)
+                if self._rx_bytes > self._rx_buffer_size:
+                    self._number_of_rx_overflows += 1
+                buffer += data
+                if b'\n' in buffer:
+                    *complete_lines, buffer = buffer.split(b'\n')
+                    for line in complete_lines:
+                        lines.put_nowait(line)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            lines.put_nowait(None)
+
+    ##############################################
+
+    async def _process_line(self, line):
+
+        """Parse and execute a line, queue its block and return the response"""
+
+        self._number_of_lines += 1
+        text = line.decode('ascii', errors='replace').replace('\r', '').strip()
+        if not text or text.startswith('$'):
+            return 'ok'
+
+        try:
+            ast_line = self._parser.parse(text)
+        except ValueError:
+            self._number_of_errors += 1
+            return 'error:{}'.format(self.SYNTAX_ERROR)
+
+        try:
+            block = self._interpreter.execute(ast_line)
+        except (ValueError, ArithmeticError):
+            # e.g. an unsupported command or an expression which cannot be evaluated
+            self._number_of_errors += 1
+            return 'error:{}'.format(self.UNSUPPORTED_COMMAND_ERROR)
+
+        if block is not None:
+            # wait for a free block in the planner buffer
+            await self._planner_slots.acquire()
+            self._planner.put_nowait(block)
+
+        return 'ok'
+
+    ##############################################
+
+    async def _execute(self):
+
+        """Execute the blocks of the planner buffer"""
+
+        loop = asyncio.get_running_loop()
+        planner = self._planner
+        block_period = 1 / self._block_rate if self._block_rate else 0.
+        time_scale = self._time_scale
+        # the end time of the last block, so the delays of the event loop are caught up
+        end_time = loop.time()
+        while True:
+            block = await planner.get()
+            self._is_executing = True
+            duration = max(block.duration * time_scale, block_period)
+            if duration > 0:
+                end_time = max(end_time, loop.time()) + duration
+                delay = end_time - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self._position = block.end
+            self._number_of_executed_blocks += 1
+            self._is_executing = False
+            self._planner_slots.release()
+            planner.task_done()
+
+####################################################################################################
+
+class SendReport(namedtuple('SendReport', ('number_of_blocks', 'errors', 'elapsed'))):
+
+    """Report of :meth:`GcodeSender.send`, *errors* is a list of (line index, error code) and
+    *elapsed* is in seconds.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def blocks_per_second(self):
+        return self.number_of_blocks / self.elapsed if self.elapsed else None
+
+####################################################################################################
+
+class GcodeSender:
+
+    """Class to stream G-code to a controller using character counting"""
+
+    ##############################################
+
+    @classmethod
+    async def connect(cls, host, port, **kwargs):
+        """Connect to a TCP port"""
+        reader, writer = await asyncio.open_connection(host, port)
+        sender = cls(reader, writer, **kwargs)
+        await sender._read_banner()
+        return sender
+
+    @classmethod
+    async def open_pty(cls, path, **kwargs):
+        """Open a terminal and reset the controller"""
+        fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+        tty.setraw(fd)
+        reader, writer, read_transport = await _open_fd_connection(fd)
+        sender = cls(reader, writer, read_transport=read_transport, **kwargs)
+        writer.write(VirtualController.SOFT_RESET_COMMAND)
+        await sender._read_banner()
+        return sender
+
+    ##############################################
+
+    def __init__(self, reader, writer, rx_buffer_size=VirtualController.DEFAULT_RX_BUFFER_SIZE, read_transport=None):
+
+        self._reader = reader
+        self._writer = writer
+        self._read_transport = read_transport
+        self._rx_buffer_size = int(rx_buffer_size)
+        self._banner = None
+
+    ##############################################
+
+    @property
+    def banner(self):
+        return self._banner
+
+    @property
+    def rx_buffer_size(self):
+        return self._rx_buffer_size
+
+    ##############################################
+
+    async def close(self):
+        self._writer.close()
+        if self._read_transport is not None:
+            self._read_transport.close()
+
+    ##############################################
+
+    async def _read_line(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError('Connection closed by the controller')
+        return line.decode('ascii').strip()
+
+    async def _read_banner(self):
+        while True:
+            line = await self._read_line()
+            if line.startswith('Grbl'):
+                self._banner = line
+                return
+
+    async def _read_response(self):
+        """Return the next response to a line"""
+        while True:
+            line = await self._read_line()
+            if line and not line.startswith('<'):
+                return line
+
+    ##############################################
+
+    async def send(self, lines):
+
+        """Stream lines and return a :class:`SendReport` when all the lines are acknowledged"""
+
+        writer = self._writer
+        rx_buffer_size = self._rx_buffer_size
+        # size of the lines which are not acknowledged
+        pending = deque()
+        number_of_pending_bytes = 0
+        acknowledged_index = 0
+        errors = []
+
+        async def acknowledge():
+            nonlocal number_of_pending_bytes, acknowledged_index
+            response = await self._read_response()
+            if response.startswith('error:'):
+                errors.append((acknowledged_index, int(response[len('error:'):])))
+            number_of_pending_bytes -= pending.popleft()
+            acknowledged_index += 1
+
+        start = time.perf_counter()
+        number_of_lines = 0
+        for line in lines:
+            data = (line.strip() + '\n').encode('ascii')
+            while pending and number_of_pending_bytes + len(data) > rx_buffer_size:
+                await acknowledge()
+            writer.write(data)
+            await writer.drain()
+            pending.append(len(data))
+            number_of_pending_bytes += len(data)
+            number_of_lines += 1
+        while pending:
+            await acknowledge()
+
+        return SendReport(number_of_lines, errors, time.perf_counter() - start)
+
+    ##############################################
+
+    async def status(self):
+
+        """Request a status report, the sender must not be streaming"""
+
+        self._writer.write(VirtualController.STATUS_REPORT_COMMAND)
+        await self._writer.drain()
+        while True:
+            line = await self._read_line()
+            if line.startswith('<'):
+                return line
+
+    ##############################################
+
+    async def wait_idle(self, interval=.01):
+
+        """Wait until the controller has executed all the blocks"""
+
+        while not (await self.status()).startswith('<Idle'):
+            await asyncio.sleep(interval)
@@ -0,0 +1,286 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Module to write G-code programs to files.
+
+Usage::
+
+   program.write('output.ngc', decimals=3)
+
+   writer = ProgramWriter(decimals=4, trim_zeros=True)
+   with open('output.ngc', 'w') as fh:
+       writer.write(program, fh)
+       # X Y Z columns, NaN means the word is missing
+       writer.write_columns(fh, xyz, 'XYZ', prefixes='G1 ')
+
+The writer formats the numbers with a fixed precision, i.e. ``X0.300`` instead of
+``X0.30000000000000004`` as :meth:`.Ast.Word.__str__`, the G and M codes and the values of the
+expressions are written as is. The layout of a line is the same as :meth:`.Ast.Line.__str__`.
+
+The output is written by chunks of *chunk_size* lines, a file name is opened with a buffer of
+*buffer_size* bytes. A file name ending by ``.gz``, ``.xz`` or ``.zst`` is compressed, see
+:mod:`.Compression`.
+
+**Implementation**
+
+:meth:`ProgramWriter.format_columns` formats a (n, k) array at once. The rows are classified
+according to the pattern of their missing words, a ``%`` format string is built for each pattern,
+and each chunk is formatted by a single ``%`` operation on the join of the row formats. The number
+of Python operations doesn't depend on the number of words.
+
+"""
+
+####################################################################################################
+
+__all__ = [
+    'ProgramWriter',
+]
+
+####################################################################################################
+
+import os
+import re
+
+import numpy as np
+
+from . import Ast
+from .Compression import open_compressed
+
+####################################################################################################
+
+class ProgramWriter:
+
+    """Class to write programs and columns of words.
+
+    Parameters:
+
+    * *decimals*: number of decimals of the real numbers,
+    * *trim_zeros*: remove the trailing zeros of the real numbers, e.g. ``X1.5`` instead of
+      ``X1.500``,
+    * *separator*: string between the items of a line,
+    * *chunk_size*: number of lines which are formatted before a write,
+    * *buffer_size*: buffer size of the files opened by the writer,
+    * *compression*: compression format of the files opened by the writer, by default it is
+      given by the suffix of the file name, see :mod:`.Compression`.
+
+    """
+
+    TRAILING_ZEROS_RE = re.compile(r'(\.[0-9]*?)0+(?![0-9])')
+
+    ##############################################
+
+    def __init__(self,
+                 decimals=3,
+                 trim_zeros=False,
+                 separator=' ',
+                 chunk_size=10000,
+                 buffer_size=2**20,
+                 compression=None,
+    ):
+
+        if decimals < 0:
+            raise ValueError('Invalid number of decimals {}'.format(decimals))
+        self._decimals = int(decimals)
+        self._trim_zeros = bool(trim_zeros)
+        self._separator = separator
+        self._chunk_size = max(int(chunk_size), 1)
+        self._buffer_size = int(buffer_size)
+        self._compression = compression
+
+        self._float_format = '%.{}f'.format(self._decimals)
+
+    ##############################################
+
+    @property
+    def decimals(self):
+        return self._decimals
+
+    @property
+    def trim_zeros(self):
+        return self._trim_zeros
+
+    ##############################################
+
+    def _trim(self, text):
+        return self.TRAILING_ZEROS_RE.sub(lambda match: match.group(1).rstrip('.'), text)
+
+    ##############################################
+
+    def format_number(self, value):
+
+        """Format a number, an integer is written as is"""
+
+        if isinstance(value, int):
+            return str(value)
+        # adding zero turns -0.0 into 0.0
+        text = self._float_format % (round(value, self._decimals) + 0.)
+        if self._trim_zeros:
+            text = self._trim(text)
+        return text
+
+    ##############################################
+
+    def format_item(self, item):
+
+        """Format a line item"""
+
+        if isinstance(item, Ast.Word):
+            value = item.value
+            if item.letter in 'GM' or not isinstance(value, (int, float)):
+                return str(item)
+            return item.letter + self.format_number(value)
+        elif isinstance(item, Ast.ParameterSetting):
+            value = item.value
+            if isinstance(value, (int, float)):
+                return '#{}={}'.format(item.parameter, self.format_number(value))
+        return str(item)
+
+    ##############################################
+
+    def format_line(self, line):
+
+        """Format a line"""
+
+        text = ''
+        if not line:
+            text += '/ '
+        if line.line_number:
+            text += 'N{} '.format(line.line_number)
+        text += self._separator.join([self.format_item(item) for item in line])
+        if line.comment:
+            text += ' ; ' + line.comment
+        return text
+
+    ##############################################
+
+    def _open(self, path):
+        return open_compressed(path, 'w', compression=self._compression, buffering=self._buffer_size)
+
+    ##############################################
+
+    def write(self, program, fh):
+
+        """Write a program to a file object or a path, return the number of lines"""
+
+        if isinstance(fh, (str, os.PathLike)):
+            with self._open(fh) as _fh:
+                return self.write(program, _fh)
+
+        format_line = self.format_line
+        chunk_size = self._chunk_size
+        lines = program[:] if isinstance(program, Ast.Program) else list(program)
+        for start in range(0, len(lines), chunk_size):
+            chunk = lines[start:start + chunk_size]
+            fh.write('\n'.join([format_line(line) for line in chunk]) + '\n')
+        return len(lines)
+
+    ##############################################
+
+    def format_columns(self, columns, letters, prefixes=None, suffixes=None):
+
+        """Format a (n, k) array of word values, return a list of n lines.
+
+        *letters* gives the letter of each column, a NaN value is a missing word. *prefixes* is a
+        string or a sequence of n strings which are written at the beginning of the lines, a
+        separator is added if the prefix doesn't end by a space. *suffixes* is a sequence of n
+        strings which are appended as is to the lines, e.g. end of line comments.
+
+        """
+
+        return ''.join(self._iter_columns(columns, letters, prefixes, suffixes)).split('\n')[:-1]
+
+    ##############################################
+
+    def write_columns(self, fh, columns, letters, prefixes=None, suffixes=None):
+
+        """Write a (n, k) array of word values, see :meth:`format_columns`, return the number of
+        lines.
+
+        """
+
+        if isinstance(fh, (str, os.PathLike)):
+            with self._open(fh) as _fh:
+                return self.write_columns(_fh, columns, letters, prefixes, suffixes)
+
+        for text in self._iter_columns(columns, letters, prefixes, suffixes):
+            fh.write(text)
+        return len(columns)
+
+    ##############################################
+
+    def _iter_columns(self, columns, letters, prefixes, suffixes):
+
+        """Yield the formatted chunks of a column array"""
+
+        columns = np.asarray(columns, dtype=np.float64)
+        if columns.ndim == 1:
+            columns = columns[:,np.newaxis]
+        number_of_rows, number_of_columns = columns.shape
+        if len(letters) != number_of_columns:
+            raise ValueError('Got {} letters for {} columns'.format(len(letters), number_of_columns))
+        if number_of_columns > 62:
+            raise ValueError('Too many columns')
+        if not number_of_rows:
+            return
+
+        is_present = ~np.isnan(columns)
+        values = np.round(np.where(is_present, columns, 0), self._decimals) + 0.
+
+        # a format string for each pattern of missing words
+        bits = np.left_shift(1, np.arange(number_of_columns, dtype=np.int64))
+        pattern = is_present.astype(np.int64) @ bits
+        patterns, pattern_index = np.unique(pattern, return_inverse=True)
+        float_format = self._float_format
+        pattern_formats = []
+        for mask in patterns.tolist():
+            pattern_formats.append(self._separator.join(
+                [letter + float_format for j, letter in enumerate(letters) if mask & (1 << j)]))
+        row_formats = np.array(pattern_formats, dtype=object)[pattern_index]
+
+        if prefixes is not None:
+            if isinstance(prefixes, str):
+                prefixes = np.full(number_of_rows, prefixes, dtype=object)
+            else:
+                prefixes = np.asarray(prefixes, dtype=object)
+                if prefixes.shape != (number_of_rows,):
+                    raise ValueError('Got {} prefixes for {} rows'.format(prefixes.shape[0], number_of_rows))
+            prefixes = np.array([prefix.replace('%', '%%') for prefix in prefixes.tolist()], dtype=object)
+            needs_separator = np.array([bool(prefix) and not prefix.endswith(' ') for prefix in prefixes.tolist()])
+            needs_separator &= pattern != 0
+            prefixes[needs_separator] += self._separator
+            row_formats = prefixes + row_formats
+
+        if suffixes is not None:
+            suffixes = list(suffixes)
+            if len(suffixes) != number_of_rows:
+                raise ValueError('Got {} suffixes for {} rows'.format(len(suffixes), number_of_rows))
+
+        chunk_size = self._chunk_size
+        for start in range(0, number_of_rows, chunk_size):
+            stop = min(start + chunk_size, number_of_rows)
+            chunk_format = '\n'.join(row_formats[start:stop].tolist()) + '\n'
+            text = chunk_format % tuple(values[start:stop][is_present[start:stop]].tolist())
+            if self._trim_zeros:
+                text = self._trim(text)
+            if suffixes is not None:
+                # the suffixes are added after the formatting so as to be written as is
+                lines = text.split('\n')
+                text = '\n'.join([line + suffix for line, suffix in zip(lines, suffixes[start:stop])]) + '\n'
+            yield text
@@ -0,0 +1,10 @@
+# _lextab.py. This file automatically created by PLY (version 3.11). Don't edit!
+_tabversion   = '3.10'
+_lextokens    = set(('A', 'ABSOLUTE_VALUE', 'AND', 'ARC_COSINE', 'ARC_SINE', 'ARC_TANGENT', 'B', 'C', 'COSINE', 'D', 'DIVIDED_BY', 'END_OF_BLOCK', 'EOF_COMMENT', 'EQUAL_SIGN', 'EXCLUSIVE_OR', 'E_RAISED_TO', 'F', 'FIX_DOWN', 'FIX_UP', 'G', 'H', 'I', 'INLINE_COMMENT', 'J', 'K', 'L', 'LEFT_BRACKET', 'M', 'MINUS', 'MODULO', 'N', 'NATURAL_LOG_OF', 'NON_EXCLUSIVE_OR', 'P', 'PARAMETER_SIGN', 'PLUS', 'POSITIVE_INTEGER', 'POSITIVE_REAL', 'POWER', 'Q', 'R', 'REAL', 'RIGHT_BRACKET', 'ROUND', 'S', 'SINE', 'SQUARE_ROOT', 'T', 'TANGENT', 'TIMES', 'X', 'Y', 'Z'))
+_lexreflags   = 64
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [('(?P<t_REAL>((\\+|-)?(\\d+\\.\\d*|(\\.)?\\d+)))|(?P<t_INLINE_COMMENT>\\([^\\)\\r\\n]*\\))|(?P<t_EOF_COMMENT>;.*)|(?P<t_END_OF_BLOCK>\\r?\\n|\\r)|(?P<t_ROUND>round)|(?P<t_ARC_COSINE>acos)|(?P<t_ARC_SINE>asin)|(?P<t_ARC_TANGENT>atan)|(?P<t_POWER>\\*\\*)|(?P<t_SQUARE_ROOT>sqrt)|(?P<t_ABSOLUTE_VALUE>abs)|(?P<t_AND>and)|(?P<t_COSINE>cos)|(?P<t_EXCLUSIVE_OR>xor)|(?P<t_E_RAISED_TO>exp)|(?P<t_FIX_DOWN>fix)|(?P<t_FIX_UP>fup)|(?P<t_MODULO>mod)|(?P<t_SINE>sin)|(?P<t_TANGENT>tan)|(?P<t_DIVIDED_BY>\\/)|(?P<t_LEFT_BRACKET>\\[)|(?P<t_NATURAL_LOG_OF>ln)|(?P<t_NON_EXCLUSIVE_OR>or)|(?P<t_PARAMETER_SIGN>\\#)|(?P<t_PLUS>\\+)|(?P<t_RIGHT_BRACKET>\\])|(?P<t_TIMES>\\*)|(?P<t_A>a)|(?P<t_C>c)|(?P<t_D>d)|(?P<t_EQUAL_SIGN>=)|(?P<t_F>f)|(?P<t_G>g)|(?P<t_H>h)|(?P<t_I>i)|(?P<t_J>j)|(?P<t_K>k)|(?P<t_L>l)|(?P<t_M>m)|(?P<t_MINUS>-)|(?P<t_N>n)|(?P<t_P>p)|(?P<t_Q>q)|(?P<t_R>r)|(?P<t_S>s)|(?P<t_T>t)|(?P<t_X>x)|(?P<t_Y>y)|(?P<t_Z>z)', [None, ('t_REAL', 'REAL'), None, None, None, None, ('t_INLINE_COMMENT', 'INLINE_COMMENT'), ('t_EOF_COMMENT', 'EOF_COMMENT'), ('t_END_OF_BLOCK', 'END_OF_BLOCK'), (None, 'ROUND'), (None, 'ARC_COSINE'), (None, 'ARC_SINE'), (None, 'ARC_TANGENT'), (None, 'POWER'), (None, 'SQUARE_ROOT'), (None, 'ABSOLUTE_VALUE'), (None, 'AND'), (None, 'COSINE'), (None, 'EXCLUSIVE_OR'), (None, 'E_RAISED_TO'), (None, 'FIX_DOWN'), (None, 'FIX_UP'), (None, 'MODULO'), (None, 'SINE'), (None, 'TANGENT'), (None, 'DIVIDED_BY'), (None, 'LEFT_BRACKET'), (None, 'NATURAL_LOG_OF'), (None, 'NON_EXCLUSIVE_OR'), (None, 'PARAMETER_SIGN'), (None, 'PLUS'), (None, 'RIGHT_BRACKET'), (None, 'TIMES'), (None, 'A'), (None, 'C'), (None, 'D'), (None, 'EQUAL_SIGN'), (None, 'F'), (None, 'G'), (None, 'H'), (None, 'I'), (None, 'J'), (None, 'K'), (None, 'L'), (None, 'M'), (None, 'MINUS'), (None, 'N'), (None, 'P'), (None, 'Q'), (None, 'R'), (None, 'S'), (None, 'T'), (None, 'X'), (None, 'Y'), (None, 'Z')])]}
+_lexstateignore = {'INITIAL': ' \t'}
+_lexstateerrorf = {'INITIAL': 't_error'}
+_lexstateeoff = {}
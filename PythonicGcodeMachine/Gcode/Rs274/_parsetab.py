@@ -0,0 +1,111 @@
+
+# _parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'lineA ABSOLUTE_VALUE AND ARC_COSINE ARC_SINE ARC_TANGENT B C COSINE D DIVIDED_BY END_OF_BLOCK EOF_COMMENT EQUAL_SIGN EXCLUSIVE_OR E_RAISED_TO F FIX_DOWN FIX_UP G H I INLINE_COMMENT J K L LEFT_BRACKET M MINUS MODULO N NATURAL_LOG_OF NON_EXCLUSIVE_OR P PARAMETER_SIGN PLUS POSITIVE_INTEGER POSITIVE_REAL POWER Q R REAL RIGHT_BRACKET ROUND S SINE SQUARE_ROOT T TANGENT TIMES X Y Zprogram : program_lines\n                   | program_lines END_OF_BLOCK\n        program_lines : program_line\n                         | program_lines END_OF_BLOCK program_line\n        program_line : lineline : DIVIDED_BY line_right\n                | line_right\n        line_right : line_content\n                      | line_content EOF_COMMENT\n        line_content : segmentsline_content : line_number segmentsline_number : N POSITIVE_INTEGER\n                       | N POSITIVE_REAL\n        segments : segment\n                    | segments segment\n        segment : mid_line_word\n                   | comment\n                   | parameter_setting\n        comment : ordinary_commentordinary_comment : INLINE_COMMENTmid_line_word : mid_line_letter real_valuemid_line_letter : A\n                           | B\n                           | C\n                           | D\n                           | F\n                           | G\n                           | H\n                           | I\n                           | J\n                           | K\n                           | L\n                           | M\n                           | P\n                           | Q\n                           | R\n                           | S\n                           | T\n                           | X\n                           | Y\n                           | Z\n        parameter_setting : PARAMETER_SIGN parameter_index EQUAL_SIGN real_valueparameter_value : PARAMETER_SIGN parameter_indexparameter_index : real_valuereal_value : POSITIVE_INTEGER\n                      | POSITIVE_REAL\n                      | REAL\n                      | expression\n                      | parameter_value\n                      | unary_combo\n        unary_combo : ordinary_unary_combo\n                       | arc_tangent_combo\n        ordinary_unary_combo : ordinary_unary_operation expressionexpression : LEFT_BRACKET inner_expression RIGHT_BRACKETinner_expression : real_value\n                            | inner_expression binary_operation real_value\n        arc_tangent_combo : ARC_TANGENT expression DIVIDED_BY expressionordinary_unary_operation : ABSOLUTE_VALUE\n                                    | ARC_COSINE\n                                    | ARC_SINE\n                                    | COSINE\n                                    | E_RAISED_TO\n                                    | FIX_DOWN\n                                    | FIX_UP\n                                    | NATURAL_LOG_OF\n                                    | ROUND\n                                    | SINE\n                                    | SQUARE_ROOT\n                                    | TANGENT\n        binary_operation : binary_operation1\n                            | binary_operation2\n                            | binary_operation3\n        binary_operation1 : POWERbinary_operation2 : DIVIDED_BY\n                             | MODULO\n                             | TIMES\n        binary_operation3 : AND\n                             | EXCLUSIVE_OR\n                             | MINUS\n                             | NON_EXCLUSIVE_OR\n                             | PLUS\n        '
+    
+_lr_action_items = {'DIVIDED_BY':([0,43,44,45,46,47,48,51,52,68,69,70,71,72,73,75,91,92,],[2,-45,-46,-47,-48,-49,-50,-51,-52,-44,81,-55,-43,-53,89,-54,-56,-57,]),'N':([0,2,],[8,8,]),'PARAMETER_SIGN':([0,2,5,6,7,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,38,39,40,41,42,43,44,45,46,47,48,49,50,51,52,68,71,72,74,75,76,77,78,79,80,81,82,83,84,85,86,87,88,90,92,],[14,14,14,14,-14,-16,-17,-18,50,-19,50,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,-20,-15,14,-12,-13,-21,-45,-46,-47,-48,-49,-50,50,50,-51,-52,-44,-43,-53,50,-54,50,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,-42,-57,]),'A':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[15,15,15,15,-14,-16,-17,-18,-19,-20,-15,15,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'B':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[16,16,16,16,-14,-16,-17,-18,-19,-20,-15,16,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'C':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[17,17,17,17,-14,-16,-17,-18,-19,-20,-15,17,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'D':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[18,18,18,18,-14,-16,-17,-18,-19,-20,-15,18,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'F':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[19,19,19,19,-14,-16,-17,-18,-19,-20,-15,19,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'G':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[20,20,20,20,-14,-16,-17,-18,-19,-20,-15,20,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'H':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[21,21,21,21,-14,-16,-17,-18,-19,-20,-15,21,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'I':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[22,22,22,22,-14,-16,-17,-18,-19,-20,-15,22,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'J':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[23,23,23,23,-14,-16,-17,-18,-19,-20,-15,23,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'K':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[24,24,24,24,-14,-16,-17,-18,-19,-20,-15,24,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'L':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[25,25,25,25,-14,-16,-17,-18,-19,-20,-15,25,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'M':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[26,26,26,26,-14,-16,-17,-18,-19,-20,-15,26,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'P':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[27,27,27,27,-14,-16,-17,-18,-19,-20,-15,27,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'Q':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[28,28,28,28,-14,-16,-17,-18,-19,-20,-15,28,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'R':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[29,29,29,29,-14,-16,-17,-18,-19,-20,-15,29,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'S':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[30,30,30,30,-14,-16,-17,-18,-19,-20,-15,30,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'T':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[31,31,31,31,-14,-16,-17,-18,-19,-20,-15,31,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'X':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[32,32,32,32,-14,-16,-17,-18,-19,-20,-15,32,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'Y':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[33,33,33,33,-14,-16,-17,-18,-19,-20,-15,33,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'Z':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[34,34,34,34,-14,-16,-17,-18,-19,-20,-15,34,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'INLINE_COMMENT':([0,2,5,6,7,9,10,11,13,35,38,39,40,41,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[35,35,35,35,-14,-16,-17,-18,-19,-20,-15,35,-12,-13,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'$end':([1,3,4,5,7,9,10,11,13,35,36,37,38,39,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[0,-7,-8,-10,-14,-16,-17,-18,-19,-20,-6,-9,-15,-11,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'EOF_COMMENT':([4,5,7,9,10,11,13,35,38,39,42,43,44,45,46,47,48,51,52,68,71,72,75,90,92,],[37,-10,-14,-16,-17,-18,-19,-20,-15,-11,-21,-45,-46,-47,-48,-49,-50,-51,-52,-44,-43,-53,-54,-42,-57,]),'POSITIVE_INTEGER':([8,12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[40,43,43,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,43,43,43,43,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'POSITIVE_REAL':([8,12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[41,44,44,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,44,44,44,44,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'REAL':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[45,45,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,45,45,45,45,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'LEFT_BRACKET':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,53,54,55,56,57,58,59,60,61,62,63,64,65,66,74,76,77,78,79,80,81,82,83,84,85,86,87,88,89,],[49,49,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,49,49,49,49,-58,-59,-60,-61,-62,-63,-64,-65,-66,-67,-68,-69,49,49,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,49,]),'ARC_TANGENT':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[54,54,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,54,54,54,54,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'ABSOLUTE_VALUE':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[55,55,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,55,55,55,55,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'ARC_COSINE':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[56,56,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,56,56,56,56,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'ARC_SINE':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[57,57,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,57,57,57,57,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'COSINE':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[58,58,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,58,58,58,58,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'E_RAISED_TO':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[59,59,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,59,59,59,59,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'FIX_DOWN':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[60,60,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,60,60,60,60,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'FIX_UP':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[61,61,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,61,61,61,61,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'NATURAL_LOG_OF':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[62,62,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,62,62,62,62,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'ROUND':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[63,63,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,63,63,63,63,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'SINE':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[64,64,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,64,64,64,64,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'SQUARE_ROOT':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[65,65,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,65,65,65,65,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'TANGENT':([12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,49,50,74,76,77,78,79,80,81,82,83,84,85,86,87,88,],[66,66,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-35,-36,-37,-38,-39,-40,-41,66,66,66,66,-70,-71,-72,-73,-74,-75,-76,-77,-78,-79,-80,-81,]),'EQUAL_SIGN':([43,44,45,46,47,48,51,52,67,68,71,72,75,92,],[-45,-46,-47,-48,-49,-50,-51,-52,74,-44,-43,-53,-54,-57,]),'RIGHT_BRACKET':([43,44,45,46,47,48,51,52,68,69,70,71,72,75,91,92,],[-45,-46,-47,-48,-49,-50,-51,-52,-44,75,-55,-43,-53,-54,-56,-57,]),'POWER':([43,44,45,46,47,48,51,52,68,69,70,71,72,75,91,92,],[-45,-46,-47,-48,-49,-50,-51,-52,-44,80,-55,-43,-53,-54,-56,-57,]),'MODULO':([43,44,45,46,47,48,51,52,68,69,70,71,72,75,91,92,],[-45,-46,-47,-48,-49,-50,-51,-52,-44,82,-55,-43,-53,-54,-56,-57,]),'TIMES':([43,44,45,46,47,48,51,52,68,69,70,71,72,75,91,92,],[-45,-46,-47,-48,-49,-50,-51,-52,-44,83,-55,-43,-53,-54,-56,-57,]),'AND':([43,44,45,46,47,48,51,52,68,69,70,71,72,75,91,92,],[-45,-46,-47,-48,-49,-50,-51,-52,-44,84,-55,-43,-53,-54,-56,-57,]),'EXCLUSIVE_OR':([43,44,45,46,47,48,51,52,68,69,70,71,72,75,91,92,],[-45,-46,-47,-48,-49,-50,-51,-52,-44,85,-55,-43,-53,-54,-56,-57,]),'MINUS':([43,44,45,46,47,48,51,52,68,69,70,71,72,75,91,92,],[-45,-46,-47,-48,-49,-50,-51,-52,-44,86,-55,-43,-53,-54,-56,-57,]),'NON_EXCLUSIVE_OR':([43,44,45,46,47,48,51,52,68,69,70,71,72,75,91,92,],[-45,-46,-47,-48,-49,-50,-51,-52,-44,87,-55,-43,-53,-54,-56,-57,]),'PLUS':([43,44,45,46,47,48,51,52,68,69,70,71,72,75,91,92,],[-45,-46,-47,-48,-49,-50,-51,-52,-44,88,-55,-43,-53,-54,-56,-57,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'line':([0,],[1,]),'line_right':([0,2,],[3,36,]),'line_content':([0,2,],[4,4,]),'segments':([0,2,6,],[5,5,39,]),'line_number':([0,2,],[6,6,]),'segment':([0,2,5,6,39,],[7,7,38,7,38,]),'mid_line_word':([0,2,5,6,39,],[9,9,9,9,9,]),'comment':([0,2,5,6,39,],[10,10,10,10,10,]),'parameter_setting':([0,2,5,6,39,],[11,11,11,11,11,]),'mid_line_letter':([0,2,5,6,39,],[12,12,12,12,12,]),'ordinary_comment':([0,2,5,6,39,],[13,13,13,13,13,]),'real_value':([12,14,49,50,74,76,],[42,68,70,68,90,91,]),'expression':([12,14,49,50,53,54,74,76,89,],[46,46,46,46,72,73,46,46,92,]),'parameter_value':([12,14,49,50,74,76,],[47,47,47,47,47,47,]),'unary_combo':([12,14,49,50,74,76,],[48,48,48,48,48,48,]),'ordinary_unary_combo':([12,14,49,50,74,76,],[51,51,51,51,51,51,]),'arc_tangent_combo':([12,14,49,50,74,76,],[52,52,52,52,52,52,]),'ordinary_unary_operation':([12,14,49,50,74,76,],[53,53,53,53,53,53,]),'parameter_index':([14,50,],[67,71,]),'inner_expression':([49,],[69,]),'binary_operation':([69,],[76,]),'binary_operation1':([69,],[77,]),'binary_operation2':([69,],[78,]),'binary_operation3':([69,],[79,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> line","S'",1,None,None,None),
+  ('program -> program_lines','program',1,'p_program','Parser.py',217),
+  ('program -> program_lines END_OF_BLOCK','program',2,'p_program','Parser.py',218),
+  ('program_lines -> program_line','program_lines',1,'p_program_lines','Parser.py',222),
+  ('program_lines -> program_lines END_OF_BLOCK program_line','program_lines',3,'p_program_lines','Parser.py',223),
+  ('program_line -> line','program_line',1,'p_program_line','Parser.py',227),
+  ('line -> DIVIDED_BY line_right','line',2,'p_line','Parser.py',236),
+  ('line -> line_right','line',1,'p_line','Parser.py',237),
+  ('line_right -> line_content','line_right',1,'p_line_right','Parser.py',244),
+  ('line_right -> line_content EOF_COMMENT','line_right',2,'p_line_right','Parser.py',245),
+  ('line_content -> segments','line_content',1,'p_line_content','Parser.py',252),
+  ('line_content -> line_number segments','line_content',2,'p_numbered_line','Parser.py',256),
+  ('line_number -> N POSITIVE_INTEGER','line_number',2,'p_line_number','Parser.py',261),
+  ('line_number -> N POSITIVE_REAL','line_number',2,'p_line_number','Parser.py',262),
+  ('segments -> segment','segments',1,'p_segments','Parser.py',267),
+  ('segments -> segments segment','segments',2,'p_segments','Parser.py',268),
+  ('segment -> mid_line_word','segment',1,'p_segment','Parser.py',276),
+  ('segment -> comment','segment',1,'p_segment','Parser.py',277),
+  ('segment -> parameter_setting','segment',1,'p_segment','Parser.py',278),
+  ('comment -> ordinary_comment','comment',1,'p_comment','Parser.py',285),
+  ('ordinary_comment -> INLINE_COMMENT','ordinary_comment',1,'p_ordinary_comment','Parser.py',290),
+  ('mid_line_word -> mid_line_letter real_value','mid_line_word',2,'p_mid_line_word','Parser.py',301),
+  ('mid_line_letter -> A','mid_line_letter',1,'p_mid_line_letter','Parser.py',305),
+  ('mid_line_letter -> B','mid_line_letter',1,'p_mid_line_letter','Parser.py',306),
+  ('mid_line_letter -> C','mid_line_letter',1,'p_mid_line_letter','Parser.py',307),
+  ('mid_line_letter -> D','mid_line_letter',1,'p_mid_line_letter','Parser.py',308),
+  ('mid_line_letter -> F','mid_line_letter',1,'p_mid_line_letter','Parser.py',309),
+  ('mid_line_letter -> G','mid_line_letter',1,'p_mid_line_letter','Parser.py',310),
+  ('mid_line_letter -> H','mid_line_letter',1,'p_mid_line_letter','Parser.py',311),
+  ('mid_line_letter -> I','mid_line_letter',1,'p_mid_line_letter','Parser.py',312),
+  ('mid_line_letter -> J','mid_line_letter',1,'p_mid_line_letter','Parser.py',313),
+  ('mid_line_letter -> K','mid_line_letter',1,'p_mid_line_letter','Parser.py',314),
+  ('mid_line_letter -> L','mid_line_letter',1,'p_mid_line_letter','Parser.py',315),
+  ('mid_line_letter -> M','mid_line_letter',1,'p_mid_line_letter','Parser.py',316),
+  ('mid_line_letter -> P','mid_line_letter',1,'p_mid_line_letter','Parser.py',317),
+  ('mid_line_letter -> Q','mid_line_letter',1,'p_mid_line_letter','Parser.py',318),
+  ('mid_line_letter -> R','mid_line_letter',1,'p_mid_line_letter','Parser.py',319),
+  ('mid_line_letter -> S','mid_line_letter',1,'p_mid_line_letter','Parser.py',320),
+  ('mid_line_letter -> T','mid_line_letter',1,'p_mid_line_letter','Parser.py',321),
+  ('mid_line_letter -> X','mid_line_letter',1,'p_mid_line_letter','Parser.py',322),
+  ('mid_line_letter -> Y','mid_line_letter',1,'p_mid_line_letter','Parser.py',323),
+  ('mid_line_letter -> Z','mid_line_letter',1,'p_mid_line_letter','Parser.py',324),
+  ('parameter_setting -> PARAMETER_SIGN parameter_index EQUAL_SIGN real_value','parameter_setting',4,'p_parameter_setting','Parser.py',330),
+  ('parameter_value -> PARAMETER_SIGN parameter_index','parameter_value',2,'p_parameter_value','Parser.py',334),
+  ('parameter_index -> real_value','parameter_index',1,'p_parameter_index','Parser.py',338),
+  ('real_value -> POSITIVE_INTEGER','real_value',1,'p_real_value','Parser.py',342),
+  ('real_value -> POSITIVE_REAL','real_value',1,'p_real_value','Parser.py',343),
+  ('real_value -> REAL','real_value',1,'p_real_value','Parser.py',344),
+  ('real_value -> expression','real_value',1,'p_real_value','Parser.py',345),
+  ('real_value -> parameter_value','real_value',1,'p_real_value','Parser.py',346),
+  ('real_value -> unary_combo','real_value',1,'p_real_value','Parser.py',347),
+  ('unary_combo -> ordinary_unary_combo','unary_combo',1,'p_unary_combo','Parser.py',354),
+  ('unary_combo -> arc_tangent_combo','unary_combo',1,'p_unary_combo','Parser.py',355),
+  ('ordinary_unary_combo -> ordinary_unary_operation expression','ordinary_unary_combo',2,'p_ordinary_unary_combo','Parser.py',360),
+  ('expression -> LEFT_BRACKET inner_expression RIGHT_BRACKET','expression',3,'p_expression','Parser.py',364),
+  ('inner_expression -> real_value','inner_expression',1,'p_inner_expression','Parser.py',368),
+  ('inner_expression -> inner_expression binary_operation real_value','inner_expression',3,'p_inner_expression','Parser.py',369),
+  ('arc_tangent_combo -> ARC_TANGENT expression DIVIDED_BY expression','arc_tangent_combo',4,'p_arc_tangent_combo','Parser.py',377),
+  ('ordinary_unary_operation -> ABSOLUTE_VALUE','ordinary_unary_operation',1,'p_ordinary_unary_operation','Parser.py',382),
+  ('ordinary_unary_operation -> ARC_COSINE','ordinary_unary_operation',1,'p_ordinary_unary_operation','Parser.py',383),
+  ('ordinary_unary_operation -> ARC_SINE','ordinary_unary_operation',1,'p_ordinary_unary_operation','Parser.py',384),
+  ('ordinary_unary_operation -> COSINE','ordinary_unary_operation',1,'p_ordinary_unary_operation','Parser.py',385),
+  ('ordinary_unary_operation -> E_RAISED_TO','ordinary_unary_operation',1,'p_ordinary_unary_operation','Parser.py',386),
+  ('ordinary_unary_operation -> FIX_DOWN','ordinary_unary_operation',1,'p_ordinary_unary_operation','Parser.py',387),
+  ('ordinary_unary_operation -> FIX_UP','ordinary_unary_operation',1,'p_ordinary_unary_operation','Parser.py',388),
+  ('ordinary_unary_operation -> NATURAL_LOG_OF','ordinary_unary_operation',1,'p_ordinary_unary_operation','Parser.py',389),
+  ('ordinary_unary_operation -> ROUND','ordinary_unary_operation',1,'p_ordinary_unary_operation','Parser.py',390),
+  ('ordinary_unary_operation -> SINE','ordinary_unary_operation',1,'p_ordinary_unary_operation','Parser.py',391),
+  ('ordinary_unary_operation -> SQUARE_ROOT','ordinary_unary_operation',1,'p_ordinary_unary_operation','Parser.py',392),
+  ('ordinary_unary_operation -> TANGENT','ordinary_unary_operation',1,'p_ordinary_unary_operation','Parser.py',393),
+  ('binary_operation -> binary_operation1','binary_operation',1,'p_binary_operation','Parser.py',398),
+  ('binary_operation -> binary_operation2','binary_operation',1,'p_binary_operation','Parser.py',399),
+  ('binary_operation -> binary_operation3','binary_operation',1,'p_binary_operation','Parser.py',400),
+  ('binary_operation1 -> POWER','binary_operation1',1,'p_binary_operation1','Parser.py',405),
+  ('binary_operation2 -> DIVIDED_BY','binary_operation2',1,'p_binary_operation2','Parser.py',409),
+  ('binary_operation2 -> MODULO','binary_operation2',1,'p_binary_operation2','Parser.py',410),
+  ('binary_operation2 -> TIMES','binary_operation2',1,'p_binary_operation2','Parser.py',411),
+  ('binary_operation3 -> AND','binary_operation3',1,'p_binary_operation3','Parser.py',416),
+  ('binary_operation3 -> EXCLUSIVE_OR','binary_operation3',1,'p_binary_operation3','Parser.py',417),
+  ('binary_operation3 -> MINUS','binary_operation3',1,'p_binary_operation3','Parser.py',418),
+  ('binary_operation3 -> NON_EXCLUSIVE_OR','binary_operation3',1,'p_binary_operation3','Parser.py',419),
+  ('binary_operation3 -> PLUS','binary_operation3',1,'p_binary_operation3','Parser.py',420),
+]
@@ -0,0 +1,414 @@
+#! /usr/bin/env python3
+
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""Benchmark suite of the G-code toolkit.
+
+Usage::
+
+   python3 benchmark/benchmark-gcode.py --lines 10000 100000 --output results.json
+   python3 benchmark/benchmark-gcode.py --benchmarks lexer parser --repeat 5
+
+The programs are generated by :class:`PythonicGcodeMachine.Gcode.Rs274.Corpus.CorpusGenerator`, so
+the results of two commits can be compared for the same seed and sizes. The best time of *repeat*
+runs is reported. The results are written as JSON with the commit and the platform.
+
+Benchmarks:
+
+* ``lexer``: tokens/s, ``case_normalization``: case insensitive against normalised lexing,
+* ``parser``: lines/s, ``validation``: lines/s without building the AST, ``ast_memory``: bytes per
+  line,
+* ``config_load`` and ``machine_construction``: time, independent of the corpus,
+* ``serialization``: program to text and to the binary format,
+* ``streaming``: blocks/s through the virtual controller,
+* ``transform``: toolpath, word computation and output stages of a program transform.
+
+"""
+
+####################################################################################################
+
+import argparse
+import asyncio
+import datetime
+import gc
+import io
+import json
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+####################################################################################################
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from PythonicGcodeMachine.Gcode.Rs274.Corpus import CorpusGenerator
+from PythonicGcodeMachine.Gcode.Rs274.Lexer import GcodeLexer
+from PythonicGcodeMachine.Gcode.Rs274.Lexer import lexer as ply_lex
+from PythonicGcodeMachine.Gcode.Rs274.Machine import GcodeMachine
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.Serialization import ProgramSerializer, SerializedProgram
+from PythonicGcodeMachine.Gcode.Rs274.Toolpath import Toolpath
+from PythonicGcodeMachine.Gcode.Rs274.Transform import AffineTransform, ProgramTransform
+from PythonicGcodeMachine.Gcode.Rs274.VirtualController import GcodeSender, VirtualController
+
+####################################################################################################
+
+def best_time(function, repeat):
+
+    """Return the best time of *repeat* calls and the result of the last call"""
+
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+####################################################################################################
+
+class Benchmark:
+
+    """Class to run the benchmarks on a corpus of *number_of_lines* lines"""
+
+    BENCHMARKS = (
+        'lexer',
+        'case_normalization',
+        'parser',
+        'validation',
+        'ast_memory',
+        'config_load',
+        'machine_construction',
+        'serialization',
+        'streaming',
+        'transform',
+    )
+
+    # benchmarks which don't depend on the corpus
+    FIXED_BENCHMARKS = ('config_load', 'machine_construction')
+
+    ##############################################
+
+    def __init__(self, number_of_lines, seed=0, repeat=3):
+
+        self._number_of_lines = number_of_lines
+        self._repeat = repeat
+        self._lines = CorpusGenerator(seed=seed).lines(number_of_lines)
+        self._bytes = sum(len(line) + 1 for line in self._lines)
+        self._parser = GcodeParser()
+        self._program = None
+
+    ##############################################
+
+    @property
+    def program(self):
+        if self._program is None:
+            self._program = self._parser.parse_lines(self._lines)
+        return self._program
+
+    ##############################################
+
+    def _rates(self, elapsed, **counts):
+        rates = {'time': elapsed}
+        for name, count in counts.items():
+            rates[name] = count
+            rates[name + '_per_second'] = count / elapsed if elapsed else None
+        return rates
+
+    ##############################################
+
+    def lexer(self):
+
+        lexer = GcodeLexer()
+        lines = self._lines
+
+        def run():
+            number_of_tokens = 0
+            for line in lines:
+                for token in lexer.tokenize(line):
+                    number_of_tokens += 1
+            return number_of_tokens
+
+        elapsed, number_of_tokens = best_time(run, self._repeat)
+        return self._rates(elapsed, tokens=number_of_tokens, bytes=self._bytes)
+
+    ##############################################
+
+    def case_normalization(self):
+
+        """Compare the lexers using a case insensitive regular expression to the lexers using a
+        normalized input and a case sensitive regular expression.
+
+        """
+
+        gcode_lexer = GcodeLexer()
+        text = '\n'.join(self._lines)
+        results = {}
+
+        elapsed, _ = best_time(lambda: gcode_lexer.normalize(text), self._repeat)
+        results['normalize'] = self._rates(elapsed, bytes=len(text))
+
+        def count_tokens(lexer, text):
+            lexer.input(text)
+            number_of_tokens = 0
+            token = lexer.token
+            while token():
+                number_of_tokens += 1
+            return number_of_tokens
+
+        # PLY lexers built without table
+        for name, flags in (('ply_ignore_case', re.VERBOSE | re.IGNORECASE), ('ply_normalized', re.VERBOSE)):
+            lexer = ply_lex.lex(module=gcode_lexer, reflags=int(flags), errorlog=ply_lex.NullLogger())
+            if flags & re.IGNORECASE:
+                run = lambda: count_tokens(lexer, text)
+            else:
+                run = lambda: count_tokens(lexer, gcode_lexer.normalize(text))
+            elapsed, number_of_tokens = best_time(run, self._repeat)
+            results[name] = self._rates(elapsed, tokens=number_of_tokens)
+
+        # scanners of tokenize_array, a memoryview is not normalized
+        data = text.encode('ascii')
+        for name, buffer in (('array_ignore_case', memoryview(data)), ('array_normalized', data)):
+            elapsed, token_array = best_time(lambda: gcode_lexer.tokenize_array(buffer), self._repeat)
+            results[name] = self._rates(elapsed, tokens=token_array.types.shape[0])
+
+        for name in ('ply', 'array'):
+            results[name + '_speedup'] = results[name + '_ignore_case']['time'] / results[name + '_normalized']['time']
+
+        return results
+
+    ##############################################
+
+    def parser(self):
+        elapsed, program = best_time(lambda: self._parser.parse_lines(self._lines), self._repeat)
+        self._program = program
+        return self._rates(elapsed, lines=len(program), bytes=self._bytes)
+
+    ##############################################
+
+    def validation(self):
+        elapsed, errors = best_time(lambda: self._parser.validate_lines(self._lines), self._repeat)
+        results = self._rates(elapsed, lines=self._number_of_lines)
+        results['errors'] = len(errors)
+        return results
+
+    ##############################################
+
+    def ast_memory(self):
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            program = self._parser.parse_lines(self._lines)
+            memory, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        number_of_lines = len(program)
+        return {
+            'bytes': memory,
+            'peak_bytes': peak,
+            'bytes_per_line': memory / number_of_lines if number_of_lines else None,
+        }
+
+    ##############################################
+
+    def config_load(self):
+        machine = GcodeMachine()
+        elapsed, _ = best_time(machine.load_config, self._repeat)
+        return {'time': elapsed}
+
+    ##############################################
+
+    def machine_construction(self):
+        elapsed, _ = best_time(GcodeMachine, self._repeat)
+        return {'time': elapsed}
+
+    ##############################################
+
+    def serialization(self):
+
+        program = self.program
+        number_of_lines = len(program)
+        results = {}
+
+        elapsed, text = best_time(lambda: str(program), self._repeat)
+        results['str'] = self._rates(elapsed, lines=number_of_lines, bytes=len(text))
+
+        def write():
+            fh = io.StringIO()
+            program.write(fh, decimals=3)
+            return fh.getvalue()
+        elapsed, text = best_time(write, self._repeat)
+        results['write'] = self._rates(elapsed, lines=number_of_lines, bytes=len(text))
+
+        elapsed, data = best_time(lambda: ProgramSerializer.dumps(program), self._repeat)
+        results['binary_dump'] = self._rates(elapsed, lines=number_of_lines, bytes=len(data))
+
+        elapsed, _ = best_time(lambda: SerializedProgram(data).to_program(), self._repeat)
+        results['binary_load'] = self._rates(elapsed, lines=number_of_lines, bytes=len(data))
+
+        return results
+
+    ##############################################
+
+    def streaming(self):
+
+        """Stream the program to a virtual controller over TCP, until the last block is executed.
+        The blocks are executed without delay, so the throughput is limited by the protocol, the
+        parsing and the interpretation.
+
+        """
+
+        async def stream():
+            controller = VirtualController()
+            server = await controller.start_server('127.0.0.1', 0)
+            sender = await GcodeSender.connect('127.0.0.1', server.sockets[0].getsockname()[1])
+            try:
+                start = time.perf_counter()
+                report = await sender.send(self._lines)
+                await sender.wait_idle()
+                elapsed = time.perf_counter() - start
+            finally:
+                await sender.close()
+                controller.close()
+                await controller.wait_closed()
+            return elapsed, report
+
+        best = None
+        for _ in range(self._repeat):
+            gc.collect()
+            elapsed, report = asyncio.run(stream())
+            if best is None or elapsed < best:
+                best = elapsed
+        results = self._rates(best, blocks=report.number_of_blocks, bytes=self._bytes)
+        results['errors'] = len(report.errors)
+        return results
+
+    ##############################################
+
+    def transform(self):
+
+        """Mirror and translate the program, the stages are timed apart: the construction of the
+        toolpath, the computation of the new words and the output as an AST or as text.
+
+        """
+
+        program = self.program
+        number_of_lines = len(program)
+        transform = AffineTransform.translation(x=10, y=5) @ AffineTransform.mirror('X')
+        results = {}
+
+        elapsed, toolpath = best_time(lambda: Toolpath(program), self._repeat)
+        results['toolpath'] = self._rates(elapsed, lines=number_of_lines)
+
+        elapsed, program_transform = best_time(
+            lambda: ProgramTransform(toolpath, transform), self._repeat)
+        results['compute'] = self._rates(elapsed, lines=number_of_lines)
+
+        elapsed, _ = best_time(lambda: program_transform.to_program(decimals=4), self._repeat)
+        results['to_program'] = self._rates(elapsed, lines=number_of_lines)
+
+        elapsed, _ = best_time(lambda: program_transform.to_text(decimals=4), self._repeat)
+        results['to_text'] = self._rates(elapsed, lines=number_of_lines)
+
+        total = sum(results[stage]['time'] for stage in ('toolpath', 'compute', 'to_text'))
+        results['total'] = self._rates(total, lines=number_of_lines)
+
+        return results
+
+    ##############################################
+
+    def run(self, names):
+
+        results = {
+            'lines': self._number_of_lines,
+            'bytes': self._bytes,
+        }
+        for name in names:
+            print('  {} ...'.format(name), file=sys.stderr)
+            results[name] = getattr(self, name)()
+        return results
+
+####################################################################################################
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ('git', 'rev-parse', 'HEAD'),
+            cwd=str(Path(__file__).resolve().parent),
+            stderr=subprocess.DEVNULL,
+        ).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+####################################################################################################
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Run the G-code benchmarks')
+    parser.add_argument('--lines', type=int, nargs='+', default=[10000],
+                        help='number of lines of the generated programs')
+    parser.add_argument('--benchmarks', nargs='+', choices=Benchmark.BENCHMARKS,
+                        default=Benchmark.BENCHMARKS,
+                        help='benchmarks to run')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of runs, the best time is reported')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the corpus generator')
+    parser.add_argument('--output', default=None,
+                        help='JSON output file, default is stdout')
+    args = parser.parse_args()
+
+    results = {
+        'commit': git_commit(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'runs': [],
+    }
+
+    fixed_benchmarks = [name for name in args.benchmarks if name in Benchmark.FIXED_BENCHMARKS]
+    corpus_benchmarks = [name for name in args.benchmarks if name not in Benchmark.FIXED_BENCHMARKS]
+    for i, number_of_lines in enumerate(args.lines):
+        print('Benchmark on {} lines'.format(number_of_lines), file=sys.stderr)
+        benchmark = Benchmark(number_of_lines, seed=args.seed, repeat=args.repeat)
+        names = corpus_benchmarks + (fixed_benchmarks if i == 0 else [])
+        results['runs'].append(benchmark.run(names))
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text + '\n')
+    else:
+        print(text)
+
+####################################################################################################
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+import unittest
+
+import numpy as np
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.ArcFitting import ArcFitting
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.Toolpath import Toolpath
+
+####################################################################################################
+
+def polyline(points, template='X{:.4f} Y{:.4f}'):
+    return [template.format(*point) for point in points]
+
+####################################################################################################
+
+class TestArcFitting(unittest.TestCase):
+
+    ##############################################
+
+    def _fit(self, gcode, **kwargs):
+        toolpath = Toolpath(GcodeParser().parse_lines('\n'.join(gcode)))
+        arc_fitting = ArcFitting(toolpath, **kwargs)
+        new_toolpath = Toolpath(arc_fitting.to_program(decimals=4))
+        return toolpath, arc_fitting, new_toolpath
+
+    ##############################################
+
+    def test_half_circle(self):
+
+        angles = np.linspace(0, np.pi, 21)[1:]
+        gcode = (['G21 G90 G0 X10 Y0', 'G1 F100'] +
+                 polyline(np.column_stack((10*np.cos(angles), 10*np.sin(angles)))) +
+                 ['X-10 Y-5', 'X-10 Y-10', 'M5'])
+        toolpath, arc_fitting, new_toolpath = self._fit(gcode, tolerance=0.05)
+
+        self.assertEqual(arc_fitting.number_of_arcs, 1)
+        self.assertEqual(arc_fitting.report['removed_lines'], 19)
+        lines = str(arc_fitting.to_program(decimals=4)).split('\n')
+        self.assertEqual(lines[2], 'G3 X-10.0 Y0.0 I-10.0 J0.0')
+        # G1 is restored after the arc
+        self.assertEqual(lines[3], 'G1 X-10 Y-5')
+        np.testing.assert_allclose(new_toolpath.centre[new_toolpath.is_arc,:2], [(0, 0)], atol=1e-6)
+        np.testing.assert_allclose(new_toolpath.end[-1], toolpath.end[-1])
+
+        # the polyline deviates from the arc more than the tolerance
+        toolpath, arc_fitting, new_toolpath = self._fit(gcode, tolerance=0.01)
+        self.assertEqual(arc_fitting.number_of_arcs, 0)
+
+    ##############################################
+
+    def test_removed_feed(self):
+
+        # a line with an F word which doesn't change the feed rate is removed
+        angles = np.linspace(0, np.pi / 2, 11)[1:]
+        gcode = ['G0 X10 Y0 F100'] + polyline(np.column_stack((10*np.cos(angles), 10*np.sin(angles))))
+        gcode[1] = 'G1 F100 ' + gcode[1]
+        toolpath, arc_fitting, new_toolpath = self._fit(gcode, tolerance=0.05)
+        self.assertEqual(arc_fitting.number_of_arcs, 1)
+        self.assertEqual(arc_fitting.report['removed_lines'], 9)
+        self.assertEqual(new_toolpath.motion[-1], Toolpath.CCW_ARC)
+        self.assertEqual(new_toolpath.feed[-1], 100)
+
+    ##############################################
+
+    def test_radius(self):
+
+        angles = np.linspace(0, np.pi / 2, 11)[1:]
+        gcode = ['G0 X10 Y0', 'G1 F100'] + polyline(np.column_stack((10*np.cos(angles), 10*np.sin(angles))))
+        toolpath, arc_fitting, new_toolpath = self._fit(gcode, tolerance=0.05, use_radius=True)
+        line = arc_fitting.to_program(decimals=4)[-1]
+        self.assertEqual(str(line)[:14], 'G3 X0.0 Y10.0 ')
+        radius = [word.value for word in line.iter_on_letter('R')]
+        np.testing.assert_allclose(radius, [10], atol=1e-3)
+
+    ##############################################
+
+    def test_plane_and_incremental(self):
+
+        angles = np.linspace(0, np.pi, 21)
+        points = np.column_stack((5*np.cos(angles), 5*np.sin(angles)))
+        gcode = ['G18 G91 G1 F100 X0 Z0'] + polyline(np.diff(points, axis=0), 'X{:.5f} Z{:.5f}')
+        toolpath, arc_fitting, new_toolpath = self._fit(gcode, tolerance=0.05)
+
+        self.assertEqual(arc_fitting.number_of_arcs, 1)
+        self.assertEqual(new_toolpath.motion[-1], Toolpath.CW_ARC)
+        np.testing.assert_allclose(new_toolpath.end[-1], toolpath.end[-1], atol=1e-4)
+        np.testing.assert_allclose(new_toolpath.centre[-1,[0,2]], (-5, 0), atol=1e-4)
+
+    ##############################################
+
+    def test_line_and_arc(self):
+
+        angles = np.linspace(0, np.pi / 2, 31)[1:]
+        gcode = (['G0 X-10 Y0', 'G1 F100'] + polyline([(x, 0) for x in range(-9, 1)]) +
+                 polyline(np.column_stack((10*np.sin(angles), 10 - 10*np.cos(angles)))))
+        toolpath, arc_fitting, new_toolpath = self._fit(gcode, tolerance=0.01)
+
+        self.assertGreaterEqual(arc_fitting.number_of_arcs, 1)
+        # the straight segments are not replaced
+        self.assertFalse(np.any(new_toolpath.is_arc & (new_toolpath.end[:,1] == 0)))
+        np.testing.assert_allclose(new_toolpath.end[-1], toolpath.end[-1], atol=1e-4)
+        radius = new_toolpath.arc_geometry()[0]
+        np.testing.assert_allclose(radius[new_toolpath.is_arc], 10, atol=0.01)
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,113 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+import io
+import unittest
+
+import numpy as np
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Builder import ProgramBuilder
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+
+####################################################################################################
+
+class TestBuilder(unittest.TestCase):
+
+    ##############################################
+
+    def _builder(self, **kwargs):
+        nan = np.nan
+        return ProgramBuilder(
+            ((0, 0, 5), (nan, nan, -1), (10, 0, nan), (10, 10, nan), (0, 0, 5)),
+            motion=(0, 1, 1, 1, 0),
+            feed=(nan, 100, 200, 200, nan),
+            deleted=(False, False, False, True, False),
+            comments=(None, 'plunge', None, None, '100%'),
+            line_numbers=10,
+            **kwargs
+        )
+
+    ##############################################
+
+    def test_program(self):
+
+        builder = self._builder()
+        self.assertEqual(len(builder), 5)
+        self.assertEqual(str(builder.to_program()), '\n'.join((
+            'N10 G0 X0.0 Y0.0 Z5.0',
+            'N20 G1 Z-1.0 F100.0 ; plunge',
+            'N30 X10.0 Y0.0 F200.0',
+            '/ N40 G1 X10.0 Y10.0 F200.0',
+            'N50 G0 X0.0 Y0.0 Z5.0 ; 100%',
+        )))
+
+        program = self._builder(modal=False).to_program()
+        self.assertEqual(str(program[2]), 'N30 G1 X10.0 Y0.0 F200.0')
+
+    ##############################################
+
+    def test_text(self):
+
+        builder = self._builder()
+        text = builder.to_text(decimals=2, trim_zeros=True)
+        self.assertEqual(text, '\n'.join((
+            'N10 G0 X0 Y0 Z5',
+            'N20 G1 Z-1 F100 ; plunge',
+            'N30 X10 Y0 F200',
+            '/ N40 G1 X10 Y10 F200',
+            'N50 G0 X0 Y0 Z5 ; 100%',
+        )))
+
+        fh = io.StringIO()
+        self.assertEqual(builder.write(fh, chunk_size=2), 5)
+        self.assertEqual(fh.getvalue().splitlines()[1], 'N20 G1 Z-1.000 F100.000 ; plunge')
+
+        # the text and the program are the same
+        positions = np.random.RandomState(0).uniform(-100, 100, (50, 3)).round(3)
+        builder = ProgramBuilder(positions, motion=np.arange(50) % 2, feed=1000)
+        parsed_program = GcodeParser().parse_lines(builder.to_text())
+        self.assertEqual(str(parsed_program), str(builder.to_program()))
+
+    ##############################################
+
+    def test_validation(self):
+
+        for kwargs in (
+                dict(letters='XYG'),
+                dict(letters='XYY'),
+                dict(letters='XY'),
+                dict(motion=5),
+                dict(motion=1.5),
+                dict(motion=(0, 1, 1)),
+                dict(feed=-1),
+                dict(comments=('a', 'b\nc')),
+        ):
+            with self.assertRaises(ValueError):
+                ProgramBuilder(np.zeros((2, 3)), **kwargs)
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    unittest.main()
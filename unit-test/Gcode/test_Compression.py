@@ -0,0 +1,161 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+
+from pathlib import Path
+import gzip
+import io
+import tempfile
+import unittest
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274 import Compression
+from PythonicGcodeMachine.Gcode.Rs274.Compression import (
+    decompress, detect_compression, iter_text_chunks, open_compressed,
+)
+from PythonicGcodeMachine.Gcode.Rs274.Corpus import CorpusGenerator
+from PythonicGcodeMachine.Gcode.Rs274.Lexer import GcodeLexer
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.Writer import ProgramWriter
+
+####################################################################################################
+
+SUFFIXES = {
+    'gzip': '.gz',
+    'xz': '.xz',
+    'zstd': '.zst',
+}
+
+COMPRESSIONS = [compression for compression in SUFFIXES
+                if compression != 'zstd' or Compression.zstd is not None]
+
+####################################################################################################
+
+class TestCompression(unittest.TestCase):
+
+    ##############################################
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = Path(self._directory.name)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    ##############################################
+
+    def test_open(self):
+
+        text = 'G0 X1\r\nG1 X2 ; end\n'
+        for compression in COMPRESSIONS:
+            path = self.path.joinpath('program.ngc' + SUFFIXES[compression])
+            with open_compressed(path, 'w') as fh:
+                fh.write(text)
+            data = path.read_bytes()
+            self.assertEqual(detect_compression(data), compression)
+            self.assertEqual(decompress(data), text.encode('ascii'))
+            with open_compressed(path) as fh:
+                self.assertEqual(fh.read(), 'G0 X1\nG1 X2 ; end\n')
+            with open_compressed(io.BufferedReader(io.BytesIO(data)), 'rb') as fh:
+                self.assertEqual(fh.read(), text.encode('ascii'))
+
+        # file objects without peek, the position is unchanged by the detection
+        data = gzip.compress(text.encode('ascii'))
+        with open_compressed(io.BytesIO(data), 'rb') as fh:
+            self.assertEqual(fh.read(), text.encode('ascii'))
+        with open_compressed(io.BytesIO(text.encode('ascii'))) as fh:
+            self.assertEqual(fh.read(), 'G0 X1\nG1 X2 ; end\n')
+
+        path = self.path.joinpath('program.ngc')
+        with open_compressed(path, 'w') as fh:
+            fh.write(text)
+        self.assertIsNone(detect_compression(path.read_bytes()))
+        self.assertEqual(decompress(path.read_bytes()), text.encode('ascii'))
+
+        with self.assertRaises(ValueError):
+            open_compressed(path, 'w', compression='bzip2')
+
+    ##############################################
+
+    def test_iter_text_chunks(self):
+
+        text = 'G0 X1\nG1 X2\nG1 X3'
+        chunks = list(iter_text_chunks(io.StringIO(text), chunk_size=4))
+        self.assertEqual(chunks, ['G0 X1\n', 'G1 X2\n', 'G1 X3'])
+        chunks = list(iter_text_chunks(io.StringIO(text), chunk_size=100))
+        self.assertEqual(chunks, ['G0 X1\nG1 X2\n', 'G1 X3'])
+
+    ##############################################
+
+    def test_parse_file(self):
+
+        lines = CorpusGenerator(seed=4).lines(2000)
+        lines[1500] = 'G0 X]'
+        text = '\n'.join(lines) + '\n'
+        path = self.path.joinpath('program.ngc')
+        path.write_text(text)
+        parser = GcodeParser()
+        expected_diagnostics = []
+        expected = str(parser.parse_file(path, diagnostics=expected_diagnostics))
+
+        for compression in COMPRESSIONS:
+            compressed_path = self.path.joinpath('program.ngc' + SUFFIXES[compression])
+            with open_compressed(compressed_path, 'w') as fh:
+                fh.write(text)
+            diagnostics = []
+            program = parser.parse_file(compressed_path, diagnostics=diagnostics)
+            self.assertEqual(str(program), expected)
+            self.assertEqual(diagnostics, expected_diagnostics)
+            self.assertEqual(parser.validate_lines(lines),
+                             parser._get_recognizer().validate_file(compressed_path))
+            self.assertEqual(GcodeLexer().tokenize_file(compressed_path).types.tolist(),
+                             GcodeLexer().tokenize_file(path).types.tolist())
+
+        # the line indexes of the diagnostics don't drift from chunk to chunk
+        # the text is larger than a chunk
+        lines = ['G0 X1 ; ' + 'comment ' * 25] * 8000
+        # a form feed is a line end for splitlines, the empty line is an error
+        lines[10] = 'G0 X1\x0c'
+        lines[-10] = 'G0 X]'
+        text = '\n'.join(lines) + '\n'
+        expected_diagnostics = []
+        parser.parse_text(text, expected_diagnostics)
+        diagnostics = []
+        compressed_path = self.path.joinpath('long.ngc.gz')
+        compressed_path.write_bytes(gzip.compress(text.encode('ascii')))
+        parser.parse_file(compressed_path, diagnostics=diagnostics)
+        self.assertEqual([diagnostic.line for diagnostic in diagnostics], [11, len(lines) - 9])
+        self.assertEqual(diagnostics, expected_diagnostics)
+
+        # the program is written with the compression of the suffix, or the given one
+        program.write(self.path.joinpath('output.ngc'))
+        program.write(self.path.joinpath('output.ngc.gz'))
+        ProgramWriter(compression='gzip').write(program, self.path.joinpath('output.gcode'))
+        expected = self.path.joinpath('output.ngc').read_bytes()
+        for name in ('output.ngc.gz', 'output.gcode'):
+            self.assertEqual(gzip.decompress(self.path.joinpath(name).read_bytes()), expected)
+
+####################################################################################################
+
+if __name__ == '__main__':
+    unittest.main()
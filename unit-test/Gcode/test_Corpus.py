@@ -0,0 +1,64 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+
+import unittest
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Corpus import CorpusGenerator
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+
+####################################################################################################
+
+class TestCorpus(unittest.TestCase):
+
+    ##############################################
+
+    def test_deterministic(self):
+
+        lines = CorpusGenerator(seed=1).lines(1000)
+        self.assertEqual(len(lines), 1000)
+        self.assertEqual(lines, CorpusGenerator(seed=1).lines(1000))
+        self.assertNotEqual(lines, CorpusGenerator(seed=2).lines(1000))
+        self.assertEqual(lines[-1], 'M30')
+
+        self.assertEqual(len(CorpusGenerator().lines(3)), 3)
+
+        lines = CorpusGenerator(line_numbers=True).lines(10)
+        self.assertEqual(lines[0], 'N10 (synthetic program)')
+
+    ##############################################
+
+    def test_valid(self):
+
+        mix = dict(comment=.1, expression=.1, parameter=.1, arc=.3)
+        lines = CorpusGenerator(seed=3, mix=mix, line_numbers=True).lines(2000)
+        parser = GcodeParser()
+        self.assertEqual(parser.validate_lines(lines), [])
+        program = parser.parse_lines(lines)
+        self.assertEqual(len(program), 2000)
+
+####################################################################################################
+
+if __name__ == '__main__':
+    unittest.main()
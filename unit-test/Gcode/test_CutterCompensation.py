@@ -0,0 +1,112 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+import unittest
+
+import numpy as np
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.CutterCompensation import CutterCompensation, CutterCompensationError
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.Tool import Tool, ToolSet
+from PythonicGcodeMachine.Gcode.Rs274.Toolpath import Toolpath
+
+####################################################################################################
+
+PROFILE = '''
+G0 X-10 Y-10
+G1 Z-1 F100
+{} D1 G1 X0 Y0
+X10
+Y10
+G3 X0 Y20 R10
+G1 X-5 Y10
+X0 Y0
+G40 G0 X-10 Y-10
+'''
+
+####################################################################################################
+
+class TestCutterCompensation(unittest.TestCase):
+
+    ##############################################
+
+    def _compensate(self, gcode, diameter):
+
+        parser = GcodeParser()
+        program = parser.parse_lines(gcode.strip())
+        tool_set = ToolSet()
+        tool_set.add_tool(Tool(1, 0, diameter), 1)
+        return CutterCompensation(Toolpath(program), tool_set)
+
+    ##############################################
+
+    def test_inside(self):
+
+        compensation = self._compensate(PROFILE.format('G41'), diameter=2)
+        self.assertEqual(list(compensation.gouges), [])
+        self.assertFalse(np.any(compensation.join))
+        # entry move
+        np.testing.assert_allclose(compensation.end[2,:3], (0, 1, -1))
+        # concave corner
+        np.testing.assert_allclose(compensation.end[3,:3], (9, 1, -1))
+        # arc offset toward the centre
+        np.testing.assert_allclose(compensation.start[5,:2], (9, 10))
+        radius = np.linalg.norm(compensation.end[5,:2] - compensation.centre[5,:2])
+        self.assertAlmostEqual(radius, 9)
+        # exit move
+        np.testing.assert_allclose(compensation.end[8,:3], (-10, -10, -1))
+
+    ##############################################
+
+    def test_outside(self):
+
+        compensation = self._compensate(PROFILE.format('G42'), diameter=2)
+        self.assertEqual(list(compensation.gouges), [])
+        self.assertEqual(list(np.flatnonzero(compensation.join)), [4, 6, 7])
+        np.testing.assert_allclose(compensation.join_start[4,:2], (10, -1))
+        np.testing.assert_allclose(compensation.start[4,:2], (11, 0))
+        self.assertAlmostEqual(compensation.join_lengths[4], np.pi/2)
+        self.assertEqual(compensation.join_motion[4], Toolpath.CCW_ARC)
+
+    ##############################################
+
+    def test_gouge(self):
+
+        compensation = self._compensate(PROFILE.format('G41'), diameter=30)
+        self.assertEqual(list(compensation.gouges), [3, 4, 5, 6])
+        messages = dict(compensation.diagnostics)
+        self.assertIn('arc radius', messages[5])
+
+    ##############################################
+
+    def test_missing_tool(self):
+
+        with self.assertRaises(CutterCompensationError):
+            self._compensate(PROFILE.format('G41').replace('D1', 'D2'), diameter=2)
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,162 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+
+import unittest
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274 import Ast
+from PythonicGcodeMachine.Gcode.Rs274.Corpus import CorpusGenerator
+from PythonicGcodeMachine.Gcode.Rs274.DescentParser import GcodeDescentParser
+from PythonicGcodeMachine.Gcode.Rs274.Machine import GcodeMachine
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+
+####################################################################################################
+
+LINES = (
+    'G0 X0 Y0 Z0',
+    'g0 x0 y0 z0',
+    'G0X0Y0Z0',
+    '/ G0 X0 Y0 Z0',
+    'N3.1 G0 X1.0 Y0 Z0 ; a eof comment',
+    'N3.1 (comment 1) G0 (comment 2) X1.0 (comment 3) Y0 (comment 4) Z0 ; a eof comment',
+    '#3=1. G0 X#3 Y0',
+    '#3=1. G0 X [ 1 + acos[0] - [#3 ** [4.0/2]]]',
+    'G1 X[ABS[-1] * 2 mod 3 / 4] Y[1 and 2 xor 3 or 4] Z[atan[1]/[2]]',
+    'G1 X##1 Y#[1 + 1] Z-.5',
+    'x-1.5 y.5 z-.0',
+    'N-1 G1',
+)
+
+INVALID_LINES = (
+    '',
+    'G0 X1 Q',
+    'G0 (a(b)',
+    'G0 X1 $',
+    'G0 ] $',
+    'G0 X1 = 2',
+    'G0 X[1 + ]',
+    'G0 X[1 2]',
+    'G0 X[atan[1] 2]',
+    'N1',
+    'N G0',
+    '/',
+    '; comment',
+    'G0 X1 ; comment $',
+    'G0 X1 N2',
+    '#1 G0',
+    '#1=',
+    'G0 cos[1]',
+    'G0 X1\nG1 X2',
+)
+
+####################################################################################################
+
+def ast_tree(value):
+
+    """Return a comparable representation of an AST"""
+
+    if isinstance(value, Ast.Program):
+        return [ast_tree(line) for line in value]
+    elif isinstance(value, Ast.Line):
+        return ('Line', value.deleted, value.line_number, value.comment, [ast_tree(item) for item in value])
+    elif isinstance(value, Ast.Word):
+        return ('Word', value.letter, ast_tree(value.value), value.machine)
+    elif isinstance(value, Ast.Comment):
+        return ('Comment', value.text, value.machine)
+    elif isinstance(value, Ast.ParameterSetting):
+        return ('ParameterSetting', ast_tree(value.parameter), ast_tree(value.value), value.machine)
+    elif isinstance(value, Ast.Parameter):
+        return ('Parameter', ast_tree(value.parameter), value.machine)
+    elif isinstance(value, Ast.BinaryOperation):
+        return (value.__class__.__name__, ast_tree(value.arg1), ast_tree(value.arg2))
+    elif isinstance(value, Ast.UnaryOperation):
+        return (value.__class__.__name__, ast_tree(value.arg))
+    else:
+        return (type(value).__name__, value)
+
+####################################################################################################
+
+class TestDescentParser(unittest.TestCase):
+
+    ##############################################
+
+    @classmethod
+    def setUpClass(cls):
+        cls._parser = GcodeParser()
+        cls._descent_parser = GcodeDescentParser()
+
+    ##############################################
+
+    def parse(self, parser, line):
+        try:
+            return ast_tree(parser.parse(line))
+        except Exception as exception:
+            return (type(exception), exception.args)
+
+    ##############################################
+
+    def test_lines(self):
+        for line in LINES + INVALID_LINES:
+            self.assertEqual(self.parse(self._descent_parser, line), self.parse(self._parser, line), line)
+
+    ##############################################
+
+    def test_corpus(self):
+
+        mix = dict(comment=.1, expression=.1, parameter=.1, arc=.2)
+        for seed, line_numbers in ((0, False), (1, True)):
+            text = CorpusGenerator(seed=seed, mix=mix, line_numbers=line_numbers).text(5000)
+            lines = text.splitlines()
+            expected = ast_tree(self._parser.parse_lines(lines))
+            self.assertEqual(ast_tree(self._descent_parser.parse_lines(lines)), expected)
+            self.assertEqual(ast_tree(self._descent_parser.parse_text(text + '\n')), expected)
+
+    ##############################################
+
+    def test_errors(self):
+
+        text = 'G0 X1\nG0 X1 Q\nG1 (a(b)\nG1 X2\n'
+        diagnostics = []
+        program = self._descent_parser.parse_text(text, diagnostics=diagnostics)
+        self.assertEqual(str(program), 'G0 X1\nG1 X2')
+        expected_diagnostics = []
+        self._parser.parse_text(text, diagnostics=expected_diagnostics)
+        self.assertEqual(diagnostics, expected_diagnostics)
+
+    ##############################################
+
+    def test_machine(self):
+
+        class DescentGcodeMachine(GcodeMachine):
+            PARSER_CLS = GcodeDescentParser
+
+        machine = DescentGcodeMachine()
+        self.assertIsInstance(machine.parser, GcodeDescentParser)
+        line = machine.parser.parse('G0 X1')
+        self.assertIs(line[0].machine, machine)
+
+####################################################################################################
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+import unittest
+
+import numpy as np
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.FeedPlanner import FeedPlanner
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.Toolpath import Toolpath
+
+####################################################################################################
+
+class TestFeedPlanner(unittest.TestCase):
+
+    ##############################################
+
+    def _plan(self, gcode, **kwargs):
+        program = GcodeParser().parse_lines(gcode)
+        return FeedPlanner(Toolpath(program), acceleration=1000, **kwargs)
+
+    ##############################################
+
+    def test_trapezoid(self):
+
+        # 100 mm at 100 mm/s: 5 mm to accelerate and to decelerate
+        planner = self._plan('G1 X100 F6000')
+        self.assertAlmostEqual(planner.total_time, 1.1)
+        self.assertAlmostEqual(planner.peak_feed[0], 6000)
+
+        # too short to reach the programmed feed
+        planner = self._plan('G1 X1 F6000')
+        self.assertAlmostEqual(planner.total_time, 2 * np.sqrt(1 / 1000))
+
+    ##############################################
+
+    def test_path_control(self):
+
+        gcode = '{} G1 X25 F6000\nX50\nX75\nX100'
+        continuous = self._plan(gcode.format('G64'))
+        self.assertAlmostEqual(continuous.total_time, 1.1)
+        np.testing.assert_allclose(continuous.feed[1:3], 6000)
+
+        exact_stop = self._plan(gcode.format('G61.1'))
+        self.assertAlmostEqual(exact_stop.total_time, 4 * 0.35)
+        np.testing.assert_allclose(exact_stop.exit_feed, 0)
+
+    ##############################################
+
+    def test_buffer(self):
+
+        # a small buffer cannot reach the feed rate on short motions
+        gcode = 'G1 F6000\n' + '\n'.join('X{}'.format(2*i) for i in range(1, 21))
+        unlimited = self._plan(gcode, buffer_size=100)
+        buffered = self._plan(gcode, buffer_size=2)
+        self.assertAlmostEqual(np.max(unlimited.peak_feed), 6000)
+        self.assertLess(np.max(buffered.peak_feed), 6000)
+        self.assertGreater(buffered.total_time, unlimited.total_time)
+
+    ##############################################
+
+    def test_corner(self):
+
+        corner = self._plan('G64 G1 X50 F6000\nY50')
+        self.assertTrue(0 < corner.exit_feed[0] < 6000)
+        exact_path = self._plan('G61 G1 X50 F6000\nY50')
+        self.assertEqual(exact_path.exit_feed[0], 0)
+        self.assertGreater(exact_path.total_time, corner.total_time)
+
+    ##############################################
+
+    def test_dwell(self):
+
+        planner = self._plan('G1 X100 F6000\nG4 P2.5')
+        self.assertAlmostEqual(planner.time[1], 2.5)
+        self.assertAlmostEqual(planner.total_time, 3.6)
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,184 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+
+import random
+import unittest
+
+import numpy as np
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Corpus import CorpusGenerator
+from PythonicGcodeMachine.Gcode.Rs274.Interpreter import GcodeInterpreter
+from PythonicGcodeMachine.Gcode.Rs274.MachineState import MachineState, MotionMode
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.Toolpath import Toolpath
+
+####################################################################################################
+
+class TestInterpreter(unittest.TestCase):
+
+    ##############################################
+
+    def _corpus(self, number_of_lines):
+
+        """Return a generated program with axis offsets, home motions and radius format arcs"""
+
+        rng = random.Random(3)
+        extra_lines = (
+            lambda: 'G92 X{:.3f} Y{:.3f}'.format(rng.uniform(-10, 10), rng.uniform(-10, 10)),
+            lambda: 'G92.{}'.format(rng.randint(1, 3)),
+            lambda: rng.choice(('G28', 'G30')),
+            lambda: 'G{} X{:.3f} Y{:.3f} R{:.3f} F500'.format(
+                rng.choice((2, 3)), rng.uniform(-50, 50), rng.uniform(-50, 50), rng.uniform(-60, 60)),
+            lambda: 'G10 L2 P1 X{:.3f}'.format(rng.uniform(-5, 5)),
+        )
+        lines = []
+        for line in CorpusGenerator(seed=3).lines(number_of_lines):
+            lines.append(line)
+            if rng.random() < .05:
+                lines.append(rng.choice(extra_lines)())
+        return lines
+
+    ##############################################
+
+    def test_toolpath(self):
+
+        parameters = {5161: 1., 5162: 2., 5181: 3., 5182: 4., 5211: 5.}
+        program = GcodeParser().parse_lines(self._corpus(2000))
+        interpreter = GcodeInterpreter(parameters=parameters)
+        positions = []
+        lengths = []
+        for line in program:
+            block = interpreter.execute(line)
+            positions.append(interpreter.position)
+            lengths.append(block.length if block is not None else 0)
+
+        toolpath = Toolpath(program, parameters=parameters)
+        np.testing.assert_allclose(positions, toolpath.end[:,:3])
+        np.testing.assert_allclose(lengths, np.nan_to_num(toolpath.lengths), atol=1e-9)
+
+    ##############################################
+
+    def test_blocks(self):
+
+        parser = GcodeParser()
+        state = MachineState(number_of_axes=3)
+        interpreter = GcodeInterpreter(state, parameters={5221: 10.}, rapid_feed=6000)
+
+        def execute(line):
+            return interpreter.execute(parser.parse(line))
+
+        block = execute('G0 X10 Y0')
+        self.assertEqual(block.motion, MotionMode.RAPID)
+        self.assertEqual(block.end, (20., 0., 0.))
+        self.assertAlmostEqual(block.duration, 20 / 6000 * 60)
+
+        block = execute('G20 G91 G1 Y1 F10')
+        self.assertEqual(block.end, (20., 25.4, 0.))
+        self.assertAlmostEqual(block.duration, 6.)
+
+        block = execute('G21 G90 G3 X0 Y35.4 I-10 J0 F100')
+        self.assertAlmostEqual(block.length, np.pi / 2 * 10)
+
+        block = execute('G4 P2.5')
+        self.assertIsNone(block.motion)
+        self.assertEqual(block.duration, 2.5)
+
+        self.assertIsNone(execute('#1=2 S1000 M3'))
+        self.assertEqual(execute('G53 G0 X#1').end[0], 2.)
+
+        for line in ('G80 X1', 'G2 X-8 R1', 'G2 X1', 'G93 G1 X2 F0'):
+            with self.assertRaises(ValueError):
+                execute(line)
+
+    ##############################################
+
+    def test_offsets_and_home(self):
+
+        parser = GcodeParser()
+        interpreter = GcodeInterpreter(parameters={5161: 1., 5162: 2.})
+
+        def execute(line):
+            return interpreter.execute(parser.parse(line))
+
+        execute('G0 X10 Y10')
+        self.assertIsNone(execute('G92 X0 Y0'))
+        self.assertEqual(interpreter.axis_offset, (10., 10., 0.))
+        self.assertEqual(interpreter.parameters[5211], 10.)
+        self.assertEqual(execute('G0 X5').end, (15., 10., 0.))
+
+        block = execute('G28')
+        self.assertEqual(block.motion, MotionMode.RAPID)
+        self.assertEqual(block.end, (1., 2., 0.))
+        self.assertEqual(execute('G0 X1').end, (11., 2., 0.))
+
+        execute('G92.2')
+        self.assertEqual(execute('G0 X1').end, (1., 2., 0.))
+        execute('G92.3')
+        self.assertEqual(execute('G0 X1').end, (11., 2., 0.))
+        execute('G92.1')
+        self.assertEqual(interpreter.parameters[5211], 0.)
+        self.assertEqual(execute('G0 X1').end, (1., 2., 0.))
+
+        execute('G0 X0 Y0')
+        block = execute('G2 X20 R10 F100')
+        self.assertEqual(block.end, (20., 0., 0.))
+        self.assertAlmostEqual(block.length, np.pi * 10)
+        block = execute('G2 X0 R-10')
+        self.assertAlmostEqual(block.length, np.pi * 10)
+
+    ##############################################
+
+    def test_rejected_line(self):
+
+        # a rejected line leaves the state unchanged
+        parser = GcodeParser()
+        state = MachineState(number_of_axes=3)
+        interpreter = GcodeInterpreter(state)
+
+        def execute(line):
+            return interpreter.execute(parser.parse(line))
+
+        execute('G1 X1 F100')
+        for line in ('G2 X2 Y2 F200 G20 G91', 'G81 X1 Y1 Z-1 R1', 'G1 X1 S-1'):
+            try:
+                execute(line)
+            except ValueError:
+                pass
+            else:
+                self.fail(line)
+        self.assertEqual(state.motion_mode, MotionMode.LINEAR)
+        self.assertEqual(state.feed_rate, 100)
+        self.assertTrue(state.use_metric)
+        self.assertTrue(state.use_absolut)
+        self.assertEqual(interpreter.position, (1., 0., 0.))
+
+        block = execute('X3')
+        self.assertEqual(block.motion, MotionMode.LINEAR)
+        self.assertEqual(block.end, (3., 0., 0.))
+
+####################################################################################################
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+import unittest
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Machine import GcodeMachine
+from PythonicGcodeMachine.Gcode.Rs274.Minifier import ProgramMinifier, format_minimal_number
+
+####################################################################################################
+
+PROGRAM = '\n'.join((
+    'N10 G21 G90 G17 G0 X0 Y0 Z5',
+    'N20 G1 Z-1 F100.000',
+    'N30 G1 X10.000 Y0.000 F100.000 (cut)',
+    'N40 G1 X10.000 Y10.000 F100.000',
+    'N50 G1 X10.000 Y10.000 ; nothing',
+    'N60 G2 X0 Y10 I-5 J0',
+    'N70 G1 X0 Y10 F200',
+    'N80 G91 G1 X0 Y1',
+    'N90 G90 G1 X0 Y11',
+    'N100 G28',
+    'N110 G0 X0 Y11 Z5',
+    'M3 S1000',
+    'M3 S1000',
+    'M5 M30',
+))
+
+####################################################################################################
+
+class TestMinifier(unittest.TestCase):
+
+    ##############################################
+
+    @classmethod
+    def setUpClass(cls):
+        cls._machine = GcodeMachine()
+
+    ##############################################
+
+    def _program(self, gcode=PROGRAM):
+        return self._machine.parser.parse_lines(gcode)
+
+    ##############################################
+
+    def test_format(self):
+
+        for value, text in (
+                (1, '1'),
+                (1., '1'),
+                (0.5, '.5'),
+                (-0.25, '-.25'),
+                (-0., '0'),
+                (0.00001, '.00001'),
+                (0.30000000000000004, '.30000000000000004'),
+        ):
+            self.assertEqual(format_minimal_number(value), text)
+
+    ##############################################
+
+    def test_minify(self):
+
+        minifier = ProgramMinifier(self._program())
+        self.assertEqual(minifier.to_text().split('\n'), [
+            'N10G21G90G17G0X0Y0Z5',
+            'N20G1Z-1F100',
+            'N30X10(cut)',
+            'N40Y10',
+            'N50(nothing)',
+            # the position is unknown after an arc, an incremental motion or G28
+            'N60G2X0Y10I-5J0',
+            'N70G1X0Y10F200',
+            'N80G91X0Y1',
+            'N90G90X0Y11',
+            'N100G28',
+            'N110G0X0Y11Z5',
+            'M3S1000',
+            'M5M30',
+        ])
+        self.assertTrue(minifier.verify())
+
+    ##############################################
+
+    def test_strip(self):
+
+        minifier = ProgramMinifier(self._program(), strip_line_numbers=True, strip_comments=True, decimals=3)
+        lines = minifier.to_text(compact=False).split('\n')
+        self.assertEqual(lines[:4], ['G21 G90 G17 G0 X0 Y0 Z5', 'G1 Z-1 F100', 'X10', 'Y10'])
+        self.assertEqual(len(lines), 12)
+        report = minifier.report
+        self.assertEqual(report['minified_lines'], 12)
+        self.assertLess(report['minified_bytes'], report['bytes'] / 2)
+        self.assertTrue(minifier.verify())
+
+    ##############################################
+
+    def test_rounding(self):
+
+        minifier = ProgramMinifier(self._program('G1 X1.00001 F100\nX1.00002\nX1.5'), decimals=3)
+        self.assertEqual(minifier.to_text().split('\n'), ['G1X1F100', 'X1.5'])
+        self.assertTrue(minifier.verify())
+
+    ##############################################
+
+    def test_keep(self):
+
+        gcode = '\n'.join((
+            'G0 X0 Y0 M8',
+            'G0 X0 Y0 M8',
+            'G91 G0 X0 Y0',
+            'G90 G81 X1 Y1 Z-1 R1',
+            'G81 X1 Y1 Z-1 R1',
+            'G93 G1 X2 F10',
+            'G1 X3 F10',
+        ))
+        minifier = ProgramMinifier(self._program(gcode))
+        self.assertEqual(minifier.to_text().split('\n'), [
+            'G0X0Y0M8',
+            'M8',
+            'G91X0Y0',
+            # canned cycles are repeated
+            'G90G81X1Y1Z-1R1',
+            'X1Y1Z-1R1',
+            # inverse time feed rate is required on each line
+            'G93G1X2F10',
+            'X3F10',
+        ])
+
+    ##############################################
+
+    def test_units_and_offsets(self):
+
+        # the positions and the feed rate are forgotten after a change of units or tool length offset
+        for gcode, expected in (
+                ('G21 G1 X1 F100\nG20\nG1 X1 F100', ['G21G1X1F100', 'G20', 'X1F100']),
+                ('G0 X0 Y0 Z10\nG43 H2\nG0 X0 Y0 Z10', ['G0X0Y0Z10', 'G43H2', 'X0Y0Z10']),
+                ('G1 X1 F100\nG41 D1\nG1 X1 F100\nG40', ['G1X1F100', 'G41D1', 'X1F100', 'G40']),
+                ('G1 X1 F100\nG92 X0\nG1 X1 F100', ['G1X1F100', 'G92X0', 'X1F100']),
+        ):
+            minifier = ProgramMinifier(self._program(gcode))
+            self.assertEqual(minifier.to_text().split('\n'), expected)
+
+        config = self._machine.config
+        self.assertEqual(config.gcodes['G20'].modal_group.key, ('G', 6))
+        self.assertEqual(config.gcodes['G43'].modal_group.key, ('G', 8))
+        self.assertEqual(config.gcodes['M6'].modal_group.key, ('M', 6))
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    unittest.main()
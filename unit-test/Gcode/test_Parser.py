@@ -20,8 +20,12 @@
 
 ####################################################################################################
 
+from pathlib import Path
+import tempfile
 import unittest
 
+import numpy as np
+
 ####################################################################################################
 
 from PythonicGcodeMachine.Gcode.Rs274.Lexer import GcodeLexer, GcodeLexerError
@@ -80,6 +84,98 @@ class TestGcodeLexer(unittest.TestCase):
             with self.assertRaises(GcodeLexerError):
                 list(lexer.tokenize(gcode))
 
+    ##############################################
+
+    def test_whole_buffer(self):
+
+        lexer = GcodeLexer()
+        tokens = list(lexer.tokenize('G0 X1 (a)\r\nG1 Y2 ; b\nM2\n'))
+        self.assertEqual([token.type for token in tokens], [
+            'G', 'POSITIVE_INTEGER', 'X', 'POSITIVE_INTEGER', 'INLINE_COMMENT', 'END_OF_BLOCK',
+            'G', 'POSITIVE_INTEGER', 'Y', 'POSITIVE_INTEGER', 'EOF_COMMENT', 'END_OF_BLOCK',
+            'M', 'POSITIVE_INTEGER', 'END_OF_BLOCK',
+        ])
+        self.assertEqual([token.lineno for token in tokens], [1]*6 + [2]*6 + [3]*3)
+        self.assertEqual(tokens[10].value, 'b')
+
+        # a comment is not continued on the next line
+        with self.assertRaises(GcodeLexerError):
+            list(lexer.tokenize('G0 (a\n) X1'))
+
+    ##############################################
+
+    def test_tokenize_array(self):
+
+        lexer = GcodeLexer()
+        text = 'N10 g0 X-1.5 (a) Y[2 + cos[.5]] ; b\n#3=1.\nG1 x#3\n'
+        tokens = list(lexer.tokenize(text))
+        token_array = lexer.tokenize_array(text)
+        self.assertEqual(token_array.types.dtype, np.uint8)
+        self.assertEqual(token_array.starts.dtype, np.uint32)
+        self.assertEqual(token_array.values.dtype, np.float64)
+        self.assertEqual([lexer.tokens[code] for code in token_array.types], [token.type for token in tokens])
+        self.assertEqual(token_array.starts.tolist(), [token.lexpos for token in tokens])
+        self.assertEqual(text[token_array.starts[6]:token_array.ends[6]], '(a)')
+        for token, value in zip(tokens, token_array.values.tolist()):
+            if isinstance(token.value, (int, float)):
+                self.assertEqual(value, token.value)
+            else:
+                self.assertTrue(np.isnan(value))
+        self.assertEqual(lexer.token_code('X'), lexer.tokens.index('X'))
+
+        self.assertEqual(lexer.tokenize_array('').types.shape, (0,))
+        for text, position in (('G0 X1 $', 6), ('G0 (a(b)', 5), ('G0 X1  ', None)):
+            if position is None:
+                lexer.tokenize_array(text)
+            else:
+                with self.assertRaises(GcodeLexerError) as context:
+                    lexer.tokenize_array(text)
+                self.assertEqual(context.exception.args, (position,))
+
+    ##############################################
+
+    def test_normalize(self):
+
+        lexer = GcodeLexer()
+        text = 'G0 X[ABS[-1]] (Keep Case) Y1 ; Keep Case\nG1 (A(B) Z2'
+        normalized_text = 'g0 x[abs[-1]] (Keep Case) y1 ; Keep Case\ng1 (A(B) z2'
+        self.assertEqual(lexer.normalize(text), normalized_text)
+        self.assertEqual(lexer.normalize(text.encode('ascii')), normalized_text.encode('ascii'))
+        self.assertEqual(lexer.normalize('G0 X1'), 'g0 x1')
+
+        parser = GcodeParser()
+        self.assertEqual(str(parser.parse('G0 X[ABS[-1] + COS[0]] (KeEp)')), 'G0 X[abs[-1] + cos[0]] (KeEp)')
+
+    ##############################################
+
+    def test_tokenize_bytes(self):
+
+        lexer = GcodeLexer()
+        text = 'N10 G0 X-1.5 (été) Y2 ; b\nG1 x2\n'
+        token_array = lexer.tokenize_array(text)
+        data = text.encode('utf-8')
+        for buffer in (data, bytearray(data), memoryview(data)):
+            binary_token_array = lexer.tokenize_array(buffer)
+            self.assertEqual(binary_token_array.types.tolist(), token_array.types.tolist())
+            np.testing.assert_array_equal(binary_token_array.values, token_array.values)
+            self.assertEqual(
+                [lexer.token_value(buffer, binary_token_array, i) for i in range(len(token_array.types))],
+                [token.value for token in lexer.tokenize(text)],
+            )
+        # byte offsets
+        self.assertEqual(binary_token_array.starts[7] - token_array.starts[7], 2)
+
+        with self.assertRaises(GcodeLexerError) as context:
+            lexer.tokenize_array(b'G0 (a(b)')
+        self.assertEqual(context.exception.args, (5,))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory).joinpath('program.ngc')
+            path.write_bytes(data)
+            self.assertEqual(lexer.tokenize_file(path).types.tolist(), token_array.types.tolist())
+            path.write_bytes(b'')
+            self.assertEqual(lexer.tokenize_file(path).types.shape, (0,))
+
 ####################################################################################################
 
 class TestGcodeParser(unittest.TestCase):
@@ -128,6 +224,94 @@ class TestGcodeParser(unittest.TestCase):
         #     with self.assertRaises(GcodeLexerError):
         #         list(lexer.tokenize(gcode))
 
+    ##############################################
+
+    def test_line_cache(self):
+
+        lines = ['G0 Z5.', 'G1 X1 Y2 F100', ' G0 Z5. ', 'M5', 'G0 Z5.', 'G1 X1 Y2 F100']
+
+        parser = GcodeParser(line_cache_size=2)
+        program = parser.parse_lines(lines)
+        self.assertEqual(str(program), str(GcodeParser().parse_lines(lines)))
+        # the 'M5' line evicts 'G1 X1 Y2 F100'
+        self.assertEqual(tuple(parser.line_cache_info), (2, 4, 2, 2))
+        # hits are copies
+        self.assertIsNot(program[0], program[2])
+        program[0][1].value = 10
+        self.assertEqual(str(program[4]), 'G0 Z5.0')
+
+        parser = GcodeParser(line_cache_size=16, share_lines=True)
+        program = parser.parse_lines(lines)
+        self.assertIs(program[0], program[4])
+        self.assertEqual(parser.line_cache_info.hits, 3)
+        parser.clear_line_cache()
+        self.assertEqual(tuple(parser.line_cache_info), (0, 0, 16, 0))
+
+    ##############################################
+
+    def test_diagnostics(self):
+
+        parser = GcodeParser()
+        lines = ['G0 X1', '  G0 X1 Q', 'G0 X[1', 'G0 (a(b)', 'G1 X2 $', 'G1 X2']
+
+        with self.assertRaises(GcodeParserError):
+            parser.parse_lines(lines)
+
+        diagnostics = []
+        program = parser.parse_lines(lines, diagnostics=diagnostics)
+        self.assertEqual(str(program), 'G0 X1\nG1 X2')
+        self.assertEqual([diagnostic[:3] for diagnostic in diagnostics], [
+            (1, 9, ''),
+            (2, 6, ''),
+            (3, 5, '(b)'),
+            (4, 6, '$'),
+        ])
+        self.assertEqual(diagnostics[0].message, 'unexpected end of line')
+        self.assertIn('POSITIVE_REAL', diagnostics[0].expected)
+        self.assertIn('RIGHT_BRACKET', diagnostics[1].expected)
+        self.assertNotIn('X', diagnostics[1].expected)
+        self.assertEqual(diagnostics[3].message, "unexpected '$'")
+
+    ##############################################
+
+    def test_parse_text(self):
+
+        parser = GcodeParser()
+        base_text = '\n'.join((
+            'N10 G0 X1 Y2 ; rapid',
+            '/ G1 X[1 + #3] (move) Y2',
+            '#3=1.5',
+            'G2 X1 Y2 I0.5 J-0.5',
+        ))
+        for one_pass in (False, True):
+            for text in (base_text, base_text + '\n', base_text.replace('\n', '\r\n') + '\r\n'):
+                program = parser.parse_text(text, one_pass=one_pass)
+                self.assertEqual(str(program), str(parser.parse_lines(text.splitlines())))
+                self.assertEqual(len(program), 4)
+                self.assertTrue(program[1].deleted)
+                self.assertEqual(program[0].line_number, 10)
+                self.assertEqual(program[0].comment, 'rapid')
+            self.assertEqual(len(parser.parse_text('', one_pass=one_pass)), 0)
+
+            # the errors are reported line per line
+            error_text = 'G0 X1\nG0 X1 Q\nG1 X2\n'
+            with self.assertRaises(GcodeParserError):
+                parser.parse_text(error_text, one_pass=one_pass)
+            diagnostics = []
+            program = parser.parse_text(error_text, diagnostics=diagnostics, one_pass=one_pass)
+            self.assertEqual(str(program), 'G0 X1\nG1 X2')
+            self.assertEqual(diagnostics[0][:3], (1, 7, ''))
+
+            # the parser is reusable after an error
+            self.assertEqual(str(parser.parse_text('G0 X1\nG1 X2', one_pass=one_pass)), 'G0 X1\nG1 X2')
+
+        # the state of the lexer is reset before each program
+        line_numbers = []
+        for _ in range(2):
+            parser.parse_text('G0 X1\nG1 X2\n', one_pass=True)
+            line_numbers.append(parser._lexer._lexer.lineno)
+        self.assertEqual(line_numbers, [3, 3])
+
 ####################################################################################################
 
 if __name__ == '__main__':
@@ -0,0 +1,118 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+
+import gc
+import threading
+import unittest
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Corpus import CorpusGenerator
+from PythonicGcodeMachine.Gcode.Rs274.DescentParser import GcodeDescentParser
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.ParserPool import ParserPool
+
+####################################################################################################
+
+NUMBER_OF_THREADS = 4
+
+####################################################################################################
+
+class TestParserPool(unittest.TestCase):
+
+    ##############################################
+
+    def _parse_in_threads(self, pool, texts):
+
+        results = [None] * len(texts)
+        barrier = threading.Barrier(len(texts))
+
+        def run(i):
+            barrier.wait()
+            for _ in range(3):
+                with pool as parser:
+                    results[i] = str(parser.parse_text(texts[i], one_pass=True))
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(texts))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    ##############################################
+
+    def test_threads(self):
+
+        texts = [CorpusGenerator(seed=seed).text(500) for seed in range(NUMBER_OF_THREADS)]
+        expected = [str(GcodeParser().parse_text(text)) for text in texts]
+
+        for parser_cls in (GcodeParser, GcodeDescentParser):
+            pool = ParserPool(parser_cls=parser_cls, collect_stats=True)
+            self.assertEqual(self._parse_in_threads(pool, texts), expected)
+            self.assertEqual(len(pool), NUMBER_OF_THREADS)
+            stats = pool.stats
+            self.assertEqual(stats.counter('lines'), 3 * NUMBER_OF_THREADS * 500)
+            self.assertEqual(stats.calls('parse'), 3 * NUMBER_OF_THREADS)
+
+    ##############################################
+
+    def test_release(self):
+
+        # the parser of a thread which ended is released, but its statistics are kept
+        pool = ParserPool(collect_stats=True)
+
+        def run():
+            with pool as parser:
+                parser.parse_text('G0 X1\nG1 Y2\n')
+
+        for _ in range(NUMBER_OF_THREADS):
+            thread = threading.Thread(target=run)
+            thread.start()
+            thread.join()
+        gc.collect()
+        self.assertEqual(len(pool._parsers), 0)
+        self.assertEqual(len(pool), NUMBER_OF_THREADS)
+        self.assertEqual(pool.stats.counter('lines'), 2 * NUMBER_OF_THREADS)
+
+    ##############################################
+
+    def test_clone(self):
+
+        parser = GcodeParser()
+        pool = ParserPool(parser)
+        with pool as clone:
+            self.assertIsNot(clone, parser)
+            self.assertIs(pool.get(), clone)
+            self.assertIs(clone._parser.action, parser._parser.action)
+            line = clone.parse('G0 X1 Y2')
+            self.assertEqual(str(line), 'G0 X1 Y2')
+        # the grammar actions of the clone don't use the state of the template
+        self.assertIsNone(parser._line)
+        self.assertEqual(str(parser.parse('G1 X3')), 'G1 X3')
+        self.assertIsNone(pool.stats)
+
+####################################################################################################
+
+if __name__ == '__main__':
+    unittest.main()
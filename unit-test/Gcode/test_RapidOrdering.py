@@ -0,0 +1,110 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+import unittest
+
+import numpy as np
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.RapidOrdering import RapidOrdering
+from PythonicGcodeMachine.Gcode.Rs274.Toolpath import Toolpath
+
+####################################################################################################
+
+def slots(positions, traverse='G0 X{} Y{}'):
+    gcode = []
+    for x, y in positions:
+        gcode += [traverse.format(x, y), 'G1 Z-1 F100', 'G1 X{} F200'.format(x + 1), 'G0 Z5']
+    return gcode
+
+####################################################################################################
+
+class TestRapidOrdering(unittest.TestCase):
+
+    ##############################################
+
+    def _order(self, gcode):
+        toolpath = Toolpath(GcodeParser().parse_lines('\n'.join(gcode)))
+        ordering = RapidOrdering(toolpath, rapid_feed=6000)
+        new_toolpath = Toolpath(ordering.to_program())
+        return toolpath, ordering, new_toolpath
+
+    ##############################################
+
+    def _cuts(self, toolpath):
+        is_cut = toolpath.motion == Toolpath.LINEAR
+        segments = np.hstack((toolpath.start[is_cut,:3], toolpath.end[is_cut,:3]))
+        return segments[np.lexsort(segments.T[::-1])]
+
+    ##############################################
+
+    def test_reorder(self):
+
+        gcode = (['G21 G90 T1 M6', 'S1000 M3', 'G0 Z5'] +
+                 slots([(50, 0), (0, 0), (40, 0), (10, 0), (30, 0), (20, 0)]) +
+                 ['G0 X0 Y0', 'M5', 'M30'])
+        toolpath, ordering, new_toolpath = self._order(gcode)
+
+        self.assertEqual(ordering.blocks, [(0, 6)])
+        self.assertEqual(ordering.order, [1, 3, 5, 4, 2, 0])
+        report = ordering.report
+        self.assertAlmostEqual(report['rapid_distance'], 201)
+        self.assertAlmostEqual(report['new_rapid_distance'], 45)
+        self.assertAlmostEqual(report['saved_time'], 156 / 100)
+
+        np.testing.assert_allclose(self._cuts(new_toolpath), self._cuts(toolpath))
+        self.assertEqual(len(new_toolpath), len(toolpath))
+
+    ##############################################
+
+    def test_barrier(self):
+
+        # the coolant command splits the groups in two blocks
+        gcode = (['G0 Z5'] +
+                 slots([(30, 0), (0, 0), (20, 0)]) +
+                 ['G0 X0 Y0 M8', 'G1 Z-1', 'G0 Z5'] +
+                 slots([(30, 0), (0, 0), (20, 0)]))
+        toolpath, ordering, new_toolpath = self._order(gcode)
+
+        self.assertEqual(ordering.blocks, [(0, 3), (4, 7)])
+        np.testing.assert_allclose(self._cuts(new_toolpath), self._cuts(toolpath))
+
+    ##############################################
+
+    def test_traverse(self):
+
+        # the groups only set X, a traverse is added and the position is restored at the end
+        gcode = (['G0 X0 Y0 Z5', 'G1 F100'] +
+                 slots([(30, None), (0, None), (20, None)], 'G0 X{}') +
+                 ['G91 G0 X1'])
+        toolpath, ordering, new_toolpath = self._order(gcode)
+
+        np.testing.assert_allclose(self._cuts(new_toolpath), self._cuts(toolpath))
+        np.testing.assert_allclose(new_toolpath.end[-1], toolpath.end[-1])
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,90 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+import unittest
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Lexer import GcodeLexerError
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser, GcodeParserError
+from PythonicGcodeMachine.Gcode.Rs274.Recognizer import ErrorPosition, GcodeRecognizer
+
+####################################################################################################
+
+VALID_LINES = (
+    'G0 X0 Y0 Z0',
+    'g0 x0 y0 z0',
+    'G0X0Y0Z0',
+    '/ G0 X0 Y0 Z0',
+    'N3.1 G0 X1.0 Y0 Z0 ; a eof comment',
+    'N3.1 (comment 1) G0 (comment 2) X1.0 (comment 3) Y0 (comment 4) Z0 ; a eof comment',
+    '#3=1. G0 X#3 Y0',
+    '#3=1. G0 X [ 1 + acos[0] - [#3 ** [4.0/2]]]',
+    'x-1.5 y.5 z-.0',
+)
+
+INVALID_LINES = (
+    'G0 X1 Q',
+    'G0 (a(b)',
+    'G0 X1 $',
+    'G0 ] $',
+    'G0 X1 = 2',
+    'N1 N2 G0',
+)
+
+####################################################################################################
+
+class TestRecognizer(unittest.TestCase):
+
+    ##############################################
+
+    def test_recognizer(self):
+
+        parser = GcodeParser()
+        recognizer = GcodeRecognizer(parser)
+
+        for line in VALID_LINES:
+            self.assertTrue(recognizer.is_valid(line), line)
+
+        # the errors are located as by the parser
+        for line in INVALID_LINES:
+            self.assertFalse(recognizer.is_valid(line), line)
+            with self.assertRaises((GcodeParserError, GcodeLexerError)) as context:
+                parser.parse(line)
+            self.assertEqual(recognizer.recognize(line), context.exception.args[0], line)
+
+        lines = list(VALID_LINES) + ['  G0 X[1', ' ', '']
+        self.assertEqual(parser.validate_lines(lines), [
+            ErrorPosition(len(VALID_LINES), 8),
+            ErrorPosition(len(VALID_LINES) + 1, 1),
+            ErrorPosition(len(VALID_LINES) + 2, 0),
+        ])
+        # the cached results are reused
+        self.assertEqual(parser.validate_lines('\n'.join(INVALID_LINES * 2))[6:],
+                         [ErrorPosition(i + 6, error.column)
+                          for i, error in enumerate(parser.validate_lines(list(INVALID_LINES)))])
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,141 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.DescentParser import GcodeDescentParser
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.Serialization import (
+    ProgramCache, ProgramSerializer, SerializationError, SerializedProgram,
+)
+
+####################################################################################################
+
+SOURCE = '\n'.join((
+    'N10 G1 X0.30000000000000004 Y-1 F100 ; cut',
+    '/ G0 X1.5 (rapid)',
+    '#1=2.25 G1 Z[1 + #2] X[sin[30] / [2 ** 3]] Y#3',
+    '#4=[2 * 3] M3 S1000 (rapid)',
+    'G61.1 M5',
+)) + '\n'
+
+####################################################################################################
+
+class TestSerialization(unittest.TestCase):
+
+    ##############################################
+
+    @classmethod
+    def setUpClass(cls):
+        cls._parser = GcodeParser()
+        cls._program = cls._parser.parse_lines(SOURCE.splitlines())
+
+    ##############################################
+
+    def test_round_trip(self):
+
+        source_hash = ProgramSerializer.hash(SOURCE)
+        data = ProgramSerializer.dumps(self._program, source_hash)
+        serialized_program = SerializedProgram(data)
+
+        self.assertEqual(serialized_program.source_hash, source_hash)
+        self.assertEqual(len(serialized_program), 5)
+        program = serialized_program.to_program()
+        self.assertEqual(str(program), str(self._program))
+        self.assertIsInstance(program[0][0].value, int)
+        self.assertEqual(program[0].line_number, 10)
+        self.assertFalse(program[1])
+
+        # zero-copy columns
+        is_x = serialized_program.item_letter == ord('X')
+        self.assertEqual(serialized_program.item_value[is_x & (serialized_program.item_node == -1)].tolist(),
+                         [0.30000000000000004, 1.5])
+        self.assertFalse(serialized_program.item_value.flags.writeable)
+        # the comments are shared in the string pool
+        self.assertEqual(serialized_program.string_offset.shape[0], 3)
+        self.assertEqual(serialized_program.string(0), 'cut')
+
+    ##############################################
+
+    def test_errors(self):
+
+        data = ProgramSerializer.dumps(self._program)
+        for bad_data in (
+                b'',
+                b'XXXX' + data[4:],
+                data[:-8],
+        ):
+            with self.assertRaises(SerializationError):
+                SerializedProgram(bad_data)
+
+    ##############################################
+
+    def test_cache(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'program.ngc')
+            with open(path, 'w') as fh:
+                fh.write(SOURCE)
+
+            cache = ProgramCache(os.path.join(directory, 'cache'))
+            parser = GcodeParser(cache=cache)
+            program = parser.parse_file(path)
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+            cached_program = parser.parse_file(path)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            self.assertEqual(str(cached_program), str(program))
+
+            # a modified source is parsed again
+            with open(path, 'a') as fh:
+                fh.write('G0 X0\n')
+            program = parser.parse_file(path)
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+            self.assertEqual(len(program), 6)
+
+            # a corrupted entry is a miss
+            entry_path = cache.path(ProgramSerializer.hash(SOURCE), parser.cache_key())
+            with open(str(entry_path), 'wb') as fh:
+                fh.write(b'PGCM')
+            with open(path, 'w') as fh:
+                fh.write(SOURCE)
+            self.assertEqual(str(parser.parse_file(path)), str(cached_program))
+            self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+            # the programs of another parser class are not shared
+            self.assertNotEqual(GcodeDescentParser.cache_key(), parser.cache_key())
+            descent_parser = GcodeDescentParser(cache=cache)
+            self.assertEqual(str(descent_parser.parse_file(path)), str(cached_program))
+            self.assertEqual((cache.hits, cache.misses), (1, 4))
+            descent_parser.parse_file(path)
+            self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,182 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+import unittest
+
+import numpy as np
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.Simplification import PolylineSimplification
+from PythonicGcodeMachine.Gcode.Rs274.Toolpath import Toolpath
+
+####################################################################################################
+
+class TestSimplification(unittest.TestCase):
+
+    ##############################################
+
+    def _simplify(self, gcode, tolerance=0.01):
+        toolpath = Toolpath(GcodeParser().parse_lines(gcode))
+        simplification = PolylineSimplification(toolpath, tolerance)
+        return simplification, str(simplification.to_program(decimals=6)).split('\n')
+
+    ##############################################
+
+    def test_collinear(self):
+
+        simplification, lines = self._simplify('\n'.join((
+            'G21 G90 G0 X0 Y0',
+            'G1 F100',
+            'X1 Y0.001',
+            'X2',
+            'X3 Y0.002',
+            'X4 Y1',
+            'Y2 ; keep',
+            'Y3',
+            'M5',
+        )))
+        self.assertEqual(lines, [
+            'G21 G90 G0 X0 Y0',
+            'G1 F100',
+            'X3 Y0.002',
+            'X4 Y1',
+            'Y2 ; keep',
+            'Y3',
+            'M5',
+        ])
+        report = simplification.report
+        self.assertEqual(report['lines'], 9)
+        self.assertEqual(report['removed_lines'], 2)
+
+    ##############################################
+
+    def test_missing_words(self):
+
+        # Y must be written when the line which sets it is removed
+        simplification, lines = self._simplify('\n'.join((
+            'G1 X0 Y0 F100',
+            'X1',
+            'Y0.001',
+            'X2',
+        )))
+        self.assertEqual(lines, ['G1 X0 Y0 F100', 'X2 Y0.001'])
+
+        # the first line of the program is removed
+        simplification, lines = self._simplify('G1 X1 Y1\nX2 ; keep\nG0 X0 Y1', tolerance=1)
+        self.assertEqual(lines, ['G1 X2 Y1.0 ; keep', 'G0 X0 Y1'])
+
+    ##############################################
+
+    def test_incremental(self):
+
+        simplification, lines = self._simplify('\n'.join((
+            'G91 G1 X1 F100',
+            'X1',
+            'X1',
+            'X1 Y1',
+        )))
+        self.assertEqual(lines, ['G91 G1 X1 F100', 'X2.0', 'X1 Y1'])
+
+    ##############################################
+
+    def test_removed_motion_mode(self):
+
+        # the G1 of a removed line must be restored, else the next lines are rapid motions
+        simplification, lines = self._simplify('\n'.join((
+            'G0 X0 Y0 F100',
+            'G1 X1 Y0',
+            'X2 Y0',
+            'X3 Y0',
+            'X3 Y5',
+        )))
+        self.assertEqual(lines, ['G0 X0 Y0 F100', 'G1 X3 Y0', 'X3 Y5'])
+        new_toolpath = Toolpath(GcodeParser().parse_lines('\n'.join(lines)))
+        self.assertEqual(new_toolpath.motion.tolist()[1:], [Toolpath.LINEAR] * 2)
+
+    ##############################################
+
+    def test_removed_feed(self):
+
+        # the G1 and F words of the removed lines are written on the next kept line
+        simplification, lines = self._simplify('\n'.join((
+            'G0 X0 Y0 F100',
+            'G1 X1 Y0 F100',
+            'X2 Y0',
+            'X3 Y0',
+            'X3 Y5',
+        )))
+        self.assertEqual(simplification.number_of_removed_lines, 2)
+        self.assertEqual(lines, ['G0 X0 Y0 F100', 'G1 F100 X3 Y0', 'X3 Y5'])
+        new_toolpath = Toolpath(GcodeParser().parse_lines('\n'.join(lines)))
+        self.assertEqual(new_toolpath.motion.tolist()[1:], [Toolpath.LINEAR] * 2)
+        self.assertEqual(new_toolpath.feed.tolist()[1:], [100] * 2)
+
+    ##############################################
+
+    def test_state_change(self):
+
+        simplification, lines = self._simplify('\n'.join((
+            'G1 X1 F100',
+            'X2',
+            'X3 F200',
+            'X4',
+            'G0 X5',
+            'X6',
+        )))
+        self.assertEqual(simplification.number_of_removed_lines, 0)
+
+        # a plane change breaks a polyline
+        simplification, lines = self._simplify('\n'.join((
+            'G17 G1 X1 F100',
+            'X2',
+            'G18 X3',
+        )))
+        self.assertEqual(simplification.number_of_removed_lines, 0)
+
+    ##############################################
+
+    def test_tolerance(self):
+
+        angles = np.linspace(0, np.pi / 2, 1001)
+        gcode = ['G1 F100'] + ['X{:.6f} Y{:.6f}'.format(10*np.cos(angle), 10*np.sin(angle))
+                               for angle in angles]
+        tolerance = 0.01
+        toolpath = Toolpath(GcodeParser().parse_lines('\n'.join(gcode)))
+        simplification = PolylineSimplification(toolpath, tolerance)
+        self.assertLess(simplification.report['remaining_lines'], 40)
+
+        # the points of the simplified polyline are on the circle and the chord sagitta is bounded
+        new_toolpath = Toolpath(simplification.to_program())
+        motion = new_toolpath.is_motion
+        end = new_toolpath.end[motion,:2]
+        np.testing.assert_allclose(np.hypot(end[:,0], end[:,1]), 10, atol=1e-6)
+        middle = (new_toolpath.start[motion,:2] + end) / 2
+        sagitta = 10 - np.hypot(middle[:,0], middle[:,1])
+        self.assertLess(np.max(sagitta[1:]), tolerance)
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,147 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Lexer import GcodeLexer
+from PythonicGcodeMachine.Gcode.Rs274.Machine import GcodeMachine
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.Serialization import ProgramCache
+from PythonicGcodeMachine.Gcode.Rs274.Statistics import Statistics
+
+####################################################################################################
+
+class TestStatistics(unittest.TestCase):
+
+    ##############################################
+
+    def test_lexer(self):
+
+        stats = Statistics()
+        lexer = GcodeLexer(stats=stats)
+        tokens = list(lexer.tokenize('G0 X1 Y2'))
+        self.assertEqual(stats.counter('tokens'), len(tokens))
+        self.assertEqual(stats.counter('characters'), 8)
+        self.assertGreater(stats.time('lex'), 0)
+
+        lexer.stats = None
+        list(lexer.tokenize('G0 X1 Y2'))
+        self.assertEqual(stats.counter('tokens'), len(tokens))
+
+    ##############################################
+
+    def test_parser(self):
+
+        stats = Statistics()
+        parser = GcodeParser(stats=stats, line_cache_size=10)
+        lines = ['G0 X1 Y[1 + 2]', 'G0 X1 Y[1 + 2]', '(comment)', 'G0 X']
+        diagnostics = []
+        program = parser.parse_lines(lines, diagnostics=diagnostics)
+        self.assertEqual(len(program), 3)
+        self.assertEqual(stats.counter('lines'), 4)
+        self.assertEqual(stats.counter('errors'), 1)
+        # line, G0, X1, Y, addition, then line, comment
+        self.assertEqual(stats.counter('nodes'), 5 + 2)
+        self.assertEqual(stats.counter('line_cache_hits'), 1)
+        self.assertEqual(stats.counter('line_cache_misses'), 3)
+        self.assertEqual(stats.hit_rates, {'line_cache': .25})
+        self.assertGreater(stats.time('parse'), 0)
+        self.assertGreater(stats.counter('tokens'), 0)
+
+        parser.stats = None
+        parser.parse_lines(lines[:1])
+        self.assertEqual(stats.counter('lines'), 4)
+
+        stats.reset()
+        parser = GcodeParser(stats=stats)
+        parser.parse_text('G0 X1\nG1 Y2', one_pass=True)
+        self.assertEqual(stats.counter('lines'), 2)
+        self.assertEqual(stats.counter('nodes'), 6)
+        self.assertEqual(stats.calls('parse'), 1)
+
+    ##############################################
+
+    def test_parse_file(self):
+
+        stats = Statistics()
+        parser = GcodeParser(stats=stats)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory).joinpath('program.ngc')
+            path.write_text('G0 X1\nG1 Y2\n')
+            parser.cache = ProgramCache(directory)
+            parser.parse_file(path)
+            parser.parse_file(path)
+        self.assertEqual(stats.counter('bytes'), 24)
+        self.assertEqual(stats.counter('lines'), 2)
+        self.assertEqual(stats.hit_rates, {'program_cache': .5})
+        self.assertEqual(stats.calls('read'), 2)
+
+    ##############################################
+
+    def test_machine(self):
+
+        stats = Statistics()
+        machine = GcodeMachine(stats=stats)
+        self.assertIs(machine.parser.stats, stats)
+        self.assertEqual(stats.calls('config_load'), 1)
+        self.assertEqual(stats.calls('parser_setup'), 1)
+
+    ##############################################
+
+    def test_dump(self):
+
+        stats = Statistics()
+        parser = GcodeParser(stats=stats, line_cache_size=10)
+        parser.parse_lines(['G0 X1', 'G0 X1'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory).joinpath('stats.json')
+            stats.dump(path)
+            data = json.loads(path.read_text())
+            if os.name == 'posix':
+                self.assertEqual(path.stat().st_mode & 0o777, Statistics.FILE_MODE)
+            self.assertEqual(data['counters']['lines'], 2)
+            self.assertEqual(data['hit_rates']['line_cache'], .5)
+
+            path = Path(directory).joinpath('stats.prom')
+            stats.dump(path)
+            text = path.read_text()
+        self.assertIn('# TYPE pythonic_gcode_lines counter\n', text)
+        self.assertIn('pythonic_gcode_lines_total 2\n', text)
+        self.assertIn('pythonic_gcode_stage_seconds_total{stage="parse"} ', text)
+        self.assertIn('pythonic_gcode_cache_hit_ratio{cache="line_cache"} 0.5\n', text)
+        self.assertTrue(text.endswith('# EOF\n'))
+
+        stats.reset()
+        self.assertEqual(stats.to_dict(), {'times': {}, 'calls': {}, 'counters': {}, 'hit_rates': {}})
+
+####################################################################################################
+
+if __name__ == '__main__':
+    unittest.main()
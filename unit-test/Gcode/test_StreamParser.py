@@ -0,0 +1,141 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+
+import asyncio
+import unittest
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Corpus import CorpusGenerator
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.StreamParser import GcodeStreamParser
+
+####################################################################################################
+
+async def iter_chunks(data, chunk_size, reads=None):
+    for i in range(0, len(data), chunk_size):
+        if reads is not None:
+            reads.append(i)
+        yield data[i:i+chunk_size]
+
+async def collect(stream_parser, source, diagnostics=None):
+    return [str(line) async for line in stream_parser.parse(source, diagnostics)]
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+####################################################################################################
+
+class TestStreamParser(unittest.TestCase):
+
+    ##############################################
+
+    def test_chunks(self):
+
+        lines = CorpusGenerator(seed=1).lines(1000)
+        expected = [str(line) for line in GcodeParser().parse_lines(lines)]
+
+        stream_parser = GcodeStreamParser(batch_size=64, collect_stats=True)
+        for line_end in ('\n', '\r\n', '\r'):
+            data = (line_end.join(lines) + line_end).encode('ascii')
+            for chunk_size in (1, 7, 4096):
+                self.assertEqual(run(collect(stream_parser, iter_chunks(data, chunk_size))), expected)
+        self.assertEqual(stream_parser.stats.counter('lines'), 9 * 1000)
+
+        # unterminated last line, str chunks
+        text = '\n'.join(lines)
+        self.assertEqual(run(collect(stream_parser, iter_chunks(text, 100))), expected)
+
+    ##############################################
+
+    def test_stream_reader(self):
+
+        async def parse():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'G0 X1\nG1 X2 Y3\n(a comment)\nG1 ')
+            reader.feed_data(b'Z-1\n')
+            reader.feed_eof()
+            return await collect(GcodeStreamParser(), reader)
+
+        self.assertEqual(run(parse()), ['G0 X1', 'G1 X2 Y3', '(a comment)', 'G1 Z-1'])
+
+    ##############################################
+
+    def test_diagnostics(self):
+
+        lines = ['G0 X1'] * 10
+        lines[3] = 'G0 X1 =='
+        lines[7] = 'G0 X]'
+        data = '\n'.join(lines).encode('ascii')
+        diagnostics = []
+        result = run(collect(GcodeStreamParser(batch_size=2), iter_chunks(data, 5), diagnostics))
+        self.assertEqual(len(result), 8)
+        self.assertEqual([diagnostic.line for diagnostic in diagnostics], [3, 7])
+
+    ##############################################
+
+    def test_interactive_source(self):
+
+        # the source sends a line and waits for its reply
+        async def parse():
+            replies = asyncio.Queue()
+
+            async def source():
+                for i in range(3):
+                    yield 'G1 X{}\n'.format(i).encode('ascii')
+                    await replies.get()
+
+            result = []
+            async for line in GcodeStreamParser().parse(source()):
+                result.append(str(line))
+                replies.put_nowait('ok')
+            return result
+
+        result = run(asyncio.wait_for(parse(), 10))
+        self.assertEqual(result, ['G1 X0', 'G1 X1', 'G1 X2'])
+
+    ##############################################
+
+    def test_backpressure(self):
+
+        data = '\n'.join(['G0 X1'] * 1000).encode('ascii')
+        reads = []
+
+        async def parse():
+            stream_parser = GcodeStreamParser(batch_size=10, max_pending_batches=2)
+            lines = stream_parser.parse(iter_chunks(data, 60, reads))
+            await lines.__anext__()
+            await lines.aclose()
+
+        run(parse())
+        # a chunk is a batch of 10 lines
+        self.assertLessEqual(len(reads), 3)
+
+####################################################################################################
+
+if __name__ == '__main__':
+    unittest.main()
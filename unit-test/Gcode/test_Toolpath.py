@@ -0,0 +1,141 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+import unittest
+
+import numpy as np
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.Toolpath import Toolpath
+
+####################################################################################################
+
+class TestToolpath(unittest.TestCase):
+
+    ##############################################
+
+    def _toolpath(self, gcode, parameters=None):
+        program = GcodeParser().parse_lines(gcode)
+        return Toolpath(program, parameters)
+
+    ##############################################
+
+    def test_units_and_distance_mode(self):
+
+        toolpath = self._toolpath('\n'.join((
+            'G21 G90 G0 X1 Y2',
+            'G20 X1',
+            'G91 X1 Y1',
+            'F10',
+            'G90 G1 Z-1',
+        )))
+        np.testing.assert_allclose(toolpath.end[:,:3], [
+            (1, 2, 0),
+            (25.4, 2, 0),
+            (50.8, 27.4, 0),
+            (50.8, 27.4, 0),
+            (50.8, 27.4, -25.4),
+        ])
+        np.testing.assert_allclose(toolpath.start[1:], toolpath.end[:-1])
+        self.assertEqual(list(toolpath.motion), [0, 0, 0, -1, 1])
+        self.assertEqual(toolpath.feed[4], 254)
+
+    ##############################################
+
+    def test_offsets(self):
+
+        toolpath = self._toolpath('\n'.join((
+            'G55 G0 X0 Y0',
+            'G10 L2 P2 X50',
+            'G0 X0',
+            'G92 X10',
+            'G1 X20',
+            'G53 G0 X5',
+            'G92.1',
+            'G0 X0',
+            'G54 X0',
+        )), parameters={5241: 100, 5242: 10})
+        np.testing.assert_allclose(toolpath.end[:,:2], [
+            (100, 10),
+            (100, 10),
+            (50, 10),
+            (50, 10),
+            (60, 10),
+            (5, 10),
+            (5, 10),
+            (50, 10),
+            (0, 10),
+        ])
+        self.assertEqual(list(toolpath.coordinate_system), [2]*8 + [1])
+        np.testing.assert_allclose(toolpath.program_position()[4,:2], (20, 0))
+
+    ##############################################
+
+    def test_home_with_axis_offset(self):
+
+        # the home position is a machine position, the G92 offset doesn't apply
+        toolpath = self._toolpath('\n'.join((
+            'G0 X10 Y10',
+            'G92 X0 Y0',
+            'G28',
+            'G0 X1',
+            'G30',
+        )), parameters={5181: 7, 5182: 8})
+        np.testing.assert_allclose(toolpath.end[:,:2], [
+            (10, 10),
+            (10, 10),
+            (0, 0),
+            (11, 0),
+            (7, 8),
+        ])
+
+    ##############################################
+
+    def test_arcs(self):
+
+        toolpath = self._toolpath('\n'.join((
+            'G0 X10 Y0',
+            'G3 X0 Y10 I-10 J0',
+            'G2 X10 Y0 R10',
+            'G3 X0 Y10 R-10',
+            'G18 G2 X10 Y10 Z10 R10',
+        )))
+        np.testing.assert_allclose(toolpath.centre[1], (0, 0, np.nan), atol=1e-9)
+        np.testing.assert_allclose(toolpath.centre[2], (0, 0, np.nan), atol=1e-9)
+        np.testing.assert_allclose(toolpath.centre[3], (10, 10, np.nan), atol=1e-9)
+        np.testing.assert_allclose(toolpath.centre[4], (0, np.nan, 10), atol=1e-9)
+        np.testing.assert_allclose(toolpath.lengths[1:], np.array([0.5, 0.5, 1.5, 0.5]) * np.pi * 10)
+
+    ##############################################
+
+    def test_parameters(self):
+
+        toolpath = self._toolpath('#1=2 G0 X#1\nX[#1 * 2]')
+        np.testing.assert_allclose(toolpath.end[:,0], (0, 4))
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,156 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+import unittest
+
+import numpy as np
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.Toolpath import Toolpath
+from PythonicGcodeMachine.Gcode.Rs274.Transform import AffineTransform, ProgramTransform
+
+####################################################################################################
+
+PROGRAM = '\n'.join((
+    'G21 G90 G0 X10 Y0',
+    'G1 X20 F100',
+    'G2 X30 Y10 I0 J10',
+    'G91 G1 X5 Y5',
+    'G90 G3 X10 Y0 R20 ; comment',
+    'G28',
+    'G0 X1',
+))
+
+####################################################################################################
+
+class TestTransform(unittest.TestCase):
+
+    ##############################################
+
+    def _check(self, transform, gcode=PROGRAM):
+
+        toolpath = Toolpath(GcodeParser().parse_lines(gcode))
+        program_transform = ProgramTransform(toolpath, transform)
+        text = program_transform.to_text(decimals=6)
+        new_toolpath = Toolpath(GcodeParser().parse_lines(text))
+
+        is_transformed = toolpath.is_motion & ~toolpath._flag_column('G28')
+        np.testing.assert_allclose(
+            new_toolpath.end[is_transformed,:3],
+            transform.transform_points(toolpath.end[is_transformed,:3]),
+            atol=1e-6,
+        )
+        is_arc = toolpath.is_arc
+        # the G17 arc centres have no Z value
+        np.testing.assert_allclose(
+            new_toolpath.centre[is_arc,:2],
+            transform.transform_points(np.nan_to_num(toolpath.centre[is_arc]))[:,:2],
+            atol=1e-6,
+        )
+        self.assertEqual(str(program_transform.to_program(decimals=6)).count('\n'), text.count('\n'))
+
+        return text.split('\n'), new_toolpath
+
+    ##############################################
+
+    def test_translation(self):
+
+        lines, toolpath = self._check(AffineTransform.translation(x=5, y=1))
+        self.assertEqual(lines[0], 'G21 G90 G0 X15 Y1')
+        self.assertEqual(lines[1], 'G1 X25 F100')
+        self.assertEqual(lines[3], 'G91 G1 X5 Y5')
+        self.assertEqual(lines[4], 'G90 G3 X15 Y1 R20 ; comment')
+        # after G28 the missing axis must be written
+        self.assertEqual(lines[6], 'G0 X6 Y1')
+
+    ##############################################
+
+    def test_rotation(self):
+
+        lines, toolpath = self._check(AffineTransform.rotation(90, centre=(10, 0, 0)))
+        self.assertEqual(lines[1], 'G1 X10 Y10 F100')
+        self.assertEqual(lines[2], 'G2 X0 Y20 I-10 J0')
+
+    ##############################################
+
+    def test_mirror_and_scale(self):
+
+        lines, toolpath = self._check(AffineTransform.mirror('X') @ AffineTransform.scale(2))
+        self.assertEqual(lines[2], 'G3 X-60 Y20 I0 J20')
+        self.assertEqual(lines[4], 'G90 G2 X-20 Y0 R40 ; comment')
+
+    ##############################################
+
+    def test_modal_arc_mirror(self):
+
+        # the G2 is set on a line without motion
+        gcode = '\n'.join((
+            'G0 X10 Y0',
+            'G2 F100',
+            'X20 Y10 I0 J10',
+            'X30 Y0 I10 J0',
+        ))
+        lines, toolpath = self._check(AffineTransform.mirror('X'), gcode)
+        self.assertEqual(lines[1], 'G3 F100')
+        self.assertEqual(toolpath.motion.tolist()[2:], [Toolpath.CCW_ARC] * 2)
+
+    ##############################################
+
+    def test_inch(self):
+
+        lines, toolpath = self._check(AffineTransform.translation(x=25.4), 'G20 G0 X1 Y1\nG91 X1')
+        self.assertEqual(lines, ['G20 G0 X2 Y1', 'G91 X1'])
+
+    ##############################################
+
+    def test_invalid_arc(self):
+
+        toolpath = Toolpath(GcodeParser().parse_lines(PROGRAM))
+        with self.assertRaises(ValueError):
+            ProgramTransform(toolpath, AffineTransform.scale(1, 2))
+        with self.assertRaises(ValueError):
+            ProgramTransform(toolpath, AffineTransform.rotation(30, axis='X'))
+
+    ##############################################
+
+    def test_canned_cycle(self):
+
+        # a G80 or a G81 without axis word doesn't execute a cycle
+        gcode = 'G0 X10 Y10 Z5\nG81 R2 F100\nG80\nG0 X20'
+        toolpath = Toolpath(GcodeParser().parse_lines(gcode))
+        self.assertFalse(np.any(toolpath.canned_cycle))
+        ProgramTransform(toolpath, AffineTransform.translation(x=10))
+
+        gcode = 'G0 X10 Y10 Z5\nG81 X20 Y20 Z-1 R2 F100\nX30\nG80\nG0 X0'
+        toolpath = Toolpath(GcodeParser().parse_lines(gcode))
+        self.assertEqual(list(toolpath.canned_cycle), [False, True, True, False, False])
+        self.assertFalse(np.any(toolpath.is_motion[1:3]))
+        with self.assertRaises(ValueError):
+            ProgramTransform(toolpath, AffineTransform.translation(x=10))
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    unittest.main()
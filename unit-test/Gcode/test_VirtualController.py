@@ -0,0 +1,159 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+
+import asyncio
+import os
+import time
+import unittest
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Corpus import CorpusGenerator
+from PythonicGcodeMachine.Gcode.Rs274.VirtualController import GcodeSender, VirtualController
+
+####################################################################################################
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(asyncio.wait_for(coroutine, 30))
+    finally:
+        loop.close()
+
+####################################################################################################
+
+class TestVirtualController(unittest.TestCase):
+
+    ##############################################
+
+    def test_tcp(self):
+
+        lines = CorpusGenerator(seed=0).lines(1000)
+
+        async def stream():
+            controller = VirtualController()
+            server = await controller.start_server('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            sender = await GcodeSender.connect('127.0.0.1', port)
+            report = await sender.send(lines + ['G1 X]', 'G80 X1', '$$', ''])
+            await sender.wait_idle()
+            status = await sender.status()
+            await sender.close()
+            controller.close()
+            await controller.wait_closed()
+            return controller, sender, report, status
+
+        controller, sender, report, status = run(stream())
+        self.assertTrue(sender.banner.startswith('Grbl'))
+        self.assertEqual(report.number_of_blocks, 1004)
+        self.assertEqual(report.errors, [(1000, 1), (1001, 20)])
+        self.assertGreater(report.blocks_per_second, 0)
+        self.assertEqual(controller.number_of_lines, 1004)
+        self.assertEqual(controller.number_of_rx_overflows, 0)
+        self.assertEqual(status, '<Idle|MPos:{}|Bf:16,128>'.format(
+            ','.join('{:.3f}'.format(x) for x in controller.position)))
+        self.assertEqual(controller.position, controller.interpreter.position)
+
+    ##############################################
+
+    def test_rejected_lines(self):
+
+        # a rejected line doesn't change the state or close the connection
+        lines = [
+            'G0 X[1/0]',
+            'G1 X[SQRT[-1]] F100',
+            'G2 X2 Y2',
+            'G81 X1 Y1 Z-1 R1',
+            'X3',
+            'G0 X[TAN[45]]',
+        ]
+
+        async def stream():
+            controller = VirtualController()
+            server = await controller.start_server('127.0.0.1', 0)
+            sender = await GcodeSender.connect('127.0.0.1', server.sockets[0].getsockname()[1])
+            report = await sender.send(lines)
+            await sender.wait_idle()
+            await sender.close()
+            controller.close()
+            await controller.wait_closed()
+            return controller, report
+
+        controller, report = run(stream())
+        self.assertEqual(report.errors, [(0, 20), (1, 20), (2, 20), (3, 20)])
+        self.assertAlmostEqual(controller.position[0], 1.)
+        self.assertEqual(controller.number_of_executed_blocks, 2)
+
+    ##############################################
+
+    def test_block_rate(self):
+
+        number_of_blocks = 20
+        block_rate = 200
+
+        async def stream():
+            controller = VirtualController(planner_size=4, block_rate=block_rate)
+            server = await controller.start_server('127.0.0.1', 0)
+            sender = await GcodeSender.connect('127.0.0.1', server.sockets[0].getsockname()[1])
+            start = time.perf_counter()
+            await sender.send(['G1 X{} F1000'.format(i) for i in range(number_of_blocks)])
+            # the planner buffer is full
+            status = await sender.status()
+            await sender.wait_idle()
+            elapsed = time.perf_counter() - start
+            await sender.close()
+            controller.close()
+            await controller.wait_closed()
+            return controller, status, elapsed
+
+        controller, status, elapsed = run(stream())
+        self.assertEqual(controller.number_of_executed_blocks, number_of_blocks)
+        self.assertTrue(status.startswith('<Run|'))
+        self.assertGreaterEqual(elapsed, (number_of_blocks - 1) / block_rate)
+
+    ##############################################
+
+    @unittest.skipUnless(hasattr(os, 'openpty'), 'pseudo-terminals are not available')
+    def test_pty(self):
+
+        lines = CorpusGenerator(seed=1).lines(200)
+
+        async def stream():
+            controller = VirtualController()
+            path = await controller.open_pty()
+            sender = await GcodeSender.open_pty(path)
+            report = await sender.send(lines)
+            await sender.wait_idle()
+            await sender.close()
+            controller.close()
+            await controller.wait_closed()
+            return controller, report
+
+        controller, report = run(stream())
+        self.assertEqual(report.errors, [])
+        self.assertEqual(controller.number_of_lines, 200)
+
+####################################################################################################
+
+if __name__ == '__main__':
+    unittest.main()
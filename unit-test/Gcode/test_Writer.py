@@ -0,0 +1,129 @@
+####################################################################################################
+#
+# PythonicGcodeMachine - A Python G-code Toolkit
+# Copyright (C) 2018 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+####################################################################################################
+
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+####################################################################################################
+
+from PythonicGcodeMachine.Gcode.Rs274.Parser import GcodeParser
+from PythonicGcodeMachine.Gcode.Rs274.Writer import ProgramWriter
+
+####################################################################################################
+
+class TestWriter(unittest.TestCase):
+
+    ##############################################
+
+    def test_format_number(self):
+
+        writer = ProgramWriter(decimals=3)
+        for value, text in (
+                (1, '1'),
+                (1., '1.000'),
+                (0.30000000000000004, '0.300'),
+                (-0.0001, '0.000'),
+                (-1.23456, '-1.235'),
+        ):
+            self.assertEqual(writer.format_number(value), text)
+
+        writer = ProgramWriter(decimals=4, trim_zeros=True)
+        for value, text in (
+                (1., '1'),
+                (10., '10'),
+                (1.5, '1.5'),
+                (-0.00001, '0'),
+                (100.12344, '100.1234'),
+        ):
+            self.assertEqual(writer.format_number(value), text)
+
+    ##############################################
+
+    def test_write(self):
+
+        parser = GcodeParser()
+        program = parser.parse_lines('\n'.join((
+            'N10 G1 X0.30000000000000004 Y-0.0001 F100 ; cut',
+            '/ G0 X1.5 (rapid)',
+            '#1=2.25 G1 Z[1 + #2]',
+            'G61.1 M3 S1000',
+        )))
+
+        fh = io.StringIO()
+        self.assertEqual(program.write(fh, chunk_size=3), 4)
+        self.assertEqual(fh.getvalue(), '\n'.join((
+            'N10 G1 X0.300 Y0.000 F100 ; cut',
+            '/ G0 X1.500 (rapid)',
+            '#1=2.250 G1 Z[1 + #2]',
+            'G61.1 M3 S1000',
+        )) + '\n')
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'program.ngc')
+            program.write(path, decimals=2, trim_zeros=True)
+            with open(path) as fh:
+                text = fh.read()
+        self.assertEqual(text.splitlines()[0], 'N10 G1 X0.3 Y0 F100 ; cut')
+        self.assertEqual(str(parser.parse_lines(text.splitlines())[1]), '/ G0 X1.5 (rapid)')
+
+    ##############################################
+
+    def test_columns(self):
+
+        nan = np.nan
+        columns = np.array((
+            (1, nan, 2.5),
+            (nan, nan, nan),
+            (-0.0001, 10, 100.1234),
+        ))
+
+        writer = ProgramWriter(decimals=3)
+        self.assertEqual(writer.format_columns(columns, 'XYZ', ('G1', 'M5', 'G0 ')), [
+            'G1 X1.000 Z2.500',
+            'M5',
+            'G0 X0.000 Y10.000 Z100.123',
+        ])
+
+        writer = ProgramWriter(decimals=3, trim_zeros=True, chunk_size=2)
+        fh = io.StringIO()
+        self.assertEqual(writer.write_columns(fh, columns, 'XYZ', prefixes='G1'), 3)
+        self.assertEqual(fh.getvalue(), 'G1 X1 Z2.5\nG1\nG1 X0 Y10 Z100.123\n')
+
+        # the columns match the line formatting
+        random_columns = np.random.RandomState(0).uniform(-100, 100, (100, 3))
+        random_columns[::3,1] = nan
+        lines = writer.format_columns(random_columns, 'XYZ', 'G1')
+        program = GcodeParser().parse_lines('\n'.join(lines))
+        self.assertEqual([writer.format_line(line) for line in program], lines)
+
+        with self.assertRaises(ValueError):
+            writer.format_columns(columns, 'XY')
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    unittest.main()